@@ -0,0 +1,125 @@
+"""A local HTTP server serving synthetic pages of varying weight."""
+
+import base64
+import re
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import TracebackType
+from typing import Final
+
+FIXTURES_DIR: Final[Path] = Path(__file__).parent / "fixtures"
+
+# Page weights: (paragraphs, table rows, images).
+WEIGHTS: Final[dict[str, tuple[int, int, int]]] = {
+    "light": (5, 10, 0),
+    "medium": (200, 500, 20),
+    "heavy": (2000, 5000, 100),
+}
+
+_PIXEL = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8BQ"
+    "DwAEhQGAhKmMIQAAAABJRU5ErkJggg=="
+)
+_PARAGRAPH = (
+    "<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do "
+    "eiusmod tempor incididunt ut labore et dolore magna aliqua.</p>"
+)
+_PAGE = re.compile(r"^/page/(\w+)(?:/\d+)?$")
+
+
+def synthetic_page(weight: str) -> bytes:
+    """Build an HTML page with text, a results table and images."""
+    paragraphs, rows, images = WEIGHTS[weight]
+    body = [_PARAGRAPH] * paragraphs
+    body.append("<table>")
+    body.extend(
+        f"<tr><td>Test {row}</td><td class='passed'>ok</td></tr>"
+        for row in range(rows)
+    )
+    body.append("</table>")
+    body.extend(
+        f"<img src='/pixel/{image}.png' width='64' height='64'>"
+        for image in range(images)
+    )
+    return (
+        "<!DOCTYPE html><html><head><title>"
+        f"{weight}</title></head><body>{''.join(body)}</body></html>"
+    ).encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    pages: Final[dict[str, bytes]] = {
+        weight: synthetic_page(weight) for weight in WEIGHTS
+    }
+
+    def do_GET(self) -> None:
+        if match := _PAGE.match(self.path):
+            page = self.pages.get(match.group(1))
+            if page is not None:
+                self._send(page, "text/html; charset=utf-8")
+                return
+        if self.path.startswith("/pixel/"):
+            self._send(_PIXEL, "image/png")
+            return
+        fixture = (FIXTURES_DIR / self.path.lstrip("/")).resolve()
+        if (
+            fixture.parent == FIXTURES_DIR.resolve()
+            and fixture.suffix == ".html"
+            and fixture.is_file()
+        ):
+            self._send(fixture.read_bytes(), "text/html; charset=utf-8")
+            return
+        self.send_error(HTTPStatus.NOT_FOUND)
+
+    def _send(self, body: bytes, content_type: str) -> None:
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        """Keep request logs out of benchmark output."""
+
+
+class FixtureServer:
+    """Serve fixture pages from a background thread.
+
+    Pages are available at ``/page/<weight>`` (optionally suffixed with
+    ``/<n>`` to make URLs unique) and saved fixtures by file name, e.g.
+    ``/sannysoft.html``.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+
+    @property
+    def base_url(self) -> str:
+        """The server's root URL."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def url(self, path: str) -> str:
+        """Absolute URL for ``path`` on this server."""
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def __enter__(self) -> "FixtureServer":
+        """Start serving."""
+        self._thread.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Stop serving."""
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,206 @@
+"""In-page cost of the stealth init script on DOM-heavy pages.
+
+For each fixture, a page with the init script and a page without it
+run the same workload of DOM mutations and ``querySelector`` calls;
+the difference is the overhead our wrappers and observers add. The
+script's own execution time is measured by evaluating it in a clean
+page. The sannysoft fixture is served at its real URL, so its page
+module is active there and nowhere else.
+
+Usage::
+
+    python -m benchmarks.inpage --save inpage.json
+    python -m benchmarks.inpage --max-overhead 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Final
+
+from playwright.async_api import BrowserContext, Page, Route
+
+from benchmarks.fixture_server import FIXTURES_DIR, FixtureServer
+from undetectable_bot.browser.async_api import AsyncStealthBrowser
+from undetectable_bot.utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROUNDS: Final[int] = 5
+DEFAULT_MUTATIONS: Final[int] = 5000
+DEFAULT_MAX_OVERHEAD: Final[float] = 0.1
+SANNYSOFT_URL: Final[str] = "https://bot.sannysoft.com/"
+
+# Appends and removes nodes in batches, yielding to the event loop
+# after each so mutation observers run inside the timed window.
+_WORKLOAD = """
+async (mutations) => {
+  const root = document.body;
+  const start = performance.now();
+  for (let done = 0; done < mutations; done += 100) {
+    for (let i = 0; i < 100; i++) {
+      const node = document.createElement("div");
+      node.textContent = String(done + i);
+      root.appendChild(node);
+      if (i % 2) root.removeChild(node);
+      document.querySelector("td.passed");
+    }
+    await new Promise((resolve) => setTimeout(resolve, 0));
+  }
+  return performance.now() - start;
+}
+"""
+
+_EXECUTE = """
+(source) => {
+  const start = performance.now();
+  (0, eval)(source);
+  return performance.now() - start;
+}
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class FixtureResult:
+    """Timings in ms for one fixture, with and without the script."""
+
+    name: str
+    script: dict[str, float]
+    baseline: dict[str, float]
+    stealth: dict[str, float]
+
+    @property
+    def overhead(self) -> float:
+        """Median workload slowdown as a fraction of the baseline."""
+        base = self.baseline["p50"]
+        return (self.stealth["p50"] - base) / base if base else 0.0
+
+
+async def _serve_sannysoft(route: Route) -> None:
+    await route.fulfill(
+        path=FIXTURES_DIR / "sannysoft.html",
+        content_type="text/html; charset=utf-8",
+    )
+
+
+async def _open(context: BrowserContext, url: str) -> Page:
+    page = await context.new_page()
+    await page.goto(url, wait_until="load")
+    return page
+
+
+async def measure_fixture(  # noqa: PLR0913
+    browser: AsyncStealthBrowser,
+    plain: BrowserContext,
+    name: str,
+    url: str,
+    *,
+    rounds: int,
+    mutations: int,
+) -> FixtureResult:
+    """Time the script and the workload on ``url`` over ``rounds``."""
+    script, baseline, stealth = Histogram(), Histogram(), Histogram()
+    context = await browser.new_context()
+    await context.route(f"{SANNYSOFT_URL}**", _serve_sannysoft)
+    try:
+        for _ in range(rounds):
+            page = await _open(plain, url)
+            script.observe(await page.evaluate(_EXECUTE, browser.init_script))
+            await page.close()
+            page = await _open(plain, url)
+            baseline.observe(await page.evaluate(_WORKLOAD, mutations))
+            await page.close()
+            page = await _open(context, url)
+            stealth.observe(await page.evaluate(_WORKLOAD, mutations))
+            await page.close()
+    finally:
+        await context.close()
+    return FixtureResult(
+        name, script.summary(), baseline.summary(), stealth.summary()
+    )
+
+
+async def run(
+    server: FixtureServer, rounds: int, mutations: int
+) -> list[FixtureResult]:
+    """Measure every fixture on one browser."""
+    fixtures = {
+        "heavy": server.url("page/heavy"),
+        "sannysoft": SANNYSOFT_URL,
+    }
+    async with AsyncStealthBrowser() as browser:
+        if browser.browser is None:
+            return []
+        # Same settings as the stealth contexts, but no init script.
+        plain = await browser.browser.new_context(**browser.context_settings)
+        await plain.route(f"{SANNYSOFT_URL}**", _serve_sannysoft)
+        try:
+            return [
+                await measure_fixture(
+                    browser,
+                    plain,
+                    name,
+                    url,
+                    rounds=rounds,
+                    mutations=mutations,
+                )
+                for name, url in fixtures.items()
+            ]
+        finally:
+            await plain.close()
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments for the in-page benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--rounds", type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument(
+        "-m", "--mutations", type=int, default=DEFAULT_MUTATIONS
+    )
+    parser.add_argument(
+        "--save", type=Path, metavar="FILE", help="write results as JSON"
+    )
+    parser.add_argument(
+        "--max-overhead",
+        type=float,
+        default=DEFAULT_MAX_OVERHEAD,
+        help="allowed workload slowdown as a fraction, default %(default)s",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    """Measure every fixture and fail on excessive overhead."""
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    args = parse_args()
+    with FixtureServer() as server:
+        results = asyncio.run(run(server, args.rounds, args.mutations))
+
+    report = json.dumps(
+        {
+            result.name: {**asdict(result), "overhead": result.overhead}
+            for result in results
+        },
+        indent=2,
+    )
+    sys.stdout.write(report + "\n")
+    if args.save:
+        args.save.write_text(report, encoding="utf-8")
+    failed = False
+    for result in results:
+        if result.overhead > args.max_overhead:
+            logger.error(
+                "%s: workload %.1f%% slower with the init script",
+                result.name,
+                result.overhead * 100,
+            )
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
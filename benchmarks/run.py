@@ -0,0 +1,308 @@
+"""Throughput, latency and memory benchmarks for the stealth browsers.
+
+Every scenario drives a browser against the local fixture server and
+reports pages per second, latency percentiles and the peak resident
+memory of this process and of Chromium.
+
+Usage::
+
+    python -m benchmarks.run --save baseline.json
+    python -m benchmarks.run --baseline baseline.json --tolerance 0.15
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from types import TracebackType
+from typing import Final
+
+from benchmarks.fixture_server import FixtureServer
+from undetectable_bot.browser.async_api import AsyncStealthBrowser
+from undetectable_bot.browser.sync_api import StealthBrowser
+from undetectable_bot.utils.metrics import Histogram
+from undetectable_bot.utils.procfs import chromium_rss_bytes, rss_bytes
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGES: Final[int] = 50
+DEFAULT_CONCURRENCY: Final[int] = 8
+DEFAULT_TOLERANCE: Final[float] = 0.1
+_SAMPLE_INTERVAL = 0.05
+
+
+@dataclass(frozen=True, slots=True)
+class ScenarioResult:
+    """Measurements for one benchmark scenario."""
+
+    name: str
+    pages: int
+    seconds: float
+    latency: dict[str, float]
+    python_peak_rss: int
+    chromium_peak_rss: int
+
+    @property
+    def pages_per_second(self) -> float:
+        """Throughput over the whole scenario."""
+        return self.pages / self.seconds if self.seconds else 0.0
+
+
+class Measurement:
+    """Wall time and peak memory of a block of work.
+
+    Resident memory of this process and of Chromium is sampled from a
+    background thread while the block runs.
+    """
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+        self.python_peak_rss = 0
+        self.chromium_peak_rss = 0
+        self._start = 0.0
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self) -> None:
+        pid = os.getpid()
+        while True:
+            self.python_peak_rss = max(self.python_peak_rss, rss_bytes(pid))
+            self.chromium_peak_rss = max(
+                self.chromium_peak_rss, chromium_rss_bytes(pid)
+            )
+            if self._stop.wait(_SAMPLE_INTERVAL):
+                return
+
+    def __enter__(self) -> "Measurement":
+        """Start the clock and the memory sampler."""
+        self._sampler.start()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Stop the clock and the memory sampler."""
+        self.seconds = time.perf_counter() - self._start
+        self._stop.set()
+        self._sampler.join()
+
+    def result(
+        self, name: str, pages: int, latency: Histogram
+    ) -> ScenarioResult:
+        """Combine the measurements with per-page latencies."""
+        return ScenarioResult(
+            name,
+            pages,
+            self.seconds,
+            latency.summary(),
+            self.python_peak_rss,
+            self.chromium_peak_rss,
+        )
+
+
+def cold_launch(server: FixtureServer, pages: int) -> ScenarioResult:
+    """Launch a fresh sync browser for every page."""
+    latency = Histogram()
+    runs = max(pages // 10, 1)
+    with Measurement() as measurement:
+        for _ in range(runs):
+            start = time.perf_counter()
+            with StealthBrowser() as browser:
+                context = browser.new_context()
+                page = context.new_page()
+                page.goto(server.url("page/light"))
+                context.close()
+            latency.observe(time.perf_counter() - start)
+    return measurement.result("cold_launch", runs, latency)
+
+
+async def context_churn(
+    browser: AsyncStealthBrowser, server: FixtureServer, pages: int
+) -> ScenarioResult:
+    """Create, use and close a fresh context per page."""
+    latency = Histogram()
+    with Measurement() as measurement:
+        for index in range(pages):
+            start = time.perf_counter()
+            context = await browser.new_context()
+            page = await context.new_page()
+            await page.goto(server.url(f"page/light/{index}"))
+            await context.close()
+            latency.observe(time.perf_counter() - start)
+    return measurement.result("context_churn", pages, latency)
+
+
+async def _fan_out(
+    pages: int,
+    concurrency: int,
+    visit: Callable[[int], Awaitable[None]],
+    latency: Histogram,
+) -> None:
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(index: int) -> None:
+        async with limit:
+            start = time.perf_counter()
+            await visit(index)
+            latency.observe(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(index) for index in range(pages)))
+
+
+async def concurrent_pages(
+    browser: AsyncStealthBrowser,
+    server: FixtureServer,
+    pages: int,
+    concurrency: int,
+) -> ScenarioResult:
+    """Load medium pages on pooled contexts, many at a time."""
+    latency = Histogram()
+
+    async def visit(index: int) -> None:
+        async with browser.context() as context:
+            page = await context.new_page()
+            await page.goto(server.url(f"page/medium/{index}"))
+            await page.content()
+
+    with Measurement() as measurement:
+        await _fan_out(pages, concurrency, visit, latency)
+    return measurement.result("concurrent_pages", pages, latency)
+
+
+async def screenshot_heavy(
+    browser: AsyncStealthBrowser,
+    server: FixtureServer,
+    pages: int,
+    concurrency: int,
+) -> ScenarioResult:
+    """Screenshot heavy synthetic pages and the saved fixture."""
+    latency = Histogram()
+    targets = ("page/heavy", "sannysoft.html")
+
+    async def visit(index: int) -> None:
+        async with browser.context() as context:
+            page = await context.new_page()
+            await page.goto(server.url(targets[index % len(targets)]))
+            await page.screenshot(full_page=True)
+
+    with Measurement() as measurement:
+        await _fan_out(pages, concurrency, visit, latency)
+    return measurement.result("screenshot_heavy", pages, latency)
+
+
+async def run_async(
+    server: FixtureServer, pages: int, concurrency: int
+) -> list[ScenarioResult]:
+    """Run the scenarios that share one async browser."""
+    async with AsyncStealthBrowser(
+        min_contexts=concurrency, max_contexts=concurrency
+    ) as browser:
+        return [
+            await context_churn(browser, server, pages),
+            await concurrent_pages(browser, server, pages, concurrency),
+            await screenshot_heavy(browser, server, pages, concurrency),
+        ]
+
+
+def compare(
+    results: list[ScenarioResult],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float,
+) -> list[str]:
+    """Describe every scenario that regressed against the baseline."""
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None:
+            continue
+        floor = previous["pages_per_second"] * (1 - tolerance)
+        if result.pages_per_second < floor:
+            regressions.append(
+                f"{result.name}: {result.pages_per_second:.2f} pages/s, "
+                f"baseline {previous['pages_per_second']:.2f}"
+            )
+        ceiling = previous["p95"] * (1 + tolerance)
+        if result.latency["p95"] > ceiling:
+            regressions.append(
+                f"{result.name}: p95 {result.latency['p95']:.3f}s, "
+                f"baseline {previous['p95']:.3f}s"
+            )
+    return regressions
+
+
+def summarize(results: list[ScenarioResult]) -> dict[str, dict[str, float]]:
+    """Flatten results into the JSON saved as a baseline."""
+    return {
+        result.name: {
+            "pages_per_second": result.pages_per_second,
+            **result.latency,
+            **{
+                key: value
+                for key, value in asdict(result).items()
+                if key.endswith("_rss")
+            },
+        }
+        for result in results
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments for the benchmark runner."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--pages", type=int, default=DEFAULT_PAGES)
+    parser.add_argument(
+        "-c", "--concurrency", type=int, default=DEFAULT_CONCURRENCY
+    )
+    parser.add_argument(
+        "--save", type=Path, metavar="FILE", help="write results as JSON"
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        metavar="FILE",
+        help="fail if results regress against a saved run",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="allowed regression as a fraction, default %(default)s",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    """Run every scenario and report or compare the results."""
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    args = parse_args()
+    with FixtureServer() as server:
+        results = [cold_launch(server, args.pages)]
+        results += asyncio.run(run_async(server, args.pages, args.concurrency))
+
+    summary = summarize(results)
+    report = json.dumps(summary, indent=2)
+    sys.stdout.write(report + "\n")
+    if args.save:
+        args.save.write_text(report, encoding="utf-8")
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            logger.error("Regression in %s", regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
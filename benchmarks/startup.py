@@ -0,0 +1,131 @@
+"""Import-time budget for the package and its lightweight modules.
+
+Each module is imported in a fresh interpreter under
+``python -X importtime``. The run fails if the best of several imports
+exceeds the module's ceiling, or if a module that should stay light
+pulls in Playwright.
+
+Usage::
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --scale 2  # on a slow machine
+"""
+
+import argparse
+import json
+import logging
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Final
+
+logger = logging.getLogger(__name__)
+
+# Ceilings in milliseconds for the whole ``import <module>`` statement.
+CEILINGS: Final[dict[str, float]] = {
+    "undetectable_bot": 40.0,
+    "undetectable_bot.utils.constants": 80.0,
+    "undetectable_bot.utils.metrics": 100.0,
+    "undetectable_bot.browser.resources": 100.0,
+    "undetectable_bot.browser.cache": 200.0,
+    "undetectable_bot.utils.artifacts": 250.0,
+}
+FORBIDDEN: Final[tuple[str, ...]] = ("playwright",)
+DEFAULT_REPEAT: Final[int] = 5
+
+
+@dataclass(frozen=True, slots=True)
+class ImportCost:
+    """What importing one module in a fresh interpreter costs."""
+
+    module: str
+    milliseconds: float
+    forbidden: tuple[str, ...]
+
+
+def parse_importtime(output: str) -> tuple[float, list[str]]:
+    """Total milliseconds and imported names from ``-X importtime``.
+
+    Only top-level entries are summed, since their cumulative times
+    already include everything they imported.
+    """
+    total = 0
+    names = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        if not cumulative.strip().isdigit():
+            continue  # The column header.
+        names.append(name.strip())
+        if not name.removeprefix(" ").startswith(" "):
+            total += int(cumulative)
+    return total / 1000, names
+
+
+def measure(module: str, repeat: int = DEFAULT_REPEAT) -> ImportCost:
+    """Import ``module`` ``repeat`` times and keep the fastest run."""
+    best = float("inf")
+    forbidden: set[str] = set()
+    for _ in range(repeat):
+        process = subprocess.run(  # noqa: S603
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        milliseconds, names = parse_importtime(process.stderr)
+        best = min(best, milliseconds)
+        forbidden.update(
+            root
+            for name in names
+            if (root := name.partition(".")[0]) in FORBIDDEN
+        )
+    return ImportCost(module, best, tuple(sorted(forbidden)))
+
+
+def check(costs: list[ImportCost], scale: float) -> list[str]:
+    """Describe every module over budget or importing too much."""
+    failures = []
+    for cost in costs:
+        ceiling = CEILINGS[cost.module] * scale
+        if cost.milliseconds > ceiling:
+            failures.append(
+                f"{cost.module}: {cost.milliseconds:.1f}ms, "
+                f"ceiling {ceiling:.1f}ms"
+            )
+        if cost.forbidden:
+            failures.append(
+                f"{cost.module}: imports {', '.join(cost.forbidden)}"
+            )
+    return failures
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments for the startup benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-r", "--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="multiply every ceiling, default %(default)s",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    """Measure every module and fail on a blown budget."""
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    args = parse_args()
+    costs = [measure(module, args.repeat) for module in CEILINGS]
+    report = {cost.module: round(cost.milliseconds, 1) for cost in costs}
+    sys.stdout.write(json.dumps(report, indent=2) + "\n")
+    failures = check(costs, args.scale)
+    for failure in failures:
+        logger.error("Over budget: %s", failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,32 @@
+from pathlib import Path
+
+from undetectable_bot.utils.artifact_store import ArtifactStore
+
+
+def test_put_same_data_twice_leaves_no_temporary_links(
+    tmp_path: Path,
+) -> None:
+    store = ArtifactStore(tmp_path / "store")
+    path = tmp_path / "data" / "service" / "screenshot.png"
+
+    first = store.put(path, b"pixels")
+    second = store.put(path, b"pixels")
+
+    assert first == second
+    assert store.reused == 1
+    assert path.read_bytes() == b"pixels"
+    assert path.samefile(store.blobs.path(first))
+    assert [entry.name for entry in path.parent.iterdir()] == [path.name]
+
+
+def test_put_new_data_replaces_the_link(tmp_path: Path) -> None:
+    store = ArtifactStore(tmp_path / "store")
+    path = tmp_path / "data" / "index.html"
+
+    old = store.put(path, b"<p>old</p>")
+    new = store.put(path, b"<p>new</p>")
+
+    assert old != new
+    assert path.read_bytes() == b"<p>new</p>"
+    assert store.blobs.path(old).read_bytes() == b"<p>old</p>"
+    assert [entry.name for entry in path.parent.iterdir()] == [path.name]
@@ -0,0 +1,60 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from undetectable_bot.browser.batch import FetchResult, fetch_many
+from undetectable_bot.utils.exceptions import BrowserRelaunchError
+from undetectable_bot.utils.metrics import Metrics
+
+URLS = [f"https://{name}.test/" for name in ("a", "b", "c")]
+
+
+class _Browser:
+    """Fails the first job as if the browser could not come back."""
+
+    def __init__(self) -> None:
+        self.metrics = Metrics()
+        self.pool = SimpleNamespace(max_size=2)
+        self.calls = 0
+
+    async def run(
+        self,
+        job: Callable[[Any], Awaitable[FetchResult]],
+        *,
+        idempotent: bool,
+    ) -> FetchResult:
+        del job, idempotent
+        self.calls += 1
+        if self.calls == 1:
+            raise BrowserRelaunchError(3)
+        return FetchResult(self.calls, "https://ok.test/")
+
+
+async def _collect(
+    browser: _Browser, concurrency: int | None = None
+) -> list[FetchResult]:
+    return [
+        result
+        async for result in fetch_many(
+            browser,  # type: ignore[arg-type]
+            URLS,
+            concurrency=concurrency,
+        )
+    ]
+
+
+def test_a_lost_browser_fails_one_result_not_the_stream() -> None:
+    results = asyncio.run(_collect(_Browser()))
+
+    failed = [result for result in results if result.error]
+    assert len(results) == len(URLS)
+    assert len(failed) == 1
+    assert failed[0].url == URLS[0]
+
+
+def test_zero_concurrency_is_rejected() -> None:
+    with pytest.raises(ValueError, match="concurrency"):
+        asyncio.run(_collect(_Browser(), concurrency=0))
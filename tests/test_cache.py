@@ -0,0 +1,134 @@
+import asyncio
+import itertools
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from undetectable_bot.browser.cache import ResponseCache
+from undetectable_bot.browser.core import _cache_handler
+
+URL = "https://a.test/app.js"
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Make every call to ``time.time`` a second later than the last."""
+    ticks = itertools.count(1000.0)
+    monkeypatch.setattr(
+        "undetectable_bot.browser.cache.time.time", lambda: next(ticks)
+    )
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> ResponseCache:
+    return ResponseCache(tmp_path, max_bytes=10, ttl=60)
+
+
+@dataclass
+class _Request:
+    url: str = URL
+    method: str = "GET"
+    resource_type: str = "script"
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class _Response:
+    status: int
+    headers: dict[str, str] = field(default_factory=dict)
+    payload: bytes = b""
+
+    async def body(self) -> bytes:
+        return self.payload
+
+
+@dataclass
+class _Route:
+    responses: list[_Response]
+    request: _Request = field(default_factory=_Request)
+    sent: list[dict[str, str]] = field(default_factory=list)
+    fulfilled: list[dict[str, Any]] = field(default_factory=list)
+
+    async def fetch(self, headers: dict[str, str]) -> _Response:
+        self.sent.append(headers)
+        return self.responses.pop(0)
+
+    async def fulfill(self, **kwargs: Any) -> None:  # noqa: ANN401
+        self.fulfilled.append(kwargs)
+
+    async def fallback(self) -> None:
+        pytest.fail("the request should have been handled")
+
+
+def _handle(cache: ResponseCache, route: _Route) -> None:
+    asyncio.run(_cache_handler(cache)(route))  # type: ignore[arg-type]
+
+
+@pytest.mark.usefixtures("clock")
+def test_least_recently_used_entries_are_evicted(
+    cache: ResponseCache,
+) -> None:
+    cache.store("https://a.test/1", 200, {}, b"1111")
+    cache.store("https://a.test/2", 200, {}, b"2222")
+    assert cache.lookup("https://a.test/1") is not None
+    cache.store("https://a.test/3", 200, {}, b"3333")
+
+    assert cache.lookup("https://a.test/2") is None
+    assert cache.lookup("https://a.test/1") is not None
+    assert cache.stats.evictions == 1
+    assert cache.total_bytes == len(b"11113333")
+
+
+def test_max_age_overrides_the_default_ttl(cache: ResponseCache) -> None:
+    cache.store(URL, 200, {"cache-control": "max-age=0"}, b"js")
+    stale = cache.lookup(URL)
+    cache.store("https://a.test/b.js", 200, {}, b"js")
+    fresh = cache.lookup("https://a.test/b.js")
+
+    assert stale is not None
+    assert not stale.fresh
+    assert fresh is not None
+    assert fresh.fresh
+
+
+def test_uncacheable_responses_are_not_stored(cache: ResponseCache) -> None:
+    cache.store(URL, 200, {"cache-control": "no-store"}, b"js")
+    cache.store("https://a.test/404", 404, {}, b"")
+
+    assert cache.lookup(URL) is None
+    assert cache.lookup("https://a.test/404") is None
+
+
+def test_not_modified_refreshes_and_serves_the_cached_body(
+    cache: ResponseCache,
+) -> None:
+    cache.store(URL, 200, {"cache-control": "no-cache", "etag": "v1"}, b"js")
+    route = _Route(
+        [_Response(HTTPStatus.NOT_MODIFIED, {"cache-control": "max-age=60"})]
+    )
+
+    _handle(cache, route)
+
+    assert route.sent == [{"if-none-match": "v1"}]
+    assert route.fulfilled[0]["body"] == b"js"
+    assert cache.stats.revalidations == 1
+    entry = cache.lookup(URL)
+    assert entry is not None
+    assert entry.fresh
+
+
+def test_an_evicted_body_is_fetched_again(cache: ResponseCache) -> None:
+    cache.store(URL, 200, {}, b"old")
+    entry = cache.lookup(URL)
+    assert entry is not None
+    cache.blobs.delete(entry.digest)
+    route = _Route([_Response(HTTPStatus.OK, payload=b"new")])
+
+    _handle(cache, route)
+
+    assert route.sent == [{}]
+    assert route.fulfilled[0]["body"] == b"new"
+    assert cache.read(cache.lookup(URL)) == b"new"  # type: ignore[arg-type]
@@ -0,0 +1,152 @@
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from undetectable_bot.utils.config import load_config, parse_config
+from undetectable_bot.utils.exceptions import ConfigError
+from undetectable_bot.utils.test_services import config_from_args, parse_args
+
+THUMBNAIL_WIDTH = 480
+CONFIG = f"""\
+[run]
+concurrency = 8
+timeout = 45
+capture = {{ max_height = 4000, screenshot_format = "png" }}
+
+[run.readiness]
+deadline = 8
+
+[services.plain]
+url = "https://plain.test/"
+
+[services.tuned]
+url = "https://tuned.test/"
+capture = {{ thumbnail_width = {THUMBNAIL_WIDTH} }}
+readiness = {{ selector = "#results" }}
+"""
+
+
+@pytest.mark.parametrize(
+    ("data", "where"),
+    [
+        ({"runs": {}}, "the top level: runs"),
+        ({"run": {"concurency": 2}}, r"\[run\]: concurency"),
+        (
+            {"run": {"capture": {"height": 1}}},
+            r"\[run\.capture\]: height",
+        ),
+        (
+            {"services": {"a": {"url": "https://a.test/", "wait": 1}}},
+            r"\[services\.a\]: wait",
+        ),
+    ],
+)
+def test_unknown_settings_are_rejected(
+    data: dict[str, Any], where: str
+) -> None:
+    with pytest.raises(ValueError, match=f"unknown settings in {where}"):
+        parse_config(data)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"run": {"concurrency": "8"}},
+        {"run": {"timeout": "45"}},
+        {"run": {"args": ["--mute-audio", 1]}},
+        {"run": {"readiness": {"deadline": "soon"}}},
+        {"context": {"viewport": {"width": 1280, "height": "720"}}},
+    ],
+)
+def test_settings_of_the_wrong_type_are_rejected(
+    data: dict[str, Any],
+) -> None:
+    with pytest.raises(TypeError):
+        parse_config(data)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"run": {"concurrency": True}},
+        {"run": {"timeout": True}},
+        {"run": {"capture": {"max_height": True}}},
+    ],
+)
+def test_a_bool_is_not_a_number(data: dict[str, Any]) -> None:
+    with pytest.raises(TypeError):
+        parse_config(data)
+
+
+@pytest.mark.parametrize("clip", [[0, 0, 100], [0, 0, 100, 50, 1], "all"])
+def test_a_clip_needs_four_numbers(clip: object) -> None:
+    data = {"run": {"capture": {"mode": "clip", "clip": clip}}}
+
+    with pytest.raises(TypeError, match="x, y, width and height"):
+        parse_config(data)
+
+
+def test_a_clip_of_four_numbers_is_read() -> None:
+    clip = (0.0, 10.0, 100.0, 50.0)
+    data = {"run": {"capture": {"mode": "clip", "clip": list(clip)}}}
+
+    assert parse_config(data).capture.clip == clip
+
+
+def test_service_tables_are_merged_over_the_run(tmp_path: Path) -> None:
+    path = tmp_path / "run.toml"
+    path.write_text(CONFIG, encoding="utf-8")
+
+    config = load_config(path)
+    plain, tuned = config.services["plain"], config.services["tuned"]
+
+    assert plain.capture is None
+    assert plain.readiness is None
+    assert tuned.capture is not None
+    assert tuned.capture.max_height == config.capture.max_height
+    assert tuned.capture.screenshot_format == "png"
+    assert tuned.capture.thumbnail_width == THUMBNAIL_WIDTH
+    assert tuned.readiness is not None
+    assert tuned.readiness.deadline == config.readiness.deadline
+    assert tuned.readiness.selector == "#results"
+
+
+def test_invalid_files_raise_config_error(tmp_path: Path) -> None:
+    path = tmp_path / "run.toml"
+    path.write_text("[run]\nconcurrency = 0\n", encoding="utf-8")
+
+    with pytest.raises(ConfigError, match=r"run\.toml"):
+        load_config(path)
+
+
+def test_command_line_options_win_over_the_file(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = tmp_path / "run.toml"
+    path.write_text(CONFIG, encoding="utf-8")
+    concurrency, deadline = 2, 3.0
+    monkeypatch.setattr(
+        "sys.argv",
+        [
+            "test_services",
+            f"--config={path}",
+            f"--concurrency={concurrency}",
+            "--screenshot-format=jpeg",
+            f"--ready-deadline={deadline}",
+        ],
+    )
+
+    config = config_from_args(parse_args())
+    tuned = config.services["tuned"]
+
+    assert config.concurrency == concurrency
+    assert config.timeout == load_config(path).timeout
+    assert config.capture.screenshot_format == "jpeg"
+    assert config.artifacts.screenshot_format == "jpeg"
+    assert config.readiness.deadline == deadline
+    assert tuned.capture is not None
+    assert tuned.capture.screenshot_format == "jpeg"
+    assert tuned.readiness is not None
+    assert tuned.readiness.deadline == deadline
+    assert tuned.readiness.selector == "#results"
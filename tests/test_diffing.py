@@ -0,0 +1,27 @@
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from undetectable_bot.utils.diffing import diff_screenshots
+
+SIZE = (40, 300)
+
+
+def test_tall_captures_are_compared_past_the_pixel_limit(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    before, after = tmp_path / "before.png", tmp_path / "after.png"
+    Image.new("RGB", SIZE, "white").save(before)
+    changed = Image.new("RGB", SIZE, "white")
+    changed.paste("black", (0, 0, 10, 10))
+    changed.save(after)
+    # Pillow refuses images over twice the limit.
+    limit = SIZE[0] * SIZE[1] // 4
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", limit)
+
+    diff = diff_screenshots(before, after)
+
+    assert diff.changed_pixels == len(range(10)) ** 2
+    assert diff.after_size == SIZE
+    assert limit == Image.MAX_IMAGE_PIXELS
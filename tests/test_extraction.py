@@ -0,0 +1,62 @@
+from undetectable_bot.utils.extraction import ResultTableParser
+
+
+def _results(html: str) -> dict[str, str]:
+    parser = ResultTableParser()
+    parser.feed(html)
+    parser.close()
+    return parser.results
+
+
+def test_rows_need_a_name_and_a_result_cell() -> None:
+    html = """
+    <table>
+      <tr><th>Test</th><th>Result</th></tr>
+      <tr><td>WebDriver</td><td>missing (passed)</td></tr>
+      <tr><th>Chrome</th><td>present</td></tr>
+      <tr><td></td><td>ok</td></tr>
+    </table>
+    """
+
+    assert _results(html) == {"WebDriver": "missing (passed)"}
+
+
+def test_the_row_that_starts_last_wins() -> None:
+    html = """
+    <table>
+      <tr><td>WebDriver</td><td>present (failed)</td></tr>
+      <tr><td>Plugins</td><td>5</td></tr>
+      <tr><td>WebDriver</td><td>missing (passed)</td></tr>
+    </table>
+    """
+
+    assert _results(html) == {
+        "WebDriver": "missing (passed)",
+        "Plugins": "5",
+    }
+
+
+def test_a_row_with_a_nested_table_starts_before_it() -> None:
+    html = """
+    <table>
+      <tr><td>Outer</td><td>
+        <table><tr><td>Outer</td><td>inner</td></tr></table>
+      </td></tr>
+    </table>
+    """
+
+    assert _results(html) == {"Outer": "inner"}
+
+
+def test_unclosed_cells_end_with_their_row() -> None:
+    html = """
+    <table>
+      <tr><td>WebDriver<td>missing (passed)</tr>
+      <tr><td>Plugins<td>5</tr>
+    </table>
+    """
+
+    assert _results(html) == {
+        "WebDriver": "missing (passed)",
+        "Plugins": "5",
+    }
@@ -0,0 +1,57 @@
+from pathlib import Path
+
+from undetectable_bot.utils.manifest import ManifestEntry, RunManifest
+
+URL = "https://a.test/"
+
+
+def test_a_torn_last_line_is_skipped_and_not_appended_to(
+    tmp_path: Path,
+) -> None:
+    path = tmp_path / "manifest.jsonl"
+    with RunManifest(path) as manifest:
+        manifest.record(ManifestEntry("a", URL, "ok"))
+    with path.open("a", encoding="utf-8") as file:
+        file.write(ManifestEntry("b", URL, "ok").to_json()[:10])
+
+    with RunManifest(path, resume=True) as manifest:
+        assert list(manifest.entries) == ["a"]
+        manifest.record(ManifestEntry("c", URL, "ok"))
+    with RunManifest(path, resume=True) as manifest:
+        assert list(manifest.entries) == ["a", "c"]
+
+
+def test_resumed_attempts_continue_the_numbering(tmp_path: Path) -> None:
+    path = tmp_path / "manifest.jsonl"
+    with RunManifest(path) as manifest:
+        manifest.record(ManifestEntry("a", URL, "failed", attempt=1))
+        manifest.record(ManifestEntry("a", URL, "failed", attempt=2))
+
+    with RunManifest(path, resume=True) as manifest:
+        attempt = manifest.attempts("a") + 1
+        assert not manifest.done("a")
+        manifest.record(ManifestEntry("a", URL, "ok", attempt=attempt))
+    with RunManifest(path, resume=True) as manifest:
+        assert manifest.attempts("a") == attempt
+        assert manifest.done("a")
+
+
+def test_a_fresh_run_forgets_the_previous_one(tmp_path: Path) -> None:
+    path = tmp_path / "manifest.jsonl"
+    with RunManifest(path) as manifest:
+        manifest.record(ManifestEntry("a", URL, "ok"))
+
+    with RunManifest(path) as manifest:
+        assert manifest.attempts("a") == 0
+
+
+def test_a_job_whose_artifacts_are_gone_is_not_done(tmp_path: Path) -> None:
+    path = tmp_path / "manifest.jsonl"
+    artifact = tmp_path / "a.png"
+    with RunManifest(path) as manifest:
+        manifest.record(
+            ManifestEntry("a", URL, "ok", artifacts=(str(artifact),))
+        )
+
+    with RunManifest(path, resume=True) as manifest:
+        assert not manifest.done("a")
@@ -0,0 +1,50 @@
+import asyncio
+
+from undetectable_bot.browser.core import ContextPool
+
+
+class _Context:
+    def __init__(self) -> None:
+        self.pages: list[object] = []
+        self.closed = False
+
+    def on(self, event: str, handler: object) -> None:
+        del event, handler
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+async def _retire_during_refill() -> tuple[ContextPool, list[_Context]]:
+    made: list[_Context] = []
+    gate = asyncio.Event()
+
+    async def factory() -> _Context:
+        if made:
+            await gate.wait()
+        made.append(_Context())
+        return made[-1]
+
+    pool = ContextPool(
+        factory,  # type: ignore[arg-type]
+        min_size=1,
+        max_size=1,
+        max_uses=1,
+    )
+    await pool.start()
+    async with pool.acquire():
+        pass
+    retiring = asyncio.create_task(pool.retire(refill=False))
+    await asyncio.sleep(0)
+    gate.set()
+    await retiring
+    return pool, made
+
+
+def test_a_refill_in_flight_does_not_survive_retire() -> None:
+    pool, made = asyncio.run(_retire_during_refill())
+
+    assert len(made) == len(("first", "refill"))
+    assert all(context.closed for context in made)
+    assert pool.idle == 0
+    assert pool.size == 0
@@ -0,0 +1,80 @@
+import asyncio
+import multiprocessing as mp
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
+
+from undetectable_bot.browser.sharding import (
+    ShardResult,
+    _collect,
+    _run_job,
+    _Started,
+)
+
+if TYPE_CHECKING:
+    from multiprocessing.queues import Queue
+
+
+class _Process:
+    def __init__(self) -> None:
+        self.exitcode: int | None = None
+
+
+class _Page:
+    async def close(self) -> None:
+        pass
+
+
+class _Context:
+    async def new_page(self) -> _Page:
+        return _Page()
+
+
+class _Browser:
+    @asynccontextmanager
+    async def context(self) -> AsyncIterator[_Context]:
+        yield _Context()
+
+
+def test_jobs_of_a_dead_worker_fail_instead_of_hanging() -> None:
+    results: Queue[ShardResult[str] | _Started] = mp.get_context(
+        "spawn"
+    ).Queue()
+    processes = [_Process(), _Process()]
+    results.put(_Started(0, 0, "https://a.test/"))
+    results.put(_Started(1, 1, "https://b.test/"))
+    results.put(ShardResult(1, "https://b.test/", 1, "b"))
+    collected: Iterator[ShardResult[str]] = _collect(
+        results,
+        processes,  # type: ignore[arg-type]
+        2,
+    )
+
+    assert next(collected).value == "b"
+    processes[0].exitcode = -9
+    orphan = next(collected)
+
+    assert orphan.index == 0
+    assert orphan.error == "worker exited with code -9"
+    assert list(collected) == []
+
+
+def test_unpicklable_results_are_reported() -> None:
+    async def job(page: object, url: str) -> Callable[[], None]:
+        del page, url
+        return lambda: None
+
+    index = 3
+    result = asyncio.run(
+        _run_job(
+            _Browser(),  # type: ignore[arg-type]
+            job,
+            0,
+            index,
+            "https://a.test/",
+        )
+    )
+
+    assert result.index == index
+    assert result.error is not None
+    assert result.error.startswith("result cannot be pickled")
@@ -0,0 +1,124 @@
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable, Iterator
+from typing import Any
+
+import pytest
+
+from undetectable_bot.browser.core import BackgroundLoop
+from undetectable_bot.browser.sync_api import BlockingProxy
+
+
+class _Route:
+    def __init__(self) -> None:
+        self.fulfilled: list[str] = []
+
+    async def fulfill(self, body: str) -> None:
+        self.fulfilled.append(body)
+
+
+class _Page:
+    def __init__(self) -> None:
+        self.url = "about:blank"
+        self.threads: list[threading.Thread] = []
+
+    async def goto(self, url: str) -> None:
+        self.threads.append(threading.current_thread())
+        self.url = url
+
+    def set_default_timeout(self, timeout: float) -> None:
+        del timeout
+        self.threads.append(threading.current_thread())
+
+    async def route(
+        self, url: str, handler: Callable[[_Route], Awaitable[None]]
+    ) -> _Route:
+        del url
+        route = _Route()
+        await handler(route)
+        return route
+
+    async def wait_for_event(
+        self, event: str, predicate: Callable[["_Page"], bool]
+    ) -> bool:
+        del event
+        return predicate(self)
+
+
+class _Context:
+    def __init__(self) -> None:
+        self.pages: list[_Page] = []
+        self.closed = False
+
+    async def new_page(self) -> _Page:
+        self.pages.append(_Page())
+        return self.pages[-1]
+
+    async def __aenter__(self) -> "_Context":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        self.closed = True
+
+
+# Wrapped like the objects of playwright.async_api.
+for _fake in (_Route, _Page, _Context):
+    _fake.__module__ = "playwright.async_api._fake"
+
+
+@pytest.fixture
+def loop() -> Iterator[BackgroundLoop]:
+    loop = BackgroundLoop()
+    yield loop
+    loop.close()
+
+
+def test_methods_block_on_the_loop(loop: BackgroundLoop) -> None:
+    target = _Context()
+    context: Any = BlockingProxy(target, loop)
+
+    page = context.new_page()
+    page.goto("https://a.test/")
+    page.set_default_timeout(1)
+
+    assert isinstance(page, BlockingProxy)
+    assert page.url == "https://a.test/"
+    assert context.pages == [page]
+    assert threading.current_thread() not in target.pages[0].threads
+
+
+def test_handlers_run_on_a_worker_and_may_block(
+    loop: BackgroundLoop,
+) -> None:
+    page: Any = BlockingProxy(_Page(), loop)
+
+    def handler(route: Any) -> None:  # noqa: ANN401
+        route.fulfill("cached")
+
+    route = page.route("**/*", handler)
+
+    assert route.fulfilled == ["cached"]
+
+
+def test_predicates_must_not_block(loop: BackgroundLoop) -> None:
+    page: Any = BlockingProxy(_Page(), loop)
+
+    with pytest.raises(RuntimeError, match="own thread"):
+        page.wait_for_event("load", lambda page: page.goto("x"))
+
+
+def test_async_context_managers_are_entered(loop: BackgroundLoop) -> None:
+    target = _Context()
+
+    with BlockingProxy(target, loop) as context:
+        assert context == BlockingProxy(target, loop)
+
+    assert target.closed
+
+
+def test_the_loop_thread_cannot_wait_on_itself(loop: BackgroundLoop) -> None:
+    async def nested() -> None:
+        loop.run(asyncio.sleep(0))
+
+    with pytest.raises(RuntimeError, match="own thread"):
+        loop.run(nested())
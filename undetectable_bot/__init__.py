@@ -1,9 +1,60 @@
 """
 Undetectable Bot - A stealthy browser automation tool.
+
+Public names are loaded on first access, so ``import undetectable_bot``
+stays cheap and does not import Playwright or configure logging.
+Applications call ``configure_logging()`` themselves.
 """
 
-from undetectable_bot.utils.logging import configure_logging
+from importlib import import_module
+from typing import TYPE_CHECKING
 
-configure_logging()
+if TYPE_CHECKING:
+    from undetectable_bot.browser.async_api import AsyncStealthBrowser
+    from undetectable_bot.browser.batch import FetchResult
+    from undetectable_bot.browser.cache import ResponseCache
+    from undetectable_bot.browser.governor import MemoryLimits
+    from undetectable_bot.browser.sharding import ShardedRunner
+    from undetectable_bot.browser.sync_api import StealthBrowser
+    from undetectable_bot.utils.logging import configure_logging
+    from undetectable_bot.utils.metrics import METRICS, Metrics
 
 __version__ = "0.1.0"
+
+_EXPORTS: dict[str, str] = {
+    "AsyncStealthBrowser": "undetectable_bot.browser.async_api",
+    "FetchResult": "undetectable_bot.browser.batch",
+    "METRICS": "undetectable_bot.utils.metrics",
+    "MemoryLimits": "undetectable_bot.browser.governor",
+    "Metrics": "undetectable_bot.utils.metrics",
+    "ResponseCache": "undetectable_bot.browser.cache",
+    "ShardedRunner": "undetectable_bot.browser.sharding",
+    "StealthBrowser": "undetectable_bot.browser.sync_api",
+    "configure_logging": "undetectable_bot.utils.logging",
+}
+
+__all__ = [
+    "METRICS",
+    "AsyncStealthBrowser",
+    "FetchResult",
+    "MemoryLimits",
+    "Metrics",
+    "ResponseCache",
+    "ShardedRunner",
+    "StealthBrowser",
+    "configure_logging",
+]
+
+
+def __getattr__(name: str) -> object:
+    module = _EXPORTS.get(name)
+    if module is None:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_EXPORTS])
@@ -1,4 +1,15 @@
+import asyncio
+import logging
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Iterable,
+)
+from contextlib import AbstractAsyncContextManager, suppress
 from types import TracebackType
+from typing import Unpack
 
 from playwright.async_api import (
     Browser,
@@ -6,49 +17,226 @@ from playwright.async_api import (
     Playwright,
     async_playwright,
 )
+from playwright.async_api import Error as PlaywrightError
 
-from undetectable_bot.utils.constants import (
-    ARGS,
-    CONTEXT_SETTINGS,
-    STEALTH_JS_PATH,
+from undetectable_bot.browser import batch
+from undetectable_bot.browser.capture import DEFAULT_CAPTURE, CaptureOptions
+from undetectable_bot.browser.core import (
+    BrowserCore,
+    BrowserOptions,
+    ContextPool,
+)
+from undetectable_bot.browser.governor import MemoryGovernor
+from undetectable_bot.browser.readiness import (
+    DEFAULT_READINESS,
+    ReadinessStrategy,
+)
+from undetectable_bot.browser.resources import ResourceProfile
+from undetectable_bot.utils.constants import FETCH_TIMEOUT, JOB_RETRIES
+from undetectable_bot.utils.exceptions import (
+    BrowserNotInitializedError,
+    BrowserRelaunchError,
+    StealthBrowserError,
 )
-from undetectable_bot.utils.exceptions import BrowserNotInitializedError
 
+logger = logging.getLogger(__name__)
 
-class AsyncStealthBrowser:
-    """An asynchronous version of StealthBrowser."""
 
-    def __init__(self, *, headless: bool = True) -> None:
-        self.headless = headless
-        self.browser: Browser | None = None
+class AsyncStealthBrowser(BrowserCore):
+    """An asynchronous version of StealthBrowser.
+
+    A browser that crashes or disconnects is relaunched in the
+    background with exponential backoff, and new contexts get the same
+    settings, init scripts and routes as before.
+    """
+
+    def __init__(self, **options: Unpack[BrowserOptions]) -> None:
+        super().__init__(**options)
         self.playwright: Playwright | None = None
+        self.browser: Browser | None = None
+        self.pool = ContextPool(
+            self.new_context,
+            min_size=self.min_contexts,
+            max_size=self.max_contexts,
+            max_uses=self.max_context_uses,
+            max_pages=self.memory_limits.context_pages,
+        )
+        self.governor = MemoryGovernor(self, self.memory_limits)
+        self._relaunch_lock = asyncio.Lock()
+        self._recoveries: set[asyncio.Task[None]] = set()
+        self._closing = False
 
-    async def new_context(self) -> BrowserContext:
-        """Create a new browser context."""
+    async def new_context(
+        self, *, resource_profile: str | ResourceProfile | None = None
+    ) -> BrowserContext:
+        """Create a new browser context.
+
+        Args:
+            resource_profile: Requests to block in this context, by name
+                or as a profile. Defaults to the browser's profile.
+        """
         if not self.browser:
             raise BrowserNotInitializedError
-        context: BrowserContext = await self.browser.new_context(
-            viewport=CONTEXT_SETTINGS["viewport"],
-            user_agent=CONTEXT_SETTINGS["user_agent"],
-            color_scheme=CONTEXT_SETTINGS["color_scheme"],
-            locale=CONTEXT_SETTINGS["locale"],
-            timezone_id=CONTEXT_SETTINGS["timezone_id"],
-            permissions=CONTEXT_SETTINGS["permissions"],
-            java_script_enabled=CONTEXT_SETTINGS["java_script_enabled"],
-            bypass_csp=CONTEXT_SETTINGS["bypass_csp"],
-            extra_http_headers=CONTEXT_SETTINGS["extra_http_headers"],
-        )
-        await context.add_init_script(path=str(STEALTH_JS_PATH))
+        with self.metrics.span("new_context"):
+            context = await self.browser.new_context(
+                **self.context_settings, **self.recording_options()
+            )
+            await self.prepare_context(
+                context, resource_profile=resource_profile
+            )
         return context
 
+    @property
+    def connected(self) -> bool:
+        """Whether the browser is launched and still reachable."""
+        return self.browser is not None and self.browser.is_connected()
+
+    def context(self) -> AbstractAsyncContextManager[BrowserContext]:
+        """Check out a warm context from the pool."""
+        if not self.playwright:
+            raise BrowserNotInitializedError
+        return self.pool.acquire()
+
+    def fetch_many(  # noqa: PLR0913
+        self,
+        urls: Iterable[str] | AsyncIterable[str],
+        *,
+        concurrency: int | None = None,
+        capture: tuple[batch.Capture, ...] = ("html",),
+        screenshot_options: CaptureOptions = DEFAULT_CAPTURE,
+        readiness: ReadinessStrategy = DEFAULT_READINESS,
+        timeout: float = FETCH_TIMEOUT,
+    ) -> AsyncGenerator[batch.FetchResult]:
+        """Fetch URLs on pooled contexts, yielding results as they end.
+
+        ``async for result in browser.fetch_many(urls, capture=...)``
+        takes URLs from ``urls`` only as pages complete, so memory stays
+        flat however many URLs it yields. See ``batch.fetch_many``.
+        """
+        return batch.fetch_many(
+            self,
+            urls,
+            concurrency=concurrency,
+            capture=capture,
+            screenshot_options=screenshot_options,
+            readiness=readiness,
+            timeout=timeout,
+        )
+
+    async def run[T](
+        self,
+        job: Callable[[BrowserContext], Awaitable[T]],
+        *,
+        retries: int = JOB_RETRIES,
+        idempotent: bool = False,
+    ) -> T:
+        """Run ``job`` on a pooled context, surviving browser crashes.
+
+        If an ``idempotent`` job fails because the browser went away,
+        the browser is recovered and the job runs again on a fresh
+        context, up to ``retries`` more times. Other jobs, and any
+        other error, propagate unchanged.
+        """
+        attempt = 0
+        while True:
+            try:
+                async with self.context() as context:
+                    return await job(context)
+            except PlaywrightError:
+                if not self.should_retry_job(
+                    attempt, retries, idempotent=idempotent
+                ):
+                    raise
+            attempt += 1
+            logger.warning("Browser lost during a job, retrying")
+            await self.recover()
+
+    async def recover(self) -> None:
+        """Relaunch a crashed or disconnected browser, with backoff.
+
+        Concurrent callers share a single recovery, and nothing is done
+        if the browser is still connected.
+
+        Raises:
+            BrowserRelaunchError: Every relaunch attempt failed.
+        """
+        async with self._relaunch_lock:
+            attempt = 0
+            while not (self.connected or self._closing):
+                attempt += 1
+                try:
+                    await self._relaunch()
+                except PlaywrightError:
+                    logger.exception("Relaunch attempt %d failed", attempt)
+                    delay = self.relaunch_delay(attempt)
+                    if delay is None:
+                        raise BrowserRelaunchError(attempt) from None
+                    await asyncio.sleep(delay)
+                else:
+                    logger.info("Browser relaunched after a disconnect")
+
+    async def relaunch(self) -> None:
+        """Replace the browser once in-flight pages have finished.
+
+        New checkouts wait while the pooled contexts are closed, the
+        browser is relaunched with the same launch args (or reconnected
+        to its server) and the pool is warmed up again. Must not be
+        called while holding a pooled context.
+        """
+        async with self._relaunch_lock:
+            await self._relaunch()
+
+    async def _relaunch(self) -> None:
+        if not self.playwright:
+            raise BrowserNotInitializedError
+        async with self.pool.paused():
+            await self.pool.retire(refill=False)
+            with self.metrics.span("relaunch"):
+                if self.browser:
+                    self.browser.remove_listener(
+                        "disconnected", self._on_disconnected
+                    )
+                    with suppress(PlaywrightError):
+                        await self.browser.close()
+                    self.browser = None
+                await self._launch()
+            await self.pool.start()
+
+    def _on_disconnected(self, browser: Browser) -> None:
+        if browser is not self.browser or self._closing:
+            return
+        logger.warning("Browser disconnected, relaunching")
+        task = asyncio.create_task(self._recover_in_background())
+        self._recoveries.add(task)
+        task.add_done_callback(self._recoveries.discard)
+
+    async def _recover_in_background(self) -> None:
+        try:
+            await self.recover()
+        except StealthBrowserError:
+            logger.exception("Giving up on the lost browser")
+
+    async def _launch(self) -> None:
+        if not self.playwright:
+            raise BrowserNotInitializedError
+        with self.metrics.span("launch"):
+            if self.endpoint:
+                self.browser = await self.playwright.chromium.connect_over_cdp(
+                    self.endpoint
+                )
+            else:
+                self.browser = await self.playwright.chromium.launch(
+                    **self.launch_options
+                )
+        self.browser.on("disconnected", self._on_disconnected)
+
     async def __aenter__(self) -> "AsyncStealthBrowser":
         """Enter the asynchronous context manager."""
+        self._closing = False
         self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(
-            headless=self.headless,
-            args=ARGS,
-            chromium_sandbox=False,
-        )
+        await self._launch()
+        await self.pool.start()
+        self.governor.start()
         return self
 
     async def __aexit__(
@@ -58,5 +246,14 @@ class AsyncStealthBrowser:
         traceback: TracebackType | None,
     ) -> None:
         """Exit the asynchronous context manager."""
+        self._closing = True
+        for task in self._recoveries:
+            task.cancel()
+        await asyncio.gather(*self._recoveries, return_exceptions=True)
+        await self.governor.stop()
+        await self.pool.close()
+        if self.endpoint and self.browser:
+            # Closes only our contexts; the server keeps running.
+            await self.browser.close()
         if self.playwright:
             await self.playwright.stop()
@@ -0,0 +1,227 @@
+"""Streaming batch fetches on pooled browser contexts.
+
+``fetch_many`` pulls URLs from any iterable or async iterable only as
+fast as pages finish, so feeding it a generator of 100k URLs keeps at
+most ``concurrency`` pages and results in memory at a time.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterable,
+    AsyncIterator,
+    Iterable,
+    Iterator,
+)
+from contextlib import contextmanager, suppress
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Literal
+
+from playwright.async_api import Error as PlaywrightError
+
+from undetectable_bot.browser.capture import (
+    DEFAULT_CAPTURE,
+    CaptureOptions,
+    capture_screenshot,
+)
+from undetectable_bot.browser.readiness import (
+    DEFAULT_READINESS,
+    NetworkMonitor,
+    ReadinessStrategy,
+    wait_until_ready,
+)
+from undetectable_bot.utils.constants import FETCH_TIMEOUT
+from undetectable_bot.utils.exceptions import StealthBrowserError
+from undetectable_bot.utils.logging import job_context
+
+if TYPE_CHECKING:
+    from playwright.async_api import BrowserContext
+
+    from undetectable_bot.browser.async_api import AsyncStealthBrowser
+    from undetectable_bot.utils.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+Capture = Literal["html", "screenshot"]
+
+
+@dataclass(frozen=True, slots=True)
+class FetchResult:
+    """Outcome of fetching a single URL."""
+
+    index: int
+    url: str
+    status: int | None = None
+    html: str | None = None
+    screenshot: bytes | None = None
+    ready: bool = False
+    timings: dict[str, float] = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the page loaded and was captured without raising."""
+        return self.error is None
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds spent across all recorded phases."""
+        return sum(self.timings.values())
+
+
+@contextmanager
+def _timed(
+    metrics: "Metrics", timings: dict[str, float], phase: str
+) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        with metrics.span(phase):
+            yield
+    finally:
+        timings[phase] = time.perf_counter() - start
+
+
+async def _urls(
+    urls: Iterable[str] | AsyncIterable[str],
+) -> AsyncIterator[str]:
+    if isinstance(urls, AsyncIterable):
+        async for url in urls:
+            yield url
+    else:
+        for url in urls:
+            yield url
+
+
+async def fetch_page(  # noqa: PLR0913
+    browser: "AsyncStealthBrowser",
+    index: int,
+    url: str,
+    *,
+    capture: tuple[Capture, ...] = ("html",),
+    screenshot_options: CaptureOptions = DEFAULT_CAPTURE,
+    readiness: ReadinessStrategy = DEFAULT_READINESS,
+    timeout: float = FETCH_TIMEOUT,  # noqa: ASYNC109
+) -> FetchResult:
+    """Load ``url`` on a pooled context and capture it.
+
+    A fetch interrupted by a browser crash is retried once the browser
+    is back. Other errors, including a browser that cannot be
+    relaunched, and timeouts are reported on the result instead of
+    raised.
+    """
+    metrics = browser.metrics
+    timings: dict[str, float] = {}
+    status: int | None = None
+
+    async def job(context: "BrowserContext") -> FetchResult:
+        nonlocal status
+        timings.clear()
+        html = screenshot = None
+        page = await context.new_page()
+        try:
+            async with asyncio.timeout(timeout):
+                with NetworkMonitor(page, readiness) as monitor:
+                    with _timed(metrics, timings, "goto"):
+                        response = await page.goto(url, wait_until="commit")
+                    status = response.status if response else None
+                    with _timed(metrics, timings, "wait_for_load"):
+                        ready = await wait_until_ready(
+                            page, readiness, monitor
+                        )
+                if "screenshot" in capture:
+                    with _timed(metrics, timings, "screenshot"):
+                        screenshot = await capture_screenshot(
+                            page, screenshot_options
+                        )
+                if "html" in capture:
+                    with _timed(metrics, timings, "content"):
+                        html = await page.content()
+        finally:
+            with suppress(PlaywrightError):
+                await page.close()
+        return FetchResult(
+            index, url, status, html, screenshot, ready, dict(timings)
+        )
+
+    with job_context(f"fetch-{index}"):
+        try:
+            return await browser.run(job, idempotent=True)
+        except (PlaywrightError, TimeoutError, StealthBrowserError) as exc:
+            error = str(exc) or type(exc).__name__
+            logger.warning("Fetching %s failed: %s", url, error)
+    return FetchResult(index, url, status, timings=timings, error=error)
+
+
+async def fetch_many(  # noqa: PLR0913
+    browser: "AsyncStealthBrowser",
+    urls: Iterable[str] | AsyncIterable[str],
+    *,
+    concurrency: int | None = None,
+    capture: tuple[Capture, ...] = ("html",),
+    screenshot_options: CaptureOptions = DEFAULT_CAPTURE,
+    readiness: ReadinessStrategy = DEFAULT_READINESS,
+    timeout: float = FETCH_TIMEOUT,  # noqa: ASYNC109
+) -> AsyncGenerator[FetchResult]:
+    """Fetch every URL, yielding results in completion order.
+
+    A new URL is taken from ``urls`` only when a page finishes, and no
+    more than ``concurrency`` finished results wait for the consumer.
+    Closing the iterator, e.g. by breaking out of an
+    ``async with contextlib.aclosing(...)`` loop, cancels the pages
+    still in flight.
+
+    Args:
+        browser: An entered browser whose pool provides the contexts.
+        urls: URLs to fetch. Consumed lazily, so it may be unbounded.
+        concurrency: Pages loaded at once. Defaults to the pool size.
+        capture: What to keep from each page.
+        screenshot_options: How screenshots are taken and encoded.
+        readiness: When a page is complete enough to capture.
+        timeout: Seconds allowed for each page before it fails.
+
+    Yields:
+        One result per URL; ``index`` is its position in ``urls``.
+    """
+    limit = browser.pool.max_size if concurrency is None else concurrency
+    if limit < 1:
+        msg = "concurrency must be at least 1."
+        raise ValueError(msg)
+    source = aiter(_urls(urls))
+    pending: set[asyncio.Task[FetchResult]] = set()
+    index = 0
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < limit:
+                try:
+                    url = await anext(source)
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                pending.add(
+                    asyncio.create_task(
+                        fetch_page(
+                            browser,
+                            index,
+                            url,
+                            capture=capture,
+                            screenshot_options=screenshot_options,
+                            readiness=readiness,
+                            timeout=timeout,
+                        )
+                    )
+                )
+                index += 1
+            if not pending:
+                return
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
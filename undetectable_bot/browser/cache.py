@@ -0,0 +1,271 @@
+"""Persistent HTTP response cache shared across browser contexts.
+
+Contexts are ephemeral, so Chromium's own cache is thrown away with
+them. This cache sits behind Playwright routing instead: bodies are
+stored as content-addressed blobs and indexed in SQLite with their
+freshness lifetime and validators, and the index is trimmed back to a
+byte budget by evicting the least recently used entries.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+from http import HTTPStatus
+from pathlib import Path
+
+from undetectable_bot.utils.blobs import BlobStore
+from undetectable_bot.utils.constants import (
+    RESPONSE_CACHE_MAX_BYTES,
+    RESPONSE_CACHE_TTL,
+)
+
+CACHEABLE_TYPES: frozenset[str] = frozenset(
+    {"stylesheet", "script", "image", "font", "media"}
+)
+
+# Bodies handed to route.fulfill() are already decoded.
+_DROPPED_HEADERS = frozenset(
+    {"content-encoding", "content-length", "transfer-encoding", "set-cookie"}
+)
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+_SCHEMA = """
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class CachedResponse:
+    """A response held in the cache."""
+
+    url: str
+    status: int
+    headers: dict[str, str]
+    digest: str
+    expires: float
+
+    @property
+    def fresh(self) -> bool:
+        """Whether the response can be served without revalidation."""
+        return self.expires > time.time()
+
+    @property
+    def validators(self) -> dict[str, str]:
+        """Conditional request headers for revalidating the response."""
+        validators = {}
+        if etag := self.headers.get("etag"):
+            validators["if-none-match"] = etag
+        if last_modified := self.headers.get("last-modified"):
+            validators["if-modified-since"] = last_modified
+        return validators
+
+
+@dataclass(slots=True)
+class CacheStats:
+    """Counters describing how effective the cache has been."""
+
+    hits: int = 0
+    misses: int = 0
+    revalidations: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+
+class ResponseCache:
+    """An on-disk response cache with TTL, ETag and LRU eviction.
+
+    The cache is safe to share between contexts and threads.
+
+    Args:
+        root: Directory holding the index and blobs.
+        max_bytes: Total body size kept before evicting entries.
+        ttl: Seconds a response stays fresh when it has no max-age.
+        resource_types: Playwright resource types worth caching.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+        ttl: float = RESPONSE_CACHE_TTL,
+        resource_types: frozenset[str] = CACHEABLE_TYPES,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.resource_types = resource_types
+        self.stats = CacheStats()
+        self.blobs = BlobStore(root / "blobs")
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            root / "index.sqlite3", check_same_thread=False
+        )
+        self._db.executescript(_SCHEMA)
+
+    def accepts(self, method: str, resource_type: str) -> bool:
+        """Whether a request is eligible for caching."""
+        return method == "GET" and resource_type in self.resource_types
+
+    def lookup(self, url: str) -> CachedResponse | None:
+        """Find a cached response for ``url``, fresh or not."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, headers, digest, expires FROM entries "
+                "WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                self.stats.misses += 1
+                return None
+            self._db.execute(
+                "UPDATE entries SET accessed = ? WHERE url = ?",
+                (time.time(), url),
+            )
+            self._db.commit()
+        status, headers, digest, expires = row
+        return CachedResponse(
+            url, status, json.loads(headers), digest, expires
+        )
+
+    def read(self, entry: CachedResponse) -> bytes:
+        """Load the body of a cached response and count the hit.
+
+        Raises:
+            OSError: If the body was evicted since the lookup.
+        """
+        body = self.blobs.get(entry.digest)
+        with self._lock:
+            self.stats.hits += 1
+        return body
+
+    def discard(self, entry: CachedResponse) -> None:
+        """Forget a response whose body could not be read."""
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM entries WHERE url = ? AND digest = ?",
+                (entry.url, entry.digest),
+            )
+            self._release_blob(entry.digest)
+            self._db.commit()
+            self.stats.misses += 1
+
+    def store(
+        self,
+        url: str,
+        status: int,
+        headers: Mapping[str, str],
+        body: bytes,
+    ) -> None:
+        """Cache a response if it is cacheable."""
+        expires = self._expires(headers)
+        if (
+            status != HTTPStatus.OK
+            or expires is None
+            or len(body) > self.max_bytes
+        ):
+            return
+        kept = {
+            name: value
+            for name, value in headers.items()
+            if name.lower() not in _DROPPED_HEADERS
+        }
+        with self._lock:
+            # Under the lock, so an eviction cannot delete the blob
+            # before the row that refers to it exists.
+            digest = self.blobs.put(body)
+            previous = self._db.execute(
+                "SELECT digest FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    status,
+                    json.dumps(kept),
+                    digest,
+                    len(body),
+                    expires,
+                    time.time(),
+                ),
+            )
+            if previous and previous[0] != digest:
+                self._release_blob(previous[0])
+            self.stats.stores += 1
+            self._evict()
+            self._db.commit()
+
+    def refresh(
+        self, entry: CachedResponse, headers: Mapping[str, str]
+    ) -> None:
+        """Extend a cached response after a ``304 Not Modified``."""
+        expires = self._expires(headers) or time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE entries SET expires = ?, accessed = ? WHERE url = ?",
+                (expires, time.time(), entry.url),
+            )
+            self._db.commit()
+            self.stats.revalidations += 1
+
+    @property
+    def total_bytes(self) -> int:
+        """Total size of the cached bodies."""
+        with self._lock:
+            (total,) = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return int(total)
+
+    def close(self) -> None:
+        """Close the index."""
+        with self._lock:
+            self._db.close()
+
+    def _expires(self, headers: Mapping[str, str]) -> float | None:
+        """When a response goes stale; ``None`` if uncacheable."""
+        cache_control = headers.get("cache-control", "").lower()
+        if "no-store" in cache_control:
+            return None
+        now = time.time()
+        if "no-cache" in cache_control:
+            return now
+        if match := _MAX_AGE.search(cache_control):
+            return now + int(match.group(1))
+        return now + self.ttl
+
+    def _evict(self) -> None:
+        (total,) = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        while total > self.max_bytes:
+            url, digest, size = self._db.execute(
+                "SELECT url, digest, size FROM entries "
+                "ORDER BY accessed LIMIT 1"
+            ).fetchone()
+            self._db.execute("DELETE FROM entries WHERE url = ?", (url,))
+            self._release_blob(digest)
+            self.stats.evictions += 1
+            total -= size
+
+    def _release_blob(self, digest: str) -> None:
+        """Delete a blob once no entry refers to it."""
+        in_use = self._db.execute(
+            "SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)
+        ).fetchone()
+        if not in_use:
+            self.blobs.delete(digest)
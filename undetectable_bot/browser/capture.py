@@ -0,0 +1,122 @@
+"""Screenshot capture modes cheaper than a full-page PNG.
+
+A full-page screenshot of a long page is slow to encode and large on
+disk. ``CaptureOptions`` selects what is captured (the viewport, one
+element, a fixed region or the full page up to a height cap), how it
+is encoded, and whether a downscaled thumbnail is written alongside.
+"""
+
+from dataclasses import dataclass
+from typing import Final, Literal
+
+from playwright.async_api import FloatRect, Page
+
+from undetectable_bot.utils.artifacts import ScreenshotFormat
+from undetectable_bot.utils.optional import require
+
+CaptureMode = Literal["viewport", "full", "element", "clip"]
+
+
+@dataclass(frozen=True, slots=True)
+class CaptureOptions:
+    """What to capture from a page and how to encode it.
+
+    Attributes:
+        mode: ``viewport`` for the visible area, ``full`` for the whole
+            page, ``element`` for the first match of ``selector`` and
+            ``clip`` for the ``clip`` region of the page.
+        selector: CSS selector of the element to capture.
+        clip: Region to capture as ``(x, y, width, height)`` in CSS
+            pixels from the top left of the page.
+        max_height: Cap in CSS pixels on the height of ``full`` and
+            ``clip`` captures; taller pages are cut off.
+        screenshot_format: Overrides the writer's format.
+        screenshot_quality: Overrides the writer's JPEG/WebP quality.
+        thumbnail_width: Also write a copy scaled to this many pixels
+            wide. Needs Pillow.
+    """
+
+    mode: CaptureMode = "full"
+    selector: str | None = None
+    clip: tuple[float, float, float, float] | None = None
+    max_height: int | None = None
+    screenshot_format: ScreenshotFormat | None = None
+    screenshot_quality: int | None = None
+    thumbnail_width: int | None = None
+
+    def __post_init__(self) -> None:
+        if self.mode == "element" and not self.selector:
+            msg = "element captures need a selector."
+            raise ValueError(msg)
+        if self.mode == "clip" and self.clip is None:
+            msg = "clip captures need a clip region."
+            raise ValueError(msg)
+        for name in ("max_height", "thumbnail_width"):
+            value = getattr(self, name)
+            if value is not None and value < 1:
+                msg = f"{name} must be at least 1."
+                raise ValueError(msg)
+
+    def check_dependencies(self) -> None:
+        """Fail fast if encoding the capture needs a missing package."""
+        if self.thumbnail_width or self.screenshot_format == "webp":
+            require("PIL.Image", package="Pillow", extra="imaging")
+
+
+DEFAULT_CAPTURE: Final[CaptureOptions] = CaptureOptions()
+
+
+async def _full_page_clip(page: Page, max_height: int) -> FloatRect | None:
+    """The top ``max_height`` pixels of a taller page, else ``None``."""
+    width, height = await page.evaluate(
+        "() => [document.documentElement.clientWidth,"
+        " document.documentElement.scrollHeight]"
+    )
+    if height <= max_height:
+        return None
+    return {"x": 0, "y": 0, "width": width, "height": max_height}
+
+
+async def capture_screenshot(
+    page: Page,
+    options: CaptureOptions = DEFAULT_CAPTURE,
+    *,
+    screenshot_format: ScreenshotFormat = "png",
+    quality: int | None = None,
+) -> bytes:
+    """Take the screenshot described by ``options``.
+
+    Chromium encodes PNG and JPEG itself. WebP is captured as PNG, to
+    be re-encoded by the artifact writer.
+
+    Args:
+        page: A loaded page.
+        options: What to capture.
+        screenshot_format: Used unless ``options`` overrides it.
+        quality: JPEG quality, unless ``options`` overrides it.
+
+    Returns:
+        The encoded image.
+    """
+    fmt = options.screenshot_format or screenshot_format
+    jpeg = fmt == "jpeg"
+    image_type: Literal["png", "jpeg"] = "jpeg" if jpeg else "png"
+    image_quality = (options.screenshot_quality or quality) if jpeg else None
+
+    if options.mode == "viewport":
+        return await page.screenshot(type=image_type, quality=image_quality)
+    if options.mode == "element":
+        locator = page.locator(options.selector or "").first
+        return await locator.screenshot(type=image_type, quality=image_quality)
+    clip: FloatRect | None = None
+    if options.mode == "clip" and options.clip is not None:
+        x, y, width, height = options.clip
+        if options.max_height is not None:
+            height = min(height, options.max_height)
+        clip = {"x": x, "y": y, "width": width, "height": height}
+    elif options.max_height is not None:
+        clip = await _full_page_clip(page, options.max_height)
+    # Clips are relative to the page, not the viewport, with full_page.
+    return await page.screenshot(
+        type=image_type, quality=image_quality, full_page=True, clip=clip
+    )
@@ -0,0 +1,658 @@
+"""What the sync and async browsers share.
+
+``BrowserCore`` owns the browsers' options, the context and launch
+settings, the init scripts, how a new context is wired up with its
+routes and the policies for retrying jobs and relaunching lost
+browsers. ``ContextPool`` keeps warm contexts and decides when they
+are recycled.
+
+``AsyncStealthBrowser`` is the one engine that launches Chromium.
+``StealthBrowser`` runs that engine on a ``BackgroundLoop``, an event
+loop on its own thread, and blocks on it from synchronous code, handing
+out its contexts and pages as blocking proxies.
+"""
+
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Iterator,
+    Sequence,
+)
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any, Self, TypedDict
+
+from playwright.async_api import APIResponse, BrowserContext, Page, Route
+from playwright.async_api import Error as PlaywrightError
+
+from undetectable_bot.browser.cache import CachedResponse, ResponseCache
+from undetectable_bot.browser.governor import MemoryLimits
+from undetectable_bot.browser.recording import (
+    OFFLINE_ERROR,
+    NetworkArchive,
+    RecordingOptions,
+)
+from undetectable_bot.browser.resources import (
+    ResourceProfile,
+    resolve_profile,
+)
+from undetectable_bot.utils.backoff import backoff_delay
+from undetectable_bot.utils.constants import (
+    ARGS,
+    CONTEXT_SETTINGS,
+    POOL_MAX_SIZE,
+    POOL_MAX_USES,
+    POOL_MIN_SIZE,
+    RELAUNCH_ATTEMPTS,
+    ContextSettings,
+)
+from undetectable_bot.utils.exceptions import ContextPoolClosedError
+from undetectable_bot.utils.metrics import METRICS, Metrics
+from undetectable_bot.utils.scripts import (
+    combine_scripts,
+    load_init_script,
+    load_stealth_script,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserOptions(TypedDict, total=False):
+    """Keyword arguments accepted by every browser facade."""
+
+    headless: bool
+    min_contexts: int
+    max_contexts: int
+    max_context_uses: int
+    minify_script: bool
+    resource_profile: str | ResourceProfile
+    response_cache: ResponseCache | None
+    metrics: Metrics | None
+    endpoint: str | None
+    context_settings: ContextSettings | None
+    launch_args: Sequence[str] | None
+    network_archive: NetworkArchive | None
+    memory_limits: MemoryLimits | None
+
+
+class LaunchOptions(TypedDict):
+    """Arguments for ``BrowserType.launch``."""
+
+    headless: bool
+    args: list[str]
+    chromium_sandbox: bool
+
+
+def _resource_filter(
+    profile: ResourceProfile,
+) -> Callable[[Route], Awaitable[None]]:
+    async def handle(route: Route) -> None:
+        request = route.request
+        if profile.blocks(request.url, request.resource_type):
+            await route.abort("blockedbyclient")
+        else:
+            await route.fallback()
+
+    return handle
+
+
+async def _offline(route: Route) -> None:
+    await route.abort(OFFLINE_ERROR)
+
+
+def _cache_handler(
+    cache: ResponseCache,
+) -> Callable[[Route], Awaitable[None]]:
+    async def handle(route: Route) -> None:
+        request = route.request
+        if not cache.accepts(request.method, request.resource_type):
+            await route.fallback()
+            return
+        entry = await asyncio.to_thread(cache.lookup, request.url)
+        if entry is not None and entry.fresh:
+            if await _fulfill_cached(route, cache, entry):
+                return
+            entry = None
+        headers = request.headers
+        if entry is not None:
+            headers = {**headers, **entry.validators}
+        response = await _fetch(route, headers)
+        if (
+            entry is not None
+            and response is not None
+            and response.status == HTTPStatus.NOT_MODIFIED
+        ):
+            await asyncio.to_thread(cache.refresh, entry, response.headers)
+            if await _fulfill_cached(route, cache, entry):
+                return
+            # The body went while revalidating; fetch it in full.
+            response = await _fetch(route, request.headers)
+        if response is None:
+            await route.fallback()
+            return
+        body = await response.body()
+        await asyncio.to_thread(
+            cache.store, request.url, response.status, response.headers, body
+        )
+        await route.fulfill(response=response, body=body)
+
+    return handle
+
+
+async def _fetch(route: Route, headers: dict[str, str]) -> APIResponse | None:
+    try:
+        return await route.fetch(headers=headers)
+    except PlaywrightError:
+        return None
+
+
+async def _fulfill_cached(
+    route: Route, cache: ResponseCache, entry: CachedResponse
+) -> bool:
+    """Serve ``entry``; ``False`` if its body was evicted meanwhile."""
+    try:
+        body = await asyncio.to_thread(cache.read, entry)
+    except OSError:
+        await asyncio.to_thread(cache.discard, entry)
+        return False
+    await route.fulfill(status=entry.status, headers=entry.headers, body=body)
+    return True
+
+
+@dataclass(slots=True)
+class _PooledContext:
+    context: BrowserContext
+    generation: int = 0
+    uses: int = 0
+    pages: int = 0
+    resetting: bool = False
+
+    def count_page(self, _page: object) -> None:
+        # The page used to clear storage is not the job's.
+        if not self.resetting:
+            self.pages += 1
+
+
+class ContextPool:
+    """A pool of warm browser contexts reused across jobs.
+
+    Contexts are reset when checked back in and recycled once they have
+    served ``max_uses`` jobs or opened ``max_pages`` pages.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Awaitable[BrowserContext]],
+        *,
+        min_size: int = POOL_MIN_SIZE,
+        max_size: int = POOL_MAX_SIZE,
+        max_uses: int = POOL_MAX_USES,
+        max_pages: int | None = None,
+    ) -> None:
+        if max_size < 1 or not 0 <= min_size <= max_size:
+            msg = "Pool sizes must satisfy 0 <= min_size <= max_size, >= 1."
+            raise ValueError(msg)
+        if max_uses < 1:
+            msg = "max_uses must be at least 1."
+            raise ValueError(msg)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self.max_pages = max_pages
+        self._factory = factory
+        self._idle: deque[_PooledContext] = deque()
+        self._slots = asyncio.Semaphore(max_size)
+        self._open = asyncio.Event()
+        self._open.set()
+        self._size = 0
+        self._closed = False
+        self._generation = 0
+        self._refills: set[asyncio.Task[None]] = set()
+
+    @property
+    def size(self) -> int:
+        """Number of live contexts, idle or checked out."""
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        """Number of contexts ready to be checked out."""
+        return len(self._idle)
+
+    async def start(self) -> None:
+        """Pre-warm the pool up to ``min_size`` contexts."""
+        self._closed = False
+        missing = self.min_size - self._size
+        if missing > 0:
+            created = await asyncio.gather(
+                *(self._create() for _ in range(missing))
+            )
+            self._idle.extend(created)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[BrowserContext]:
+        """Check out a context, returning it to the pool on exit."""
+        if self._closed:
+            raise ContextPoolClosedError
+        await self._open.wait()
+        async with self._slots:
+            pooled = await self._checkout()
+            try:
+                yield pooled.context
+            finally:
+                await self._release(pooled)
+
+    @asynccontextmanager
+    async def paused(self) -> AsyncIterator[None]:
+        """Hold every slot once checked-out contexts have returned.
+
+        New checkouts wait until the block exits. Must not be entered
+        while holding a context from this pool.
+        """
+        self._open.clear()
+        held = 0
+        try:
+            for _ in range(self.max_size):
+                await self._slots.acquire()
+                held += 1
+            yield
+        finally:
+            for _ in range(held):
+                self._slots.release()
+            self._open.set()
+
+    async def retire(self, *, refill: bool = True) -> None:
+        """Recycle every context, checked-out ones when they return.
+
+        Args:
+            refill: Pre-warm fresh contexts up to ``min_size`` again.
+        """
+        self._generation += 1
+        # Refills in flight finish first and discard what they made, as
+        # cancelling one mid-creation would orphan its context.
+        await asyncio.gather(*self._refills, return_exceptions=True)
+        while self._idle:
+            await self._discard(self._idle.popleft())
+        if refill:
+            await self.start()
+
+    async def close(self) -> None:
+        """Close idle contexts; checked-out ones close on return."""
+        self._closed = True
+        for task in self._refills:
+            task.cancel()
+        await asyncio.gather(*self._refills, return_exceptions=True)
+        while self._idle:
+            await self._discard(self._idle.popleft())
+
+    async def _checkout(self) -> _PooledContext:
+        while not self._idle and self._refills:
+            # A recycled context is being replaced; wait for it rather
+            # than growing past max_size.
+            await asyncio.wait(
+                set(self._refills), return_when=asyncio.FIRST_COMPLETED
+            )
+        if self._idle:
+            return self._idle.popleft()
+        return await self._create()
+
+    async def _create(self) -> _PooledContext:
+        # Stamped before the await, so a context that outlives a
+        # retire() is recognised as stale when it returns.
+        generation = self._generation
+        self._size += 1
+        try:
+            context = await self._factory()
+        except BaseException:
+            self._size -= 1
+            raise
+        pooled = _PooledContext(context, generation)
+        context.on("page", pooled.count_page)
+        return pooled
+
+    async def _release(self, pooled: _PooledContext) -> None:
+        pooled.uses += 1
+        if (
+            self._closed
+            or pooled.generation != self._generation
+            or pooled.uses >= self.max_uses
+            or (self.max_pages is not None and pooled.pages >= self.max_pages)
+            or not await self._reset(pooled)
+        ):
+            await self._discard(pooled)
+            # A paused pool is refilled by whoever paused it.
+            if (
+                not self._closed
+                and self._open.is_set()
+                and self._size < self.min_size
+            ):
+                task = asyncio.create_task(self._refill())
+                self._refills.add(task)
+                task.add_done_callback(self._refills.discard)
+            return
+        self._idle.append(pooled)
+
+    async def _refill(self) -> None:
+        try:
+            pooled = await self._create()
+        except PlaywrightError:
+            logger.exception("Failed to replace a recycled context")
+            return
+        if self._closed or pooled.generation != self._generation:
+            await self._discard(pooled)
+        else:
+            self._idle.append(pooled)
+
+    async def _discard(self, pooled: _PooledContext) -> None:
+        self._size -= 1
+        with suppress(PlaywrightError):
+            await pooled.context.close()
+
+    @staticmethod
+    async def _reset(pooled: _PooledContext) -> bool:
+        """Close the context's pages and clear its cookies and storage.
+
+        Local storage, IndexedDB and the rest are cleared over CDP for
+        every origin that holds any, since pages of those origins are
+        usually closed by now. Session storage goes with the pages.
+        """
+        context = pooled.context
+        try:
+            for page in context.pages:
+                await page.close()
+            await context.clear_cookies()
+            state = await context.storage_state(indexed_db=True)
+            if not state["origins"]:
+                return True
+            pooled.resetting = True
+            page = await context.new_page()
+            try:
+                session = await context.new_cdp_session(page)
+                for entry in state["origins"]:
+                    await session.send(
+                        "Storage.clearDataForOrigin",
+                        {"origin": entry["origin"], "storageTypes": "all"},
+                    )
+            finally:
+                await page.close()
+                pooled.resetting = False
+        except PlaywrightError:
+            return False
+        return True
+
+
+class BrowserCore(ABC):
+    """Options, scripts, routing and recovery policy of the browsers.
+
+    Args:
+        headless: Run Chromium without a window.
+        min_contexts: Contexts kept warm in the pool.
+        max_contexts: Contexts alive at once.
+        max_context_uses: Jobs a context serves before it is recycled.
+        minify_script: Minify the stealth script before injecting it.
+        resource_profile: Requests every context blocks, by name or as
+            a profile.
+        response_cache: Serve static responses from this cache.
+        metrics: Where phase timings are recorded.
+        endpoint: CDP endpoint of a running browser server to use
+            instead of launching Chromium.
+        context_settings: Options for every new context.
+        launch_args: Chromium command line switches.
+        network_archive: Record every context's traffic to this
+            archive, or serve contexts from it without the network.
+        memory_limits: Thresholds the memory governor enforces.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        headless: bool = True,
+        min_contexts: int = POOL_MIN_SIZE,
+        max_contexts: int = POOL_MAX_SIZE,
+        max_context_uses: int = POOL_MAX_USES,
+        minify_script: bool = False,
+        resource_profile: str | ResourceProfile = "full",
+        response_cache: ResponseCache | None = None,
+        metrics: Metrics | None = None,
+        endpoint: str | None = None,
+        context_settings: ContextSettings | None = None,
+        launch_args: Sequence[str] | None = None,
+        network_archive: NetworkArchive | None = None,
+        memory_limits: MemoryLimits | None = None,
+    ) -> None:
+        self.headless = headless
+        self.min_contexts = min_contexts
+        self.max_contexts = max_contexts
+        self.max_context_uses = max_context_uses
+        self.endpoint = endpoint
+        self.context_settings = context_settings or CONTEXT_SETTINGS
+        self.launch_args = list(ARGS if launch_args is None else launch_args)
+        self.metrics = metrics or METRICS
+        self.response_cache = response_cache
+        self.resource_profile = resolve_profile(resource_profile)
+        self.network_archive = network_archive
+        self.memory_limits = memory_limits or MemoryLimits()
+        # Listed once so a missing recording fails before launching.
+        self.replay_archives = (
+            network_archive.archives()
+            if network_archive and network_archive.replaying
+            else []
+        )
+        self.relaunch_attempts = RELAUNCH_ATTEMPTS
+        self._options: BrowserOptions = {
+            "headless": headless,
+            "min_contexts": min_contexts,
+            "max_contexts": max_contexts,
+            "max_context_uses": max_context_uses,
+            "minify_script": minify_script,
+            "resource_profile": self.resource_profile,
+            "response_cache": response_cache,
+            "metrics": self.metrics,
+            "endpoint": endpoint,
+            "context_settings": self.context_settings,
+            "launch_args": self.launch_args,
+            "network_archive": network_archive,
+            "memory_limits": self.memory_limits,
+        }
+        self._stealth_script = load_stealth_script(minify=minify_script)
+        self._extra_scripts: list[str] = []
+        self._init_script: str | None = None
+
+    @classmethod
+    def connect(cls, endpoint: str) -> Self:
+        """Use a running browser server instead of launching Chromium.
+
+        Contexts still get the context settings and the init scripts.
+        Other options can be passed to the constructor with
+        ``endpoint=``.
+
+        Args:
+            endpoint: The server's CDP endpoint, e.g.
+                ``http://127.0.0.1:9222``.
+        """
+        return cls(endpoint=endpoint)
+
+    def derive[C: "BrowserCore"](self, facade: type[C]) -> C:
+        """Create an unentered ``facade`` sharing this browser's setup.
+
+        Options and init scripts are copied, e.g. to start the async
+        engine behind a sync browser.
+        """
+        other = facade(**self._options)
+        other._extra_scripts = list(self._extra_scripts)  # noqa: SLF001
+        return other
+
+    @property
+    def launch_options(self) -> LaunchOptions:
+        """How Chromium is launched when no endpoint is given."""
+        return {
+            "headless": self.headless,
+            "args": self.launch_args,
+            "chromium_sandbox": False,
+        }
+
+    def recording_options(self) -> RecordingOptions:
+        """HAR recording arguments for a new context, if recording."""
+        archive = self.network_archive
+        if archive is None or archive.replaying:
+            return {}
+        return archive.recording_options()
+
+    def profile_for(
+        self, resource_profile: str | ResourceProfile | None
+    ) -> ResourceProfile:
+        """Requests a new context blocks; the browser's by default."""
+        return resolve_profile(resource_profile or self.resource_profile)
+
+    async def prepare_context(
+        self,
+        context: BrowserContext,
+        *,
+        resource_profile: str | ResourceProfile | None = None,
+    ) -> None:
+        """Add the init script and routes to a new context.
+
+        Playwright runs the last matching route first, so the resource
+        filter is registered last and sees every request.
+        """
+        await context.add_init_script(script=self.init_script)
+        if self.replay_archives:
+            # Registered first so it only sees unrecorded requests.
+            await context.route("**/*", _offline)
+            for archive in self.replay_archives:
+                await context.route_from_har(archive, not_found="fallback")
+        elif self.response_cache:
+            # Registered first so blocked requests never reach it.
+            await context.route("**/*", _cache_handler(self.response_cache))
+        profile = self.profile_for(resource_profile)
+        if profile.blocks_anything:
+            await context.route("**/*", _resource_filter(profile))
+
+    async def block_resources(
+        self, page: Page, resource_profile: str | ResourceProfile
+    ) -> None:
+        """Block a profile's requests on one page of a pooled context.
+
+        The page's filter runs before its context's, so requests
+        blocked by either are aborted.
+        """
+        profile = resolve_profile(resource_profile)
+        if profile.blocks_anything:
+            await page.route("**/*", _resource_filter(profile))
+
+    @property
+    def init_script(self) -> str:
+        """The combined source injected into every new context."""
+        if self._init_script is None:
+            self._init_script = combine_scripts(
+                [self._stealth_script, *self._extra_scripts]
+            )
+        return self._init_script
+
+    def add_init_script(
+        self, script: str | None = None, *, path: Path | None = None
+    ) -> None:
+        """Register a script for every context created from now on.
+
+        Scripts are read once here and sent to each new context as a
+        single combined payload alongside the stealth script.
+        """
+        if path is not None:
+            script = load_init_script(path).source
+        if script is None:
+            msg = "Either script or path must be given."
+            raise ValueError(msg)
+        self._extra_scripts.append(script)
+        self._init_script = None
+
+    @property
+    @abstractmethod
+    def connected(self) -> bool:
+        """Whether the browser is launched and still reachable."""
+
+    def should_retry_job(
+        self, attempt: int, retries: int, *, idempotent: bool
+    ) -> bool:
+        """Whether a job that failed on ``attempt`` runs again.
+
+        Only idempotent jobs that failed because the browser was lost
+        are retried.
+        """
+        return idempotent and not self.connected and attempt < retries
+
+    def relaunch_delay(self, attempt: int) -> float | None:
+        """Seconds to wait after failed relaunch ``attempt``.
+
+        Returns:
+            The backoff delay, or ``None`` once every attempt is spent.
+        """
+        if attempt >= self.relaunch_attempts:
+            return None
+        return backoff_delay(attempt)
+
+
+class BackgroundLoop:
+    """An event loop running on a daemon thread.
+
+    Synchronous callers submit coroutines and block on their results,
+    which lets them drive async objects that live on the loop.
+    """
+
+    def __init__(self, name: str = "stealth-browser-loop") -> None:
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name=name, daemon=True
+        )
+        self._thread.start()
+
+    def run[T](self, coroutine: Coroutine[Any, Any, T]) -> T:
+        """Run ``coroutine`` on the loop and wait for its result.
+
+        The coroutine is cancelled if the wait is interrupted.
+        """
+        if threading.current_thread() is self._thread:
+            # Waiting here would stop the loop that has to finish it.
+            coroutine.close()
+            msg = "Cannot block on the loop from its own thread."
+            raise RuntimeError(msg)
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        try:
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+    def iterate[T](self, items: AsyncGenerator[T]) -> Iterator[T]:
+        """Iterate an async generator that runs on the loop.
+
+        Closing the returned iterator closes ``items`` on the loop.
+        """
+
+        async def step() -> list[T]:
+            # Empty once the generator is exhausted.
+            try:
+                return [await anext(items)]
+            except StopAsyncIteration:
+                return []
+
+        try:
+            while batch := self.run(step()):
+                yield batch[0]
+        finally:
+            self.run(items.aclose())
+
+    def close(self) -> None:
+        """Stop the loop and wait for its thread to exit."""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
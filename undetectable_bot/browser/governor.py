@@ -0,0 +1,127 @@
+"""Bound the memory of long-running browsers.
+
+Chromium's footprint grows with every page a context has served, and
+closing the browser is the only way to get all of it back. A
+``MemoryGovernor`` samples the resident memory of the Chromium
+processes and, once configured thresholds are crossed, recycles the
+pooled contexts or drains them and relaunches the browser.
+"""
+
+import asyncio
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Literal
+
+from undetectable_bot.utils.constants import GOVERNOR_INTERVAL
+from undetectable_bot.utils.procfs import chromium_rss_bytes
+
+if TYPE_CHECKING:
+    from undetectable_bot.browser.async_api import AsyncStealthBrowser
+
+logger = logging.getLogger(__name__)
+
+GovernorAction = Literal["recycle", "relaunch"]
+
+
+@dataclass(frozen=True, slots=True)
+class MemoryLimits:
+    """Thresholds that keep a long-running browser's memory bounded.
+
+    Attributes:
+        context_pages: Recycle a context once it has opened this many
+            pages, in addition to the pool's ``max_uses``.
+        recycle_rss: Chromium resident bytes at which every pooled
+            context is recycled.
+        relaunch_rss: Chromium resident bytes at which the browser is
+            drained and relaunched. Checked before ``recycle_rss``.
+        interval: Seconds between memory samples.
+    """
+
+    context_pages: int | None = None
+    recycle_rss: int | None = None
+    relaunch_rss: int | None = None
+    interval: float = GOVERNOR_INTERVAL
+
+    def __post_init__(self) -> None:
+        if (
+            self.recycle_rss is not None
+            and self.relaunch_rss is not None
+            and self.recycle_rss > self.relaunch_rss
+        ):
+            msg = "recycle_rss must not exceed relaunch_rss."
+            raise ValueError(msg)
+        if self.interval <= 0:
+            msg = "interval must be positive."
+            raise ValueError(msg)
+
+    @property
+    def samples_memory(self) -> bool:
+        """Whether any threshold needs Chromium's memory sampled."""
+        return self.recycle_rss is not None or self.relaunch_rss is not None
+
+
+class MemoryGovernor:
+    """Periodically act on a browser's Chromium memory.
+
+    Browsers attached to a shared server are not descendants of this
+    process, so their memory cannot be sampled and nothing is done.
+    """
+
+    def __init__(
+        self,
+        browser: "AsyncStealthBrowser",
+        limits: MemoryLimits,
+        *,
+        sample: Callable[[], int] = chromium_rss_bytes,
+    ) -> None:
+        self.browser = browser
+        self.limits = limits
+        self.recycles = 0
+        self.relaunches = 0
+        self._sample = sample
+        self._task: asyncio.Task[None] | None = None
+
+    async def check(self) -> GovernorAction | None:
+        """Sample memory once and act if a threshold is crossed.
+
+        Returns:
+            What was done, if anything.
+        """
+        rss = await asyncio.to_thread(self._sample)
+        limits = self.limits
+        if limits.relaunch_rss is not None and rss >= limits.relaunch_rss:
+            logger.info(
+                "Chromium uses %d MiB, relaunching the browser", rss >> 20
+            )
+            await self.browser.relaunch()
+            self.relaunches += 1
+            return "relaunch"
+        if limits.recycle_rss is not None and rss >= limits.recycle_rss:
+            logger.info("Chromium uses %d MiB, recycling contexts", rss >> 20)
+            await self.browser.pool.retire()
+            self.recycles += 1
+            return "recycle"
+        return None
+
+    async def run(self) -> None:
+        """Check memory every ``interval`` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(self.limits.interval)
+            try:
+                await self.check()
+            except Exception:
+                logger.exception("Memory governor check failed")
+
+    def start(self) -> None:
+        """Run the governor in the background."""
+        if self._task is None and self.limits.samples_memory:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop the background governor, if running."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
@@ -0,0 +1,206 @@
+"""Configurable page readiness instead of an unconditional networkidle.
+
+Playwright's ``networkidle`` waits for 500 ms without any request and
+never settles on pages with long-polling or analytics beacons. A
+``ReadinessStrategy`` combines cheaper conditions (a load state, a
+selector, a JavaScript predicate and a quiet-network window that skips
+ignored URLs) under a hard deadline. When the deadline passes the page
+is used as it is rather than failing the job.
+"""
+
+import asyncio
+import logging
+import re
+from dataclasses import dataclass, field
+from fnmatch import translate
+from types import TracebackType
+from typing import Final, Literal
+
+from playwright.async_api import Page, Request, Response
+
+from undetectable_bot.utils.constants import (
+    READY_DEADLINE,
+    READY_IGNORE_PATTERNS,
+    READY_QUIET_WINDOW,
+)
+
+logger = logging.getLogger(__name__)
+
+LoadState = Literal["domcontentloaded", "load", "networkidle"]
+
+# Requests that stay open by design and would never let a page settle.
+_STREAMING_TYPES: Final[frozenset[str]] = frozenset(
+    {"websocket", "eventsource"}
+)
+
+
+@dataclass(frozen=True, slots=True)
+class ReadinessStrategy:
+    """When a navigated page is complete enough to capture.
+
+    Every configured condition must hold, checked in attribute order.
+
+    Attributes:
+        load_state: Load state to reach, or ``None`` to skip it.
+        selector: CSS selector that must be attached to the page.
+        predicate: JavaScript expression or function that must return a
+            truthy value, re-evaluated on every animation frame.
+        quiet_window: Seconds without tracked requests in flight, or
+            ``None`` to skip the network check.
+        ignore_patterns: Shell-style URL globs left out of the quiet
+            network check, e.g. analytics beacons.
+        deadline: Seconds after the navigation commits before the page
+            is used regardless of the conditions.
+    """
+
+    load_state: LoadState | None = "domcontentloaded"
+    selector: str | None = None
+    predicate: str | None = None
+    quiet_window: float | None = READY_QUIET_WINDOW
+    ignore_patterns: tuple[str, ...] = READY_IGNORE_PATTERNS
+    deadline: float = READY_DEADLINE
+    _ignore: re.Pattern[str] | None = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        pattern = (
+            re.compile("|".join(translate(p) for p in self.ignore_patterns))
+            if self.ignore_patterns
+            else None
+        )
+        object.__setattr__(self, "_ignore", pattern)
+
+    def tracks(self, request: Request) -> bool:
+        """Whether ``request`` counts against the quiet window."""
+        if request.resource_type in _STREAMING_TYPES:
+            return False
+        return self._ignore is None or not self._ignore.match(request.url)
+
+
+DEFAULT_READINESS: Final[ReadinessStrategy] = ReadinessStrategy()
+
+# Playwright's own behaviour, for pages that need every last request.
+NETWORK_IDLE: Final[ReadinessStrategy] = ReadinessStrategy(
+    load_state="networkidle", quiet_window=None, ignore_patterns=()
+)
+
+
+class NetworkMonitor:
+    """Track a page's in-flight requests to detect a quiet network.
+
+    Attach it before navigating so that no request is missed.
+    """
+
+    def __init__(self, page: Page, strategy: ReadinessStrategy) -> None:
+        self.page = page
+        self.strategy = strategy
+        self._inflight: set[Request] = set()
+        self._settled = asyncio.Event()
+        self._settled.set()
+        self._last_activity = asyncio.get_running_loop().time()
+
+    def _on_request(self, request: Request) -> None:
+        if self.strategy.tracks(request):
+            self._inflight.add(request)
+            self._settled.clear()
+            self._touch()
+
+    def _on_done(self, request: Request) -> None:
+        if request in self._inflight:
+            self._inflight.discard(request)
+            self._touch()
+            if not self._inflight:
+                self._settled.set()
+
+    def _touch(self) -> None:
+        self._last_activity = asyncio.get_running_loop().time()
+
+    @property
+    def inflight(self) -> int:
+        """Tracked requests that have not finished yet."""
+        return len(self._inflight)
+
+    async def quiet(self, window: float) -> None:
+        """Wait for ``window`` seconds without tracked requests."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._settled.wait()
+            idle = loop.time() - self._last_activity
+            if not self._inflight and idle >= window:
+                return
+            await asyncio.sleep(window - idle)
+
+    def __enter__(self) -> "NetworkMonitor":
+        """Start listening to the page's requests."""
+        self.page.on("request", self._on_request)
+        self.page.on("requestfinished", self._on_done)
+        self.page.on("requestfailed", self._on_done)
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Stop listening to the page's requests."""
+        self.page.remove_listener("request", self._on_request)
+        self.page.remove_listener("requestfinished", self._on_done)
+        self.page.remove_listener("requestfailed", self._on_done)
+
+
+async def wait_until_ready(
+    page: Page,
+    strategy: ReadinessStrategy = DEFAULT_READINESS,
+    monitor: NetworkMonitor | None = None,
+) -> bool:
+    """Wait for the strategy's conditions, up to its deadline.
+
+    Args:
+        page: A page whose navigation has at least committed.
+        strategy: The conditions to wait for.
+        monitor: Request tracker attached before navigating. Required
+            for the quiet window, which is skipped without one.
+
+    Returns:
+        Whether every condition held before the deadline.
+    """
+    try:
+        async with asyncio.timeout(strategy.deadline):
+            # Playwright's timeouts are disabled; the deadline applies.
+            if strategy.load_state:
+                await page.wait_for_load_state(strategy.load_state, timeout=0)
+            if strategy.selector:
+                await page.wait_for_selector(
+                    strategy.selector, state="attached", timeout=0
+                )
+            if strategy.predicate:
+                await page.wait_for_function(strategy.predicate, timeout=0)
+            if strategy.quiet_window is not None and monitor is not None:
+                await monitor.quiet(strategy.quiet_window)
+    except TimeoutError:
+        logger.info(
+            "%s not ready after %.1fs, using it as is",
+            page.url,
+            strategy.deadline,
+        )
+        return False
+    return True
+
+
+async def navigate(
+    page: Page,
+    url: str,
+    strategy: ReadinessStrategy = DEFAULT_READINESS,
+) -> tuple[Response | None, bool]:
+    """Navigate to ``url`` and wait until the page is ready.
+
+    Returns:
+        The main resource response and whether the page became ready
+        before the strategy's deadline.
+    """
+    with NetworkMonitor(page, strategy) as monitor:
+        response = await page.goto(url, wait_until="commit")
+        ready = await wait_until_ready(page, strategy, monitor)
+    return response, ready
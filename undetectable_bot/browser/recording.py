@@ -0,0 +1,82 @@
+"""Recording network traffic to HAR archives and replaying it offline.
+
+In ``record`` mode every context writes the traffic it sees to a
+zipped HAR in the archive directory when it closes. In ``replay`` mode
+contexts are served from those archives through Playwright routing and
+requests missing from them are aborted, so runs are deterministic, need
+no network and finish as fast as the pages render::
+
+    archive = NetworkArchive(Path("archives/sannysoft"), "record")
+    async with AsyncStealthBrowser(network_archive=archive) as browser:
+        ...
+
+Requests are matched on URL and method (and body, for POSTs), so pages
+that add random query parameters to their requests only replay in
+part. Archives recorded later take precedence over earlier ones.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Literal, TypedDict
+from uuid import uuid4
+
+from undetectable_bot.utils.exceptions import NetworkArchiveNotFoundError
+
+NetworkMode = Literal["record", "replay"]
+
+# Failing like a dropped connection makes unrecorded requests look
+# like any other network error to the page.
+OFFLINE_ERROR: Literal["internetdisconnected"] = "internetdisconnected"
+
+
+class RecordingOptions(TypedDict, total=False):
+    """HAR recording arguments for ``Browser.new_context``."""
+
+    record_har_path: Path
+    record_har_content: Literal["attach"]
+    record_har_mode: Literal["minimal"]
+
+
+@dataclass(frozen=True, slots=True)
+class NetworkArchive:
+    """A directory of HAR archives to record to or replay from.
+
+    Attributes:
+        directory: Where the archives live, one per recorded context.
+        mode: ``record`` to capture traffic, ``replay`` to serve it.
+    """
+
+    directory: Path
+    mode: NetworkMode = "replay"
+
+    @property
+    def replaying(self) -> bool:
+        """Whether contexts are served from the archive."""
+        return self.mode == "replay"
+
+    def recording_options(self) -> RecordingOptions:
+        """Arguments that make a new context record to a fresh file.
+
+        Bodies are stored as separate entries of the zip, and only the
+        fields needed to replay a response are kept.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return {
+            "record_har_path": self.directory / f"{uuid4().hex}.har.zip",
+            "record_har_content": "attach",
+            "record_har_mode": "minimal",
+        }
+
+    def archives(self) -> list[Path]:
+        """Recorded archives, in the order they were finished.
+
+        Raises:
+            NetworkArchiveNotFoundError: If nothing has been recorded.
+        """
+        archives = sorted(
+            self.directory.glob("*.har.zip"),
+            key=lambda path: path.stat().st_mtime_ns,
+        )
+        if not archives:
+            raise NetworkArchiveNotFoundError(str(self.directory))
+        return archives
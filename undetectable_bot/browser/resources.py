@@ -0,0 +1,66 @@
+"""Declarative blocking of heavy network resources per context."""
+
+import re
+from dataclasses import dataclass, field
+from fnmatch import translate
+from typing import Final
+
+from undetectable_bot.utils.exceptions import UnknownResourceProfileError
+
+
+@dataclass(frozen=True, slots=True)
+class ResourceProfile:
+    """Requests a context should abort instead of downloading.
+
+    Attributes:
+        blocked_types: Playwright resource types such as ``"image"``.
+        blocked_patterns: Shell-style globs matched against the URL.
+    """
+
+    blocked_types: frozenset[str] = frozenset()
+    blocked_patterns: tuple[str, ...] = ()
+    _pattern: re.Pattern[str] | None = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        pattern = (
+            re.compile("|".join(translate(p) for p in self.blocked_patterns))
+            if self.blocked_patterns
+            else None
+        )
+        object.__setattr__(self, "_pattern", pattern)
+
+    @property
+    def blocks_anything(self) -> bool:
+        """Whether the profile needs request interception at all."""
+        return bool(self.blocked_types or self.blocked_patterns)
+
+    def blocks(self, url: str, resource_type: str) -> bool:
+        """Whether a request should be aborted."""
+        if resource_type in self.blocked_types:
+            return True
+        return self._pattern is not None and bool(self._pattern.match(url))
+
+
+RESOURCE_PROFILES: Final[dict[str, ResourceProfile]] = {
+    "full": ResourceProfile(),
+    "no-media": ResourceProfile(
+        blocked_types=frozenset({"image", "media", "font"}),
+    ),
+    "html-only": ResourceProfile(
+        blocked_types=frozenset(
+            {"image", "media", "font", "stylesheet", "texttrack", "manifest"}
+        ),
+    ),
+}
+
+
+def resolve_profile(profile: str | ResourceProfile) -> ResourceProfile:
+    """Look up a profile by name, passing profile objects through."""
+    if isinstance(profile, ResourceProfile):
+        return profile
+    try:
+        return RESOURCE_PROFILES[profile]
+    except KeyError:
+        raise UnknownResourceProfileError(profile) from None
@@ -0,0 +1,111 @@
+"""A long-lived Chromium that stealth browsers connect to over CDP.
+
+Launching Chromium dominates short jobs. Run the server once per host::
+
+    python -m undetectable_bot.browser.server --port 9222
+
+and have workers attach with ``AsyncStealthBrowser.connect(endpoint)``
+or ``StealthBrowser.connect(endpoint)``. Each worker still creates its
+own contexts with the usual settings and init scripts.
+"""
+
+import argparse
+import asyncio
+import logging
+import signal
+from pathlib import Path
+
+from playwright.async_api import async_playwright
+
+from undetectable_bot.utils.constants import ARGS, SERVER_HOST, SERVER_PORT
+from undetectable_bot.utils.logging import configure_logging
+
+logger = logging.getLogger(__name__)
+
+
+def endpoint_url(host: str = SERVER_HOST, port: int = SERVER_PORT) -> str:
+    """The CDP endpoint workers pass to ``connect()``."""
+    return f"http://{host}:{port}"
+
+
+async def serve(
+    host: str = SERVER_HOST,
+    port: int = SERVER_PORT,
+    *,
+    headless: bool = True,
+    endpoint_file: Path | None = None,
+) -> None:
+    """Launch Chromium with ``ARGS`` and keep it running.
+
+    Returns when the process receives SIGINT or SIGTERM, or when the
+    browser exits on its own.
+
+    Args:
+        host: Interface the debugging endpoint listens on.
+        port: Port the debugging endpoint listens on.
+        headless: Whether to run Chromium headless.
+        endpoint_file: Where to write the endpoint URL for workers.
+    """
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(
+            headless=headless,
+            args=[
+                *ARGS,
+                f"--remote-debugging-address={host}",
+                f"--remote-debugging-port={port}",
+            ],
+            chromium_sandbox=False,
+        )
+        browser.on("disconnected", lambda _: stop.set())
+        endpoint = endpoint_url(host, port)
+        if endpoint_file:
+            await asyncio.to_thread(
+                endpoint_file.write_text, endpoint, encoding="utf-8"
+            )
+        logger.info("Browser server listening on %s", endpoint)
+
+        await stop.wait()
+        logger.info("Shutting down browser server")
+        if browser.is_connected():
+            await browser.close()
+    if endpoint_file:
+        await asyncio.to_thread(endpoint_file.unlink, missing_ok=True)
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments for the browser server."""
+    parser = argparse.ArgumentParser(
+        description="Run a shared stealth Chromium."
+    )
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument(
+        "--headed",
+        action="store_true",
+        help="show the browser window",
+    )
+    parser.add_argument(
+        "--endpoint-file",
+        type=Path,
+        metavar="FILE",
+        help="write the endpoint URL to FILE while running",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    configure_logging()
+    args = parse_args()
+    asyncio.run(
+        serve(
+            args.host,
+            args.port,
+            headless=not args.headed,
+            endpoint_file=args.endpoint_file,
+        )
+    )
@@ -0,0 +1,290 @@
+"""Multi-process sharding of page jobs across stealth browsers.
+
+Each worker process runs its own ``AsyncStealthBrowser`` and event loop,
+so Python-side work such as screenshot encoding and result parsing
+scales with the number of cores instead of saturating a single one.
+"""
+
+import asyncio
+import logging
+import multiprocessing as mp
+import os
+import pickle
+import threading
+from collections.abc import (
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    Sequence,
+)
+from dataclasses import dataclass
+from multiprocessing.process import BaseProcess
+from multiprocessing.queues import Queue
+from multiprocessing.synchronize import Event
+from queue import Empty
+from typing import Any
+
+from playwright.async_api import Page
+
+from undetectable_bot.browser.async_api import AsyncStealthBrowser
+from undetectable_bot.utils.constants import SHARD_CONCURRENCY
+from undetectable_bot.utils.exceptions import ShardWorkerError
+from undetectable_bot.utils.logging import configure_logging, job_context
+
+logger = logging.getLogger(__name__)
+
+type PageJob[T] = Callable[[Page, str], Awaitable[T]]
+
+_POLL_INTERVAL = 0.1
+_JOIN_TIMEOUT = 30.0
+
+
+@dataclass(frozen=True, slots=True)
+class ShardResult[T]:
+    """Outcome of a single job run by a shard worker."""
+
+    index: int
+    url: str
+    worker: int
+    value: T | None = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the job completed without raising."""
+        return self.error is None
+
+
+@dataclass(frozen=True, slots=True)
+class _Started:
+    """Sent by a worker when it takes a job, before running it."""
+
+    worker: int
+    index: int
+    url: str
+
+
+async def fetch_content(page: Page, url: str) -> str:
+    """Navigate to ``url`` and return the rendered HTML."""
+    await page.goto(url)
+    await page.wait_for_load_state("networkidle")
+    return await page.content()
+
+
+class ShardedRunner[T]:
+    """Distribute URL jobs across worker processes.
+
+    Jobs are dealt round-robin into one queue per worker. A worker that
+    runs out of local jobs steals from the other queues, so slow pages
+    on one shard do not leave the remaining cores idle.
+
+    ``job`` is pickled into the workers and must therefore be a
+    module-level coroutine function, and its return values must pickle.
+
+    Jobs that were running on a worker that died, e.g. killed for
+    running out of memory, are reported as failed results.
+
+    With ``endpoint`` set, the workers share one browser server (see
+    ``undetectable_bot.browser.server``) instead of each launching
+    Chromium.
+    """
+
+    def __init__(
+        self,
+        job: PageJob[T],
+        *,
+        workers: int | None = None,
+        concurrency: int = SHARD_CONCURRENCY,
+        headless: bool = True,
+        endpoint: str | None = None,
+    ) -> None:
+        self.job = job
+        self.workers = workers or os.process_cpu_count() or 1
+        self.concurrency = concurrency
+        self.headless = headless
+        self.endpoint = endpoint
+
+    def run(self, urls: Iterable[str]) -> Iterator[ShardResult[T]]:
+        """Run ``job`` on every URL, yielding results as they finish."""
+        ctx = mp.get_context("spawn")
+        queues: list[Queue[tuple[int, str]]] = [
+            ctx.Queue() for _ in range(self.workers)
+        ]
+        results: Queue[ShardResult[T] | _Started] = ctx.Queue()
+        stop = ctx.Event()
+
+        total = 0
+        for index, url in enumerate(urls):
+            queues[index % self.workers].put((index, url))
+            total += 1
+
+        processes = [
+            ctx.Process(
+                target=_work,
+                args=(
+                    worker,
+                    self.job,
+                    queues,
+                    results,
+                    stop,
+                    self.concurrency,
+                    self.headless,
+                    self.endpoint,
+                ),
+                daemon=True,
+            )
+            for worker in range(self.workers)
+        ]
+        for process in processes:
+            process.start()
+
+        try:
+            yield from _collect(results, processes, total)
+        finally:
+            stop.set()
+            for queue in queues:
+                queue.cancel_join_thread()
+            for process in processes:
+                process.join(_JOIN_TIMEOUT)
+                if process.is_alive():
+                    process.terminate()
+
+
+def _collect[T](
+    results: Queue[ShardResult[T] | _Started],
+    processes: Sequence[BaseProcess],
+    total: int,
+) -> Iterator[ShardResult[T]]:
+    """Yield ``total`` results, failing the jobs of dead workers."""
+    running: dict[int, _Started] = {}
+    dead: set[int] = set()
+    remaining = total
+    while remaining:
+        try:
+            message = results.get(timeout=_POLL_INTERVAL)
+        except Empty:
+            # Whatever the dead wrote has been read by now.
+            for result in _orphans(processes, dead, running):
+                remaining -= 1
+                yield result
+            if remaining and len(dead) == len(processes):
+                raise ShardWorkerError(remaining) from None
+            continue
+        if isinstance(message, _Started):
+            running[message.index] = message
+            continue
+        running.pop(message.index, None)
+        remaining -= 1
+        yield message
+
+
+def _orphans(
+    processes: Sequence[BaseProcess],
+    dead: set[int],
+    running: dict[int, _Started],
+) -> list[ShardResult[Any]]:
+    """Failed results for the jobs of workers that have just exited."""
+    orphans: list[ShardResult[Any]] = []
+    for worker, process in enumerate(processes):
+        if worker in dead or process.exitcode is None:
+            continue
+        dead.add(worker)
+        logger.error(
+            "Shard worker %d exited with code %s", worker, process.exitcode
+        )
+        for index, started in list(running.items()):
+            if started.worker == worker:
+                del running[index]
+                orphans.append(
+                    ShardResult(
+                        index,
+                        started.url,
+                        worker,
+                        error=f"worker exited with code {process.exitcode}",
+                    )
+                )
+    return orphans
+
+
+def _work[T](  # noqa: PLR0913, PLR0917
+    worker: int,
+    job: PageJob[T],
+    queues: list[Queue[tuple[int, str]]],
+    results: Queue[ShardResult[T] | _Started],
+    stop: Event,
+    concurrency: int,
+    headless: bool,  # noqa: FBT001
+    endpoint: str | None,
+) -> None:
+    """Entry point of a shard worker process."""
+    # Spawned workers do not inherit the parent's logging setup.
+    configure_logging()
+    own = queues[worker]
+    victims = queues[worker + 1 :] + queues[:worker]
+    # Set when the browser goes away, so the polling threads return and
+    # a crashed worker exits instead of hanging in interpreter shutdown.
+    finished = threading.Event()
+
+    def next_job() -> tuple[int, str] | None:
+        while not (stop.is_set() or finished.is_set()):
+            try:
+                return own.get(timeout=_POLL_INTERVAL)
+            except Empty:
+                pass
+            for victim in victims:
+                try:
+                    return victim.get_nowait()
+                except Empty:
+                    continue
+        return None
+
+    async def drain(browser: AsyncStealthBrowser) -> None:
+        while (item := await asyncio.to_thread(next_job)) is not None:
+            index, url = item
+            results.put(_Started(worker, index, url))
+            results.put(await _run_job(browser, job, worker, index, url))
+
+    async def serve() -> None:
+        try:
+            async with AsyncStealthBrowser(
+                headless=headless, max_contexts=concurrency, endpoint=endpoint
+            ) as browser:
+                await asyncio.gather(
+                    *(drain(browser) for _ in range(concurrency))
+                )
+        finally:
+            finished.set()
+
+    asyncio.run(serve())
+
+
+async def _run_job[T](
+    browser: AsyncStealthBrowser,
+    job: PageJob[T],
+    worker: int,
+    index: int,
+    url: str,
+) -> ShardResult[T]:
+    with job_context(f"shard{worker}-{index}"):
+        try:
+            async with browser.context() as context:
+                page = await context.new_page()
+                try:
+                    value = await job(page, url)
+                finally:
+                    await page.close()
+        except Exception as exc:
+            logger.exception("Shard job failed for %s", url)
+            return ShardResult(
+                index, url, worker, error=str(exc) or type(exc).__name__
+            )
+        try:
+            # The queue's feeder thread would drop it without a word.
+            pickle.dumps(value)
+        except Exception as exc:
+            logger.exception("Shard job for %s returned %r", url, value)
+            return ShardResult(
+                index, url, worker, error=f"result cannot be pickled: {exc}"
+            )
+    return ShardResult(index, url, worker, value)
@@ -1,54 +1,309 @@
+import asyncio
+import functools
+import inspect
+from collections.abc import (
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    Mapping,
+)
+from contextlib import contextmanager
 from types import TracebackType
+from typing import Any, Final, Unpack
 
-from playwright.sync_api import (
-    Browser,
-    BrowserContext,
-    Playwright,
-    sync_playwright,
-)
+from playwright.async_api import BrowserContext
 
-from undetectable_bot.utils.constants import (
-    ARGS,
-    CONTEXT_SETTINGS,
-    STEALTH_JS_PATH,
+from undetectable_bot.browser import batch
+from undetectable_bot.browser.async_api import AsyncStealthBrowser
+from undetectable_bot.browser.capture import DEFAULT_CAPTURE, CaptureOptions
+from undetectable_bot.browser.core import (
+    BackgroundLoop,
+    BrowserCore,
+    BrowserOptions,
 )
+from undetectable_bot.browser.readiness import (
+    DEFAULT_READINESS,
+    ReadinessStrategy,
+)
+from undetectable_bot.browser.resources import ResourceProfile
+from undetectable_bot.utils.constants import FETCH_TIMEOUT, JOB_RETRIES
 from undetectable_bot.utils.exceptions import BrowserNotInitializedError
 
+# Parameters of Playwright methods taking callbacks that it awaits.
+_HANDLERS: Final[frozenset[str]] = frozenset({"f", "handler", "callback"})
 
-class StealthBrowser:
-    """A stealthy browser that evades detection."""
 
-    def __init__(self, *, headless: bool = True) -> None:
-        self.headless = headless
-        self.browser: Browser | None = None
-        self.playwright: Playwright | None = None
+class BlockingProxy:
+    """A synchronous view of an async Playwright object.
 
-    def new_context(self) -> BrowserContext:
-        """Create a new browser context."""
-        if not self.browser:
-            raise BrowserNotInitializedError
-        context: BrowserContext = self.browser.new_context(
-            viewport=CONTEXT_SETTINGS["viewport"],
-            user_agent=CONTEXT_SETTINGS["user_agent"],
-            color_scheme=CONTEXT_SETTINGS["color_scheme"],
-            locale=CONTEXT_SETTINGS["locale"],
-            timezone_id=CONTEXT_SETTINGS["timezone_id"],
-            permissions=CONTEXT_SETTINGS["permissions"],
-            java_script_enabled=CONTEXT_SETTINGS["java_script_enabled"],
-            bypass_csp=CONTEXT_SETTINGS["bypass_csp"],
-            extra_http_headers=CONTEXT_SETTINGS["extra_http_headers"],
+    It offers the methods of the matching ``playwright.sync_api``
+    object. Coroutine methods run on the engine's loop and block until
+    they are done, and Playwright objects they return come back
+    wrapped. Route and event handlers run on a worker thread with
+    wrapped arguments, so they may block on the loop in turn; URL
+    matchers and predicates run on the loop and must not.
+    """
+
+    __slots__ = ("_loop", "_shims", "_target")
+
+    def __init__(
+        self,
+        target: object,
+        loop: BackgroundLoop,
+        shims: dict[Callable[..., Any], Callable[..., Any]] | None = None,
+    ) -> None:
+        self._target: Any = target
+        self._loop = loop
+        # Shared by every proxy of a browser, so a handler given to
+        # remove_listener() or unroute() maps to the one registered.
+        self._shims = {} if shims is None else shims
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        value = getattr(self._target, name)
+        if inspect.isawaitable(value):
+            return self._wrap(self._loop.run(_resolve(value)))
+        if not callable(value):
+            return self._wrap(value)
+        method = value
+
+        @functools.wraps(method)
+        def call(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            bound = inspect.signature(method).bind_partial(*args, **kwargs)
+            for key, argument in bound.arguments.items():
+                bound.arguments[key] = self._unwrap(argument, key)
+            return self._wrap(
+                self._loop.run(_invoke(method, bound.args, bound.kwargs))
+            )
+
+        return call
+
+    def __enter__(self) -> Any:  # noqa: ANN401
+        """Enter the wrapped async context manager."""
+        return self._wrap(self._loop.run(self._target.__aenter__()))
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> bool | None:
+        """Exit the wrapped async context manager."""
+        suppress: bool | None = self._loop.run(
+            self._target.__aexit__(exc_type, exc_value, traceback)
         )
-        context.add_init_script(path=str(STEALTH_JS_PATH))
-        return context
+        return suppress
 
-    def __enter__(self) -> "StealthBrowser":
-        """Enter the synchronous context manager."""
-        self.playwright = sync_playwright().start()
-        self.browser = self.playwright.chromium.launch(
-            headless=self.headless,
-            args=ARGS,
-            chromium_sandbox=False,
+    def __eq__(self, other: object) -> bool:
+        """Whether both wrap the same object."""
+        if isinstance(other, BlockingProxy):
+            return self._target is other._target
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        """Hash of the wrapped object's identity."""
+        return id(self._target)
+
+    def __repr__(self) -> str:
+        """Represent the proxy by the wrapped object."""
+        return f"BlockingProxy({self._target!r})"
+
+    def _wrap(self, value: object) -> Any:  # noqa: ANN401
+        if isinstance(value, list):
+            return [self._wrap(item) for item in value]
+        if type(value).__module__.startswith("playwright."):
+            return BlockingProxy(value, self._loop, self._shims)
+        return value
+
+    def _unwrap(self, value: object, key: str) -> object:
+        if isinstance(value, BlockingProxy):
+            return value._target  # noqa: SLF001
+        if isinstance(value, list | tuple):
+            return type(value)(self._unwrap(item, key) for item in value)
+        if isinstance(value, Mapping):
+            return {
+                name: self._unwrap(item, key) for name, item in value.items()
+            }
+        if callable(value) and not isinstance(value, type):
+            if value not in self._shims:
+                self._shims[value] = self._shim(value, key)
+            return self._shims[value]
+        return value
+
+    def _shim(
+        self, callback: Callable[..., Any], key: str
+    ) -> Callable[..., Any]:
+        """Adapt a callback so Playwright can call it on the loop.
+
+        The shim keeps the callback's signature, as Playwright passes
+        only as many arguments as it takes.
+        """
+        if key in _HANDLERS:
+
+            @functools.wraps(callback)
+            async def handler(*args: Any) -> Any:  # noqa: ANN401
+                wrapped = [self._wrap(arg) for arg in args]
+                return await asyncio.to_thread(callback, *wrapped)
+
+            return handler
+
+        @functools.wraps(callback)
+        def predicate(*args: Any) -> Any:  # noqa: ANN401
+            return callback(*(self._wrap(arg) for arg in args))
+
+        return predicate
+
+
+async def _resolve[T](awaitable: Awaitable[T]) -> T:
+    return await awaitable
+
+
+async def _invoke(
+    method: Callable[..., Any],
+    args: tuple[Any, ...],
+    kwargs: dict[str, Any],
+) -> Any:  # noqa: ANN401
+    # Synchronous methods run on the loop too, as Playwright objects
+    # are not thread-safe.
+    result = method(*args, **kwargs)
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+
+class StealthBrowser(BrowserCore):
+    """A stealthy browser that evades detection.
+
+    The pages load on the async engine: an ``AsyncStealthBrowser`` with
+    this browser's options and init scripts, running on a background
+    event loop while the browser is entered. Pooling, routing and crash
+    recovery are therefore the engine's, and each call blocks until the
+    engine is done. Contexts and pages are handed out as
+    ``BlockingProxy`` objects with the ``playwright.sync_api`` methods.
+    """
+
+    def __init__(self, **options: Unpack[BrowserOptions]) -> None:
+        super().__init__(**options)
+        self.engine: AsyncStealthBrowser | None = None
+        self._loop: BackgroundLoop | None = None
+        self._shims: dict[Callable[..., Any], Callable[..., Any]] = {}
+
+    @property
+    def browser(self) -> BlockingProxy | None:
+        """The engine's Chromium, if it is running."""
+        if self._loop is None or self.engine is None:
+            return None
+        if self.engine.browser is None:
+            return None
+        return self._proxy(self.engine.browser)
+
+    @property
+    def connected(self) -> bool:
+        """Whether the engine's browser is launched and reachable."""
+        return self.engine is not None and self.engine.connected
+
+    def new_context(
+        self, *, resource_profile: str | ResourceProfile | None = None
+    ) -> BlockingProxy:
+        """Create a new browser context, closed by the caller.
+
+        Args:
+            resource_profile: Requests to block in this context, by name
+                or as a profile. Defaults to the browser's profile.
+        """
+        loop, engine = self._started()
+        return self._proxy(
+            loop.run(engine.new_context(resource_profile=resource_profile))
+        )
+
+    @contextmanager
+    def context(self) -> Iterator[BlockingProxy]:
+        """Check out a warm context from the pool."""
+        loop, engine = self._started()
+        with BlockingProxy(engine.context(), loop, self._shims) as context:
+            yield context
+
+    def fetch_many(  # noqa: PLR0913
+        self,
+        urls: Iterable[str],
+        *,
+        concurrency: int | None = None,
+        capture: tuple[batch.Capture, ...] = ("html",),
+        screenshot_options: CaptureOptions = DEFAULT_CAPTURE,
+        readiness: ReadinessStrategy = DEFAULT_READINESS,
+        timeout: float = FETCH_TIMEOUT,
+    ) -> Iterator[batch.FetchResult]:
+        """Fetch URLs concurrently, yielding results as they end.
+
+        ``urls`` is consumed lazily on the engine's thread. See
+        ``batch.fetch_many``.
+        """
+        loop, engine = self._started()
+        return loop.iterate(
+            engine.fetch_many(
+                urls,
+                concurrency=concurrency,
+                capture=capture,
+                screenshot_options=screenshot_options,
+                readiness=readiness,
+                timeout=timeout,
+            )
+        )
+
+    def run[T](
+        self,
+        job: Callable[[BlockingProxy], T],
+        *,
+        retries: int = JOB_RETRIES,
+        idempotent: bool = False,
+    ) -> T:
+        """Run ``job`` on a pooled context and wait for its result.
+
+        The job runs on a worker thread, and is retried as described
+        in ``AsyncStealthBrowser.run``.
+        """
+        loop, engine = self._started()
+
+        async def attempt(context: BrowserContext) -> T:
+            return await asyncio.to_thread(job, self._proxy(context))
+
+        return loop.run(
+            engine.run(attempt, retries=retries, idempotent=idempotent)
         )
+
+    def recover(self) -> None:
+        """Relaunch a crashed or disconnected browser, with backoff.
+
+        Raises:
+            BrowserRelaunchError: Every relaunch attempt failed.
+        """
+        loop, engine = self._started()
+        loop.run(engine.recover())
+
+    def relaunch(self) -> None:
+        """Replace the browser once in-flight pages have finished."""
+        loop, engine = self._started()
+        loop.run(engine.relaunch())
+
+    def _proxy(self, target: object) -> BlockingProxy:
+        loop, _ = self._started()
+        return BlockingProxy(target, loop, self._shims)
+
+    def _started(self) -> tuple[BackgroundLoop, AsyncStealthBrowser]:
+        if self._loop is None or self.engine is None:
+            raise BrowserNotInitializedError
+        return self._loop, self.engine
+
+    def __enter__(self) -> "StealthBrowser":
+        """Start the engine on its background loop."""
+        loop = BackgroundLoop()
+        engine = self.derive(AsyncStealthBrowser)
+        try:
+            loop.run(engine.__aenter__())
+        except BaseException:
+            loop.close()
+            raise
+        self._loop, self.engine = loop, engine
         return self
 
     def __exit__(
@@ -57,6 +312,11 @@ class StealthBrowser:
         exc_value: BaseException | None,
         traceback: TracebackType | None,
     ) -> None:
-        """Exit the synchronous context manager."""
-        if self.playwright:
-            self.playwright.stop()
+        """Close the engine and stop its loop."""
+        loop, engine = self._started()
+        try:
+            loop.run(engine.__aexit__(exc_type, exc_value, traceback))
+        finally:
+            loop.close()
+            self._loop = self.engine = None
+            self._shims.clear()
@@ -275,53 +275,6 @@ HTMLCanvasElement.prototype.getContext = function (
   return context;
 };
 
-// Wait for the test elements to be available
-const waitForElement = (selector) => {
-  return new Promise((resolve) => {
-    if (document.querySelector(selector)) {
-      return resolve(document.querySelector(selector));
-    }
-
-    const observer = new MutationObserver(() => {
-      if (document.querySelector(selector)) {
-        observer.disconnect();
-        resolve(document.querySelector(selector));
-      }
-    });
-
-    observer.observe(document.body, {
-      childList: true,
-      subtree: true,
-    });
-  });
-};
-
-// Update WebGL test results
-const updateWebGLResults = () => {
-  waitForElement("#webgl-vendor").then((element) => {
-    element.textContent = "Intel Inc.";
-    element.className = "passed";
-  });
-  waitForElement("#webgl-renderer").then((element) => {
-    element.textContent = "Intel HD Graphics 4000";
-    element.className = "passed";
-  });
-};
-
-// Run after page load
-if (document.readyState === "complete") {
-  updateWebGLResults();
-} else {
-  window.addEventListener("load", updateWebGLResults);
-}
-
-// Override document functions
-const originalQuery = document.querySelector;
-document.querySelector = function (...args) {
-  if (args[0] === "[webdriver]") return null;
-  return originalQuery.apply(this, args);
-};
-
 // Clean up automation flags
 delete window.cdc_adoQpoasnfa76pfcZLmcfl_Array;
 delete window.cdc_adoQpoasnfa76pfcZLmcfl_Promise;
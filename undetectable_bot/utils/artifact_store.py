@@ -0,0 +1,243 @@
+"""Content-addressed storage of artifacts across runs.
+
+Artifacts written through an ``ArtifactStore`` go into a ``BlobStore``
+named by their hash, so a screenshot or page that has not changed since
+an earlier run costs a hash and no new bytes. Each run gets a JSON
+manifest in ``runs/`` mapping its artifact paths to blobs, and the
+paths themselves become hard links to the blobs, so the latest run
+still reads as ``data/<service>/...``.
+
+``collect`` drops the oldest runs until the blobs the remaining ones
+use fit a byte budget, then deletes every blob no run refers to::
+
+    python -m undetectable_bot.utils.artifact_store store --max-bytes 2G
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import TracebackType
+from typing import Final
+
+from undetectable_bot.utils.blobs import BlobStore
+from undetectable_bot.utils.logging import configure_logging
+
+logger = logging.getLogger(__name__)
+
+_SIZE_UNITS: Final[dict[str, int]] = {
+    "": 1,
+    "K": 1024,
+    "M": 1024**2,
+    "G": 1024**3,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class RunRecord:
+    """The blobs one run stored, by the path they were written to."""
+
+    run_id: str
+    started_at: float
+    artifacts: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class CollectStats:
+    """What a garbage collection removed and what it kept."""
+
+    runs_removed: int = 0
+    blobs_removed: int = 0
+    bytes_freed: int = 0
+    bytes_kept: int = 0
+
+
+class ArtifactStore:
+    """A deduplicating store of the artifacts of many runs.
+
+    A run's manifest is written when the store is closed, or when a
+    ``with`` block around the run exits. Safe to call ``put`` from
+    several threads.
+
+    Args:
+        root: Directory holding the blobs and run manifests.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.blobs = BlobStore(root / "blobs")
+        self.runs_dir = root / "runs"
+        self.runs_dir.mkdir(parents=True, exist_ok=True)
+        self.run = RunRecord(
+            f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}",
+            time.time(),
+        )
+        self.reused = 0
+        self._lock = threading.Lock()
+
+    def put(self, path: Path, data: bytes) -> str:
+        """Store ``data`` as the artifact at ``path`` for this run.
+
+        ``path`` is replaced by a hard link to the blob, or a copy when
+        the store is on another file system.
+
+        Returns:
+            The blob's digest.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        blob = self.blobs.path(digest)
+        reused = digest in self.blobs
+        if not reused:
+            self.blobs.put(data)
+            # Links share the blob's inode; keep writes off it.
+            blob.chmod(0o444)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if not (path.exists() and path.samefile(blob)):
+            self._link(blob, path)
+        with self._lock:
+            self.run.artifacts[path.as_posix()] = digest
+            self.reused += reused
+        return digest
+
+    @staticmethod
+    def _link(blob: Path, path: Path) -> None:
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            try:
+                tmp.hardlink_to(blob)
+            except OSError:
+                shutil.copyfile(blob, tmp)
+            tmp.replace(path)
+        finally:
+            # Renaming a link over another link to the same inode does
+            # nothing, which would leave the temporary link behind.
+            tmp.unlink(missing_ok=True)
+
+    def save_run(self) -> Path:
+        """Write this run's manifest, atomically."""
+        path = self.runs_dir / f"{self.run.run_id}.json"
+        with self._lock:
+            payload = json.dumps(
+                {
+                    "run_id": self.run.run_id,
+                    "started_at": self.run.started_at,
+                    "artifacts": self.run.artifacts,
+                },
+                indent=2,
+            )
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(payload, encoding="utf-8")
+        tmp.replace(path)
+        return path
+
+    def runs(self) -> list[RunRecord]:
+        """Every saved run, oldest first."""
+        records = []
+        for path in self.runs_dir.glob("*.json"):
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                records.append(
+                    RunRecord(
+                        data["run_id"], data["started_at"], data["artifacts"]
+                    )
+                )
+            except (OSError, ValueError, KeyError):
+                logger.warning("Skipping unreadable run manifest %s", path)
+        return sorted(records, key=lambda run: run.started_at)
+
+    def collect(self, max_bytes: int) -> CollectStats:
+        """Trim the store to ``max_bytes`` of blobs used by kept runs.
+
+        The oldest runs are dropped first and the newest is always
+        kept. Must not run while a run is writing to the store.
+        """
+        stats = CollectStats()
+        runs = self.runs()
+        sizes = {digest: self.blobs.size(digest) for digest in self.blobs}
+        while len(runs) > 1 and _referenced_bytes(runs, sizes) > max_bytes:
+            dropped = runs.pop(0)
+            (self.runs_dir / f"{dropped.run_id}.json").unlink(missing_ok=True)
+            stats.runs_removed += 1
+        referenced = {
+            digest for run in runs for digest in run.artifacts.values()
+        }
+        for digest, size in sizes.items():
+            if digest in referenced:
+                stats.bytes_kept += size
+                continue
+            self.blobs.delete(digest)
+            stats.blobs_removed += 1
+            stats.bytes_freed += size
+        return stats
+
+    def close(self) -> None:
+        """Save the run's manifest, if it stored anything."""
+        if not self.run.artifacts:
+            return
+        self.save_run()
+        logger.info(
+            "Stored %d artifacts (%d unchanged) in run %s",
+            len(self.run.artifacts),
+            self.reused,
+            self.run.run_id,
+        )
+
+    def __enter__(self) -> "ArtifactStore":
+        """Return the open store."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the store."""
+        self.close()
+
+
+def _referenced_bytes(runs: list[RunRecord], sizes: dict[str, int]) -> int:
+    digests = {digest for run in runs for digest in run.artifacts.values()}
+    return sum(sizes.get(digest, 0) for digest in digests)
+
+
+def parse_size(text: str) -> int:
+    """Parse a byte count such as ``512M`` or ``2G``."""
+    number, unit = text.upper().rstrip("B"), ""
+    if number and number[-1] in _SIZE_UNITS:
+        number, unit = number[:-1], number[-1]
+    return int(float(number) * _SIZE_UNITS[unit])
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments for garbage collection."""
+    parser = argparse.ArgumentParser(
+        description="Garbage-collect an artifact store."
+    )
+    parser.add_argument("root", type=Path, help="the store directory")
+    parser.add_argument(
+        "--max-bytes",
+        type=parse_size,
+        required=True,
+        help="size budget for kept blobs, e.g. 500M or 2G",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    configure_logging()
+    args = parse_args()
+    stats = ArtifactStore(args.root).collect(args.max_bytes)
+    logger.info(
+        "Removed %d runs and %d blobs, freeing %d bytes; %d bytes kept",
+        stats.runs_removed,
+        stats.blobs_removed,
+        stats.bytes_freed,
+        stats.bytes_kept,
+    )
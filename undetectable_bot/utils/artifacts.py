@@ -0,0 +1,311 @@
+"""Background writing of page artifacts such as screenshots and HTML.
+
+Encoding and disk I/O run in a thread pool fed by an async queue, so a
+large screenshot being written never stalls other pages on the event
+loop. The bytes waiting to be written are capped, and producers wait
+for room once the cap is reached. With an ``ArtifactStore`` attached,
+artifacts are deduplicated into it instead of written as new files.
+"""
+
+import asyncio
+import gzip
+import io
+import logging
+import uuid
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from types import TracebackType
+from typing import Literal
+
+from undetectable_bot.utils.artifact_store import ArtifactStore
+from undetectable_bot.utils.constants import (
+    ARTIFACT_MAX_PENDING_BYTES,
+    ARTIFACT_WORKERS,
+)
+from undetectable_bot.utils.optional import require
+
+logger = logging.getLogger(__name__)
+
+ScreenshotFormat = Literal["png", "jpeg", "webp"]
+HtmlCompression = Literal["none", "gzip", "zstd"]
+
+_SCREENSHOT_SUFFIXES: dict[ScreenshotFormat, str] = {
+    "png": ".png",
+    "jpeg": ".jpg",
+    "webp": ".webp",
+}
+_HTML_SUFFIXES: dict[HtmlCompression, str] = {
+    "none": ".html",
+    "gzip": ".html.gz",
+    "zstd": ".html.zst",
+}
+
+
+@dataclass(frozen=True, slots=True)
+class ArtifactOptions:
+    """How screenshots and HTML are encoded on disk.
+
+    Attributes:
+        screenshot_format: PNG and JPEG come straight from Chromium;
+            WebP is re-encoded from PNG and needs Pillow.
+        screenshot_quality: Quality for JPEG and WebP, 0-100.
+        html_compression: zstd needs the ``zstandard`` package.
+    """
+
+    screenshot_format: ScreenshotFormat = "png"
+    screenshot_quality: int | None = None
+    html_compression: HtmlCompression = "none"
+
+
+@dataclass(frozen=True, slots=True)
+class _Job:
+    path: Path
+    payload: bytes
+    encode: Callable[[bytes], bytes] | None = None
+
+
+class ArtifactWriter:
+    """Write artifacts from a thread pool behind an async queue.
+
+    Use as an async context manager; leaving it waits for every queued
+    artifact to reach disk.
+
+    Args:
+        options: How screenshots and HTML are encoded.
+        workers: Threads encoding and writing artifacts.
+        max_pending_bytes: Cap on the bytes queued for writing.
+        store: Deduplicate artifacts into this store and link them
+            into place rather than writing each one out.
+    """
+
+    def __init__(
+        self,
+        options: ArtifactOptions | None = None,
+        *,
+        workers: int = ARTIFACT_WORKERS,
+        max_pending_bytes: int = ARTIFACT_MAX_PENDING_BYTES,
+        store: ArtifactStore | None = None,
+    ) -> None:
+        self.options = options or ArtifactOptions()
+        self.store = store
+        self.workers = workers
+        self.max_pending_bytes = max_pending_bytes
+        self.failures = 0
+        self._queue: asyncio.Queue[_Job] = asyncio.Queue()
+        self._pending_bytes = 0
+        self._room = asyncio.Condition()
+        self._executor: ThreadPoolExecutor | None = None
+        self._consumers: list[asyncio.Task[None]] = []
+        _check_dependencies(self.options)
+
+    async def write(
+        self,
+        path: Path,
+        payload: bytes,
+        encode: Callable[[bytes], bytes] | None = None,
+    ) -> None:
+        """Queue ``payload`` for ``path``, waiting for room if needed.
+
+        Args:
+            path: Destination; parent directories are created.
+            payload: The raw bytes.
+            encode: Optional transform run in the thread pool first.
+        """
+        size = len(payload)
+        async with self._room:
+            # A single oversized artifact is let through on its own.
+            await self._room.wait_for(
+                lambda: (
+                    self._pending_bytes == 0
+                    or self._pending_bytes + size <= self.max_pending_bytes
+                )
+            )
+            self._pending_bytes += size
+        await self._queue.put(_Job(path, payload, encode))
+
+    async def write_screenshot(
+        self,
+        stem: Path,
+        screenshot: bytes,
+        *,
+        screenshot_format: ScreenshotFormat | None = None,
+        quality: int | None = None,
+    ) -> Path:
+        """Queue a screenshot captured in the configured format.
+
+        WebP screenshots are expected as PNG and re-encoded off the
+        event loop.
+
+        Args:
+            stem: Destination without a suffix.
+            screenshot: The captured image.
+            screenshot_format: Overrides the configured format.
+            quality: Overrides the configured quality.
+
+        Returns:
+            The final path, with the format's suffix added to ``stem``.
+        """
+        fmt = screenshot_format or self.options.screenshot_format
+        path = stem.with_suffix(_SCREENSHOT_SUFFIXES[fmt])
+        encode = None
+        if fmt == "webp":
+            webp_quality = quality or self.options.screenshot_quality
+
+            def encode(png: bytes) -> bytes:
+                return encode_webp(png, webp_quality)
+
+        await self.write(path, screenshot, encode)
+        return path
+
+    async def write_thumbnail(
+        self,
+        stem: Path,
+        screenshot: bytes,
+        width: int,
+        *,
+        screenshot_format: ScreenshotFormat | None = None,
+        quality: int | None = None,
+    ) -> Path:
+        """Queue a copy of ``screenshot`` scaled down to ``width``.
+
+        Scaling runs off the event loop and needs Pillow.
+
+        Returns:
+            The final path, ``stem`` with ``.thumb`` and the format's
+            suffix added.
+        """
+        fmt = screenshot_format or self.options.screenshot_format
+        path = stem.with_name(stem.name + ".thumb" + _SCREENSHOT_SUFFIXES[fmt])
+        thumb_quality = quality or self.options.screenshot_quality
+
+        def encode(image: bytes) -> bytes:
+            return encode_thumbnail(image, width, fmt, thumb_quality)
+
+        await self.write(path, screenshot, encode)
+        return path
+
+    async def write_html(self, stem: Path, html: str) -> Path:
+        """Queue HTML, compressed as configured.
+
+        Returns:
+            The final path, with a suffix such as ``.html.gz``.
+        """
+        compression = self.options.html_compression
+        path = stem.with_suffix(_HTML_SUFFIXES[compression])
+        encode = _COMPRESSORS.get(compression)
+        await self.write(path, html.encode("utf-8"), encode)
+        return path
+
+    async def __aenter__(self) -> "ArtifactWriter":
+        """Start the writer threads."""
+        self._executor = ThreadPoolExecutor(
+            self.workers, thread_name_prefix="artifact-writer"
+        )
+        self._consumers = [
+            asyncio.create_task(self._consume()) for _ in range(self.workers)
+        ]
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Flush queued artifacts and stop the writer threads."""
+        await self._queue.join()
+        for consumer in self._consumers:
+            consumer.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        if self._executor:
+            self._executor.shutdown()
+
+    async def _consume(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            try:
+                await loop.run_in_executor(
+                    self._executor, _write, job, self.store
+                )
+            except Exception:
+                self.failures += 1
+                logger.exception("Failed to write %s", job.path)
+            finally:
+                async with self._room:
+                    self._pending_bytes -= len(job.payload)
+                    self._room.notify_all()
+                self._queue.task_done()
+
+
+def _write(job: _Job, store: ArtifactStore | None) -> None:
+    data = job.encode(job.payload) if job.encode else job.payload
+    if store is not None:
+        store.put(job.path, data)
+        return
+    job.path.parent.mkdir(parents=True, exist_ok=True)
+    # Replaced rather than truncated, in case the path links to a blob.
+    tmp = job.path.with_name(f".{job.path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        tmp.write_bytes(data)
+        tmp.replace(job.path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def encode_webp(png: bytes, quality: int | None = None) -> bytes:
+    """Re-encode a PNG screenshot as WebP."""
+    image_module = require("PIL.Image", package="Pillow", extra="imaging")
+    output = io.BytesIO()
+    with image_module.open(io.BytesIO(png)) as image:
+        image.save(output, "WEBP", quality=quality or 80)
+    return output.getvalue()
+
+
+def encode_thumbnail(
+    data: bytes,
+    width: int,
+    fmt: ScreenshotFormat = "png",
+    quality: int | None = None,
+) -> bytes:
+    """Scale a PNG or JPEG screenshot down to ``width`` pixels wide.
+
+    Images already narrower than ``width`` keep their size.
+    """
+    image_module = require("PIL.Image", package="Pillow", extra="imaging")
+    output = io.BytesIO()
+    with image_module.open(io.BytesIO(data)) as image:
+        image.thumbnail((width, image.height))
+        if fmt == "png":
+            image.save(output, "PNG")
+        else:
+            # JPEG has no alpha channel.
+            image.convert("RGB").save(
+                output, fmt.upper(), quality=quality or 80
+            )
+    return output.getvalue()
+
+
+def _zstd(data: bytes) -> bytes:
+    zstandard = require("zstandard", package="zstandard", extra="zstd")
+    compressed: bytes = zstandard.ZstdCompressor().compress(data)
+    return compressed
+
+
+_COMPRESSORS: dict[HtmlCompression, Callable[[bytes], bytes]] = {
+    # No timestamp in the header, so unchanged pages compress the same.
+    "gzip": partial(gzip.compress, mtime=0),
+    "zstd": _zstd,
+}
+
+
+def _check_dependencies(options: ArtifactOptions) -> None:
+    """Fail fast rather than on the first write."""
+    if options.screenshot_format == "webp":
+        require("PIL.Image", package="Pillow", extra="imaging")
+    if options.html_compression == "zstd":
+        require("zstandard", package="zstandard", extra="zstd")
@@ -0,0 +1,21 @@
+"""Exponential backoff with jitter between retries."""
+
+import random
+
+from undetectable_bot.utils.constants import RETRY_BACKOFF, RETRY_BACKOFF_MAX
+
+
+def backoff_delay(
+    attempt: int,
+    *,
+    base: float = RETRY_BACKOFF,
+    cap: float = RETRY_BACKOFF_MAX,
+) -> float:
+    """Seconds to wait before retry number ``attempt`` (from 1).
+
+    The delay doubles with every attempt up to ``cap``, and a random
+    half of it is dropped so that many failing jobs do not retry in
+    lockstep.
+    """
+    delay = min(cap, base * 2.0 ** max(attempt - 1, 0))
+    return delay * random.uniform(0.5, 1.0)  # noqa: S311
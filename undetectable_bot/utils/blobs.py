@@ -0,0 +1,58 @@
+"""Content-addressed blob storage on disk."""
+
+import hashlib
+import os
+import tempfile
+from collections.abc import Iterator
+from pathlib import Path
+
+
+class BlobStore:
+    """Immutable blobs named by the SHA-256 of their contents.
+
+    Writing the same bytes twice stores them once, and writes are
+    atomic so concurrent writers never expose a partial blob.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, digest: str) -> Path:
+        """Where the blob with ``digest`` lives on disk."""
+        return self.root / digest[:2] / digest
+
+    def __contains__(self, digest: str) -> bool:
+        return self.path(digest).exists()
+
+    def __iter__(self) -> Iterator[str]:
+        return (path.name for path in self.root.glob("??/*") if path.is_file())
+
+    def put(self, data: bytes) -> str:
+        """Store ``data`` once and return its digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if path.exists():
+            return digest
+        path.parent.mkdir(exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            Path(tmp).replace(path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        """Read a blob back."""
+        return self.path(digest).read_bytes()
+
+    def size(self, digest: str) -> int:
+        """Size of a blob in bytes."""
+        return self.path(digest).stat().st_size
+
+    def delete(self, digest: str) -> None:
+        """Remove a blob if it exists."""
+        self.path(digest).unlink(missing_ok=True)
@@ -0,0 +1,452 @@
+"""Declarative run configuration loaded from TOML.
+
+A config file replaces editing ``TEST_SERVICES`` and the constants to
+tune a run. It is parsed and validated once per path and the result
+cached, so nothing is re-read however many services a run covers::
+
+    [run]
+    concurrency = 8
+    timeout = 45
+    resource_profile = "no-media"
+
+    [run.readiness]
+    deadline = 8
+
+    [context]
+    viewport = { width = 1280, height = 720 }
+
+    [resource_profiles.no-ads]
+    blocked_patterns = ["*doubleclick.net/*"]
+
+    [services.bot_sannysoft]
+    url = "https://bot.sannysoft.com/"
+    resource_profile = "no-ads"
+    capture = { max_height = 4000, thumbnail_width = 480 }
+
+Service settings override the run's, and their ``readiness`` and
+``capture`` tables are merged key by key over the run's tables.
+"""
+
+import tomllib
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields, replace
+from functools import cache
+from pathlib import Path
+from typing import Any, Final, cast, get_args
+
+from undetectable_bot.browser.capture import (
+    DEFAULT_CAPTURE,
+    CaptureMode,
+    CaptureOptions,
+)
+from undetectable_bot.browser.readiness import (
+    DEFAULT_READINESS,
+    LoadState,
+    ReadinessStrategy,
+)
+from undetectable_bot.browser.resources import (
+    RESOURCE_PROFILES,
+    ResourceProfile,
+)
+from undetectable_bot.utils.artifacts import (
+    ArtifactOptions,
+    HtmlCompression,
+    ScreenshotFormat,
+)
+from undetectable_bot.utils.constants import (
+    ARGS,
+    CONTEXT_SETTINGS,
+    RETRY_ATTEMPTS,
+    RUN_CONCURRENCY,
+    RUN_TIMEOUT,
+    ColorScheme,
+    ContextSettings,
+)
+from undetectable_bot.utils.exceptions import (
+    ConfigError,
+    UnknownResourceProfileError,
+)
+
+# Settings restricted to a set of strings, wherever they appear.
+_CHOICES: Final[dict[str, tuple[str, ...]]] = {
+    "load_state": get_args(LoadState),
+    "mode": get_args(CaptureMode),
+    "screenshot_format": get_args(ScreenshotFormat),
+    "html_compression": get_args(HtmlCompression),
+    "color_scheme": get_args(ColorScheme),
+}
+
+# A capture clip is x, y, width and height.
+_CLIP_LENGTH: Final[int] = 4
+_MAX_QUALITY: Final[int] = 100
+
+_RUN_KEYS: Final[frozenset[str]] = frozenset(
+    {
+        "concurrency",
+        "timeout",
+        "retries",
+        "headless",
+        "args",
+        "resource_profile",
+        "readiness",
+        "capture",
+        "artifacts",
+    }
+)
+_SERVICE_KEYS: Final[frozenset[str]] = frozenset(
+    {"url", "timeout", "resource_profile", "readiness", "capture"}
+)
+_PROFILE_KEYS: Final[frozenset[str]] = frozenset(
+    {"blocked_types", "blocked_patterns"}
+)
+_TOP_KEYS: Final[frozenset[str]] = frozenset(
+    {"run", "context", "resource_profiles", "services"}
+)
+
+
+@dataclass(frozen=True, slots=True)
+class ServiceConfig:
+    """A detection service and how its page is loaded and captured.
+
+    Settings left as ``None`` fall back to the run's.
+    """
+
+    url: str
+    capture: CaptureOptions | None = None
+    readiness: ReadinessStrategy | None = None
+    timeout: float | None = None
+    resource_profile: ResourceProfile | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class RunConfig:
+    """Settings for a whole run and the services it covers.
+
+    Attributes:
+        concurrency: Services tested at once.
+        timeout: Seconds allowed for each service.
+        retries: Further attempts after a service first fails.
+        headless: Run Chromium without a window.
+        launch_args: Chromium command line switches.
+        resource_profile: Requests every context blocks.
+        readiness: When a page is complete enough to capture.
+        capture: What is captured from each page.
+        artifacts: How screenshots and HTML are encoded on disk.
+        context_settings: Options for every browser context.
+        services: The services to test, by name. Empty for the
+            built-in ``TEST_SERVICES``.
+    """
+
+    concurrency: int = RUN_CONCURRENCY
+    timeout: float = RUN_TIMEOUT
+    retries: int = RETRY_ATTEMPTS
+    headless: bool = True
+    launch_args: tuple[str, ...] = tuple(ARGS)
+    resource_profile: ResourceProfile = RESOURCE_PROFILES["full"]
+    readiness: ReadinessStrategy = DEFAULT_READINESS
+    capture: CaptureOptions = DEFAULT_CAPTURE
+    artifacts: ArtifactOptions = field(default_factory=ArtifactOptions)
+    context_settings: ContextSettings = field(
+        default_factory=lambda: CONTEXT_SETTINGS
+    )
+    services: Mapping[str, ServiceConfig] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        if self.concurrency < 1:
+            msg = "concurrency must be at least 1."
+            raise ValueError(msg)
+        if self.timeout <= 0:
+            msg = "timeout must be positive."
+            raise ValueError(msg)
+        if self.retries < 0:
+            msg = "retries must not be negative."
+            raise ValueError(msg)
+
+
+@cache
+def load_config(path: Path) -> RunConfig:
+    """Read and validate the config file at ``path``.
+
+    The result is cached, so later calls with the same path are free.
+
+    Raises:
+        ConfigError: If the file cannot be read or is invalid.
+    """
+    try:
+        with path.open("rb") as file:
+            data = tomllib.load(file)
+        return parse_config(data)
+    except (OSError, tomllib.TOMLDecodeError) as exc:
+        raise ConfigError(str(path), str(exc)) from None
+    except (TypeError, ValueError, UnknownResourceProfileError) as exc:
+        raise ConfigError(str(path), str(exc)) from None
+
+
+def parse_config(data: Mapping[str, Any]) -> RunConfig:
+    """Build a run configuration from parsed TOML.
+
+    Raises:
+        ValueError: If a setting is unknown or has the wrong type.
+        UnknownResourceProfileError: If a profile name is not defined.
+    """
+    _check_keys(data, _TOP_KEYS, "the top level")
+    profiles = dict(RESOURCE_PROFILES)
+    profile_tables = _table(data, "resource_profiles")
+    for name in profile_tables:
+        profiles[name] = _profile(_table(profile_tables, name), name)
+    run = _table(data, "run")
+    _check_keys(run, _RUN_KEYS, "[run]")
+    timeout = _number(run, "timeout")
+    config = RunConfig(
+        concurrency=_get(run, "concurrency", int, RUN_CONCURRENCY),
+        timeout=RUN_TIMEOUT if timeout is None else timeout,
+        retries=_get(run, "retries", int, RETRY_ATTEMPTS),
+        headless=_get(run, "headless", bool, default=True),
+        launch_args=_strings(run, "args", tuple(ARGS)),
+        resource_profile=_lookup(
+            profiles, _get(run, "resource_profile", str, "full")
+        ),
+        readiness=_merge(
+            DEFAULT_READINESS, _table(run, "readiness"), "[run.readiness]"
+        ),
+        capture=_merge(
+            DEFAULT_CAPTURE, _table(run, "capture"), "[run.capture]"
+        ),
+        artifacts=_merge(
+            ArtifactOptions(), _table(run, "artifacts"), "[run.artifacts]"
+        ),
+        context_settings=_context_settings(_table(data, "context")),
+    )
+    service_tables = _table(data, "services")
+    services = {
+        name: _service(config, profiles, _table(service_tables, name), name)
+        for name in service_tables
+    }
+    return replace(config, services=services)
+
+
+def _service(
+    config: RunConfig,
+    profiles: Mapping[str, ResourceProfile],
+    table: dict[str, Any],
+    name: str,
+) -> ServiceConfig:
+    where = f"[services.{name}]"
+    _check_keys(table, _SERVICE_KEYS, where)
+    url = _get(table, "url", str, None)
+    if url is None:
+        msg = f"{where} needs a url."
+        raise ValueError(msg)
+    profile = _get(table, "resource_profile", str, None)
+    service = ServiceConfig(
+        url,
+        timeout=_number(table, "timeout"),
+        resource_profile=(
+            None if profile is None else _lookup(profiles, profile)
+        ),
+    )
+    if "capture" in table:
+        capture = _table(table, "capture")
+        service = replace(
+            service,
+            capture=_merge(config.capture, capture, f"{where} capture"),
+        )
+    if "readiness" in table:
+        readiness = _table(table, "readiness")
+        service = replace(
+            service,
+            readiness=_merge(
+                config.readiness, readiness, f"{where} readiness"
+            ),
+        )
+    return service
+
+
+def _profile(table: dict[str, Any], name: str) -> ResourceProfile:
+    _check_keys(table, _PROFILE_KEYS, f"[resource_profiles.{name}]")
+    return ResourceProfile(
+        blocked_types=frozenset(_strings(table, "blocked_types", ())),
+        blocked_patterns=_strings(table, "blocked_patterns", ()),
+    )
+
+
+def _lookup(
+    profiles: Mapping[str, ResourceProfile], name: str
+) -> ResourceProfile:
+    try:
+        return profiles[name]
+    except KeyError:
+        raise UnknownResourceProfileError(name) from None
+
+
+def _context_settings(table: dict[str, Any]) -> ContextSettings:
+    _check_keys(table, ContextSettings.__required_keys__, "[context]")
+    with _located("[context]"):
+        for key in table:
+            _context_setting(table, key)
+    return cast("ContextSettings", {**CONTEXT_SETTINGS, **table})
+
+
+def _context_setting(table: Mapping[str, Any], key: str) -> None:
+    match key:
+        case "viewport":
+            viewport = _table(table, key)
+            _check_keys(viewport, frozenset({"width", "height"}), key)
+            for side in ("width", "height"):
+                if side not in viewport:
+                    msg = f"viewport needs a {side}."
+                    raise ValueError(msg)
+                _whole(viewport, side)
+        case "permissions":
+            _strings(table, key, ())
+        case "extra_http_headers":
+            headers = _table(table, key)
+            for name in headers:
+                _get(headers, name, str, None)
+        case "java_script_enabled" | "bypass_csp":
+            _get(table, key, bool, None)
+        case _:
+            _choice(table, key)
+            _get(table, key, str, None)
+
+
+def _merge[T: (ReadinessStrategy, CaptureOptions, ArtifactOptions)](
+    base: T, table: dict[str, Any], where: str
+) -> T:
+    """Override ``base`` with the settings in ``table``.
+
+    Raises:
+        TypeError: If a setting has the wrong type.
+        ValueError: If a setting is unknown or out of range.
+    """
+    _check_keys(
+        table, frozenset(f.name for f in fields(base) if f.init), where
+    )
+    with _located(where):
+        changes: dict[str, Any] = {key: _option(table, key) for key in table}
+        return replace(base, **changes)
+
+
+def _option(table: Mapping[str, Any], key: str) -> object:
+    """Check one option setting and convert it to the option's type."""
+    match key:
+        case "selector" | "predicate":
+            return _get(table, key, str, None)
+        case "quiet_window" | "deadline":
+            return _non_negative(table, key)
+        case "ignore_patterns":
+            return _strings(table, key, ())
+        case "clip":
+            return _clip(table, key)
+        case "max_height" | "thumbnail_width" | "screenshot_quality":
+            value = _whole(table, key)
+            if key == "screenshot_quality" and value > _MAX_QUALITY:
+                msg = f"{key} must be between 0 and {_MAX_QUALITY}."
+                raise ValueError(msg)
+            return value
+        case _:
+            return _choice(table, key)
+
+
+def _choice(table: Mapping[str, Any], key: str) -> str:
+    value = table[key]
+    choices = _CHOICES.get(key)
+    if choices is not None and value not in choices:
+        msg = f"{key} must be one of {', '.join(choices)}."
+        raise ValueError(msg)
+    return cast("str", value)
+
+
+def _clip(
+    table: Mapping[str, Any], key: str
+) -> tuple[float, float, float, float]:
+    value = table[key]
+    if not isinstance(value, list) or len(value) != _CLIP_LENGTH:
+        msg = f"{key} must be an array of x, y, width and height."
+        raise TypeError(msg)
+    x, y, width, height = (_non_negative({key: item}, key) for item in value)
+    return (x, y, width, height)
+
+
+@contextmanager
+def _located(where: str) -> Iterator[None]:
+    """Prefix errors raised in the block with the table they are in."""
+    try:
+        yield
+    except (TypeError, ValueError) as exc:
+        msg = f"{where} {exc}"
+        raise type(exc)(msg) from None
+
+
+def _table(data: Mapping[str, Any], key: str) -> dict[str, Any]:
+    value = data.get(key, {})
+    if not isinstance(value, dict):
+        msg = f"{key} must be a table."
+        raise TypeError(msg)
+    return value
+
+
+def _check_keys(
+    table: Mapping[str, Any], allowed: frozenset[str], where: str
+) -> None:
+    if unknown := sorted(table.keys() - allowed):
+        msg = f"unknown settings in {where}: {', '.join(unknown)}."
+        raise ValueError(msg)
+
+
+def _get[T](
+    table: Mapping[str, Any], key: str, kind: type[T], default: T
+) -> T:
+    value = table.get(key, default)
+    # bool is an int, but a flag is never a count.
+    if value is not default and (
+        not isinstance(value, kind)
+        or (kind is not bool and isinstance(value, bool))
+    ):
+        msg = f"{key} must be of type {kind.__name__}."
+        raise TypeError(msg)
+    return value
+
+
+def _number(table: Mapping[str, Any], key: str) -> float | None:
+    value = table.get(key)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int | float):
+        msg = f"{key} must be a number."
+        raise TypeError(msg)
+    return float(value)
+
+
+def _whole(table: Mapping[str, Any], key: str) -> int:
+    value = table[key]
+    if isinstance(value, bool) or not isinstance(value, int):
+        msg = f"{key} must be an integer."
+        raise TypeError(msg)
+    if value < 0:
+        msg = f"{key} must not be negative."
+        raise ValueError(msg)
+    return value
+
+
+def _non_negative(table: Mapping[str, Any], key: str) -> float:
+    value = _number(table, key)
+    if value is None or value < 0:
+        msg = f"{key} must be a non-negative number."
+        raise ValueError(msg)
+    return value
+
+
+def _strings(
+    table: Mapping[str, Any], key: str, default: tuple[str, ...]
+) -> tuple[str, ...]:
+    value = table.get(key)
+    if value is None:
+        return default
+    if not isinstance(value, list) or not all(
+        isinstance(item, str) for item in value
+    ):
+        msg = f"{key} must be an array of strings."
+        raise TypeError(msg)
+    return tuple(value)
@@ -1,8 +1,9 @@
 from collections.abc import Sequence
 from pathlib import Path
-from typing import Literal, TypedDict
+from typing import TYPE_CHECKING, Literal, TypedDict
 
-from playwright.sync_api import ViewportSize
+if TYPE_CHECKING:
+    from playwright.sync_api import ViewportSize
 
 USER_AGENT: str = (
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
@@ -29,7 +30,7 @@ ColorScheme = Literal["dark", "light", "no-preference", "null"]
 
 
 class ContextSettings(TypedDict):
-    viewport: ViewportSize
+    viewport: "ViewportSize"
     user_agent: str
     color_scheme: ColorScheme
     locale: str
@@ -76,3 +77,53 @@ ARGS = [
 ]
 
 STEALTH_JS_PATH: Path = Path(__file__).parent.parent / "js" / "stealth.js"
+PAGE_MODULES_DIR: Path = STEALTH_JS_PATH.parent / "pages"
+
+POOL_MIN_SIZE: int = 1
+POOL_MAX_SIZE: int = 4
+POOL_MAX_USES: int = 50
+
+SHARD_CONCURRENCY: int = 4
+
+RUN_CONCURRENCY: int = 4
+RUN_TIMEOUT: float = 60.0
+
+RESPONSE_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+RESPONSE_CACHE_TTL: float = 3600.0
+
+ARTIFACT_WORKERS: int = 2
+ARTIFACT_MAX_PENDING_BYTES: int = 64 * 1024 * 1024
+
+EXTRACT_READ_SIZE: int = 64 * 1024
+EXTRACT_BATCH_SIZE: int = 64 * 1024
+
+DIFF_THRESHOLD: int = 16
+DIFF_BLOCK_SIZE: int = 16
+DIFF_TILE_ROWS: int = 1024
+
+SERVER_HOST: str = "127.0.0.1"
+SERVER_PORT: int = 9222
+
+FETCH_TIMEOUT: float = 60.0
+
+GOVERNOR_INTERVAL: float = 5.0
+
+RETRY_ATTEMPTS: int = 3
+RETRY_BACKOFF: float = 1.0
+RETRY_BACKOFF_MAX: float = 30.0
+
+RELAUNCH_ATTEMPTS: int = 5
+JOB_RETRIES: int = 2
+
+READY_DEADLINE: float = 10.0
+READY_QUIET_WINDOW: float = 0.5
+READY_IGNORE_PATTERNS: tuple[str, ...] = (
+    "*google-analytics.com/*",
+    "*googletagmanager.com/*",
+    "*doubleclick.net/*",
+    "*facebook.com/tr*",
+    "*hotjar.com/*",
+    "*segment.io/*",
+    "*/beacon*",
+    "*/collect?*",
+)
@@ -0,0 +1,417 @@
+"""Change detection between the screenshots of two runs.
+
+Two captures are compared with NumPy a band of rows at a time. Pillow
+decodes a PNG whole, so the first capture is decoded, copied into a
+memory-mapped array on disk and released before the second is decoded
+and compared against it band by band: a very tall page has one decoded
+copy in memory at a time, and never a full-size difference.
+Each comparison reports the share of pixels that changed, boxes around
+the changed regions and the distance between perceptual hashes of the
+two images. Pages of different sizes are compared over their overlap,
+and the area only one of them covers counts as changed::
+
+    python -m undetectable_bot.utils.diffing --store store
+    python -m undetectable_bot.utils.diffing old/data data -o diff.json
+
+Decoding needs Pillow and NumPy, from the ``imaging`` extra.
+"""
+
+import argparse
+import json
+import logging
+import math
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+from collections import deque
+from collections.abc import Iterator, Mapping
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Final
+
+from undetectable_bot.utils.artifact_store import ArtifactStore
+from undetectable_bot.utils.constants import (
+    DIFF_BLOCK_SIZE,
+    DIFF_THRESHOLD,
+    DIFF_TILE_ROWS,
+)
+from undetectable_bot.utils.logging import configure_logging
+from undetectable_bot.utils.optional import require
+
+logger = logging.getLogger(__name__)
+
+SCREENSHOT_NAMES: Final[tuple[str, ...]] = (
+    "screenshot.png",
+    "screenshot.jpg",
+    "screenshot.webp",
+)
+
+# Bits in the difference hash: a 9x8 thumbnail compared column-wise.
+_HASH_SIZE: Final[int] = 8
+
+type Box = tuple[int, int, int, int]
+
+
+@dataclass(frozen=True, slots=True)
+class ScreenshotDiff:
+    """How much one capture differs from another.
+
+    Attributes:
+        changed_pixels: Pixels that differ by more than the threshold,
+            plus those only one capture covers.
+        total_pixels: Pixels in the area both captures span together.
+        boxes: ``(x, y, width, height)`` of each changed region.
+        hash_distance: Differing bits of the two perceptual hashes,
+            0 for images that look the same at thumbnail size.
+        before_size: ``(width, height)`` of the first capture.
+        after_size: ``(width, height)`` of the second capture.
+    """
+
+    changed_pixels: int
+    total_pixels: int
+    boxes: tuple[Box, ...]
+    hash_distance: int
+    before_size: tuple[int, int]
+    after_size: tuple[int, int]
+
+    @property
+    def changed_ratio(self) -> float:
+        """Share of ``total_pixels`` that changed, from 0 to 1."""
+        return (
+            self.changed_pixels / self.total_pixels
+            if self.total_pixels
+            else 0.0
+        )
+
+    @property
+    def changed(self) -> bool:
+        """Whether any pixel changed."""
+        return self.changed_pixels > 0
+
+
+@dataclass(frozen=True, slots=True)
+class DiffResult:
+    """The comparison of one service's screenshots across two runs."""
+
+    service: str
+    before: str
+    after: str
+    diff: ScreenshotDiff | None = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether both screenshots could be compared."""
+        return self.error is None
+
+
+def perceptual_hash(image: Any) -> int:  # noqa: ANN401
+    """A 64-bit difference hash of a Pillow image.
+
+    The image is shrunk to 9x8 grey pixels and each bit records
+    whether a pixel is brighter than its right neighbour, so similar
+    looking images get hashes a few bits apart.
+    """
+    pil = require("PIL.Image", package="Pillow", extra="imaging")
+    np = require("numpy", package="numpy", extra="imaging")
+    small = image.convert("L").resize(
+        (_HASH_SIZE + 1, _HASH_SIZE), pil.Resampling.BOX
+    )
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int(sum(1 << index for index, bit in enumerate(bits) if bit))
+
+
+def _band(
+    image: Any,  # noqa: ANN401
+    top: int,
+    bottom: int,
+    width: int,
+) -> Any:  # noqa: ANN401
+    np = require("numpy", package="numpy", extra="imaging")
+    region = image.crop((0, top, width, bottom)).convert("RGB")
+    return np.asarray(region, dtype=np.uint8)
+
+
+def _to_memmap(image: Any, path: Path, tile_rows: int) -> Any:  # noqa: ANN401
+    """Copy a decoded image to an RGB array on disk, band by band."""
+    np = require("numpy", package="numpy", extra="imaging")
+    width, height = image.size
+    pixels = np.lib.format.open_memmap(
+        path, mode="w+", dtype=np.uint8, shape=(height, width, 3)
+    )
+    for top in range(0, height, tile_rows):
+        bottom = min(top + tile_rows, height)
+        pixels[top:bottom] = _band(image, top, bottom, width)
+    pixels.flush()
+    return pixels
+
+
+def _block_mask(mask: Any, block: int) -> Any:  # noqa: ANN401
+    """Reduce a pixel mask to blocks holding any changed pixel."""
+    np = require("numpy", package="numpy", extra="imaging")
+    rows, cols = mask.shape
+    padded = np.zeros(
+        (math.ceil(rows / block) * block, math.ceil(cols / block) * block),
+        dtype=bool,
+    )
+    padded[:rows, :cols] = mask
+    return padded.reshape(
+        padded.shape[0] // block, block, padded.shape[1] // block, block
+    ).any(axis=(1, 3))
+
+
+def _boxes(
+    grid: Any,  # noqa: ANN401
+    block: int,
+    width: int,
+    height: int,
+) -> list[Box]:
+    """Bounding boxes of the 8-connected changed regions of ``grid``."""
+    np = require("numpy", package="numpy", extra="imaging")
+    remaining = {(int(r), int(c)) for r, c in np.argwhere(grid)}
+    boxes = []
+    while remaining:
+        queue = deque([remaining.pop()])
+        top, left = bottom, right = queue[0]
+        while queue:
+            row, col = queue.popleft()
+            top, bottom = min(top, row), max(bottom, row)
+            left, right = min(left, col), max(right, col)
+            for dr in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    cell = (row + dr, col + dc)
+                    if cell in remaining:
+                        remaining.remove(cell)
+                        queue.append(cell)
+        x, y = left * block, top * block
+        boxes.append(
+            (
+                x,
+                y,
+                min((right + 1) * block, width) - x,
+                min((bottom + 1) * block, height) - y,
+            )
+        )
+    return sorted(boxes, key=lambda box: (box[1], box[0]))
+
+
+def diff_screenshots(
+    before: Path,
+    after: Path,
+    *,
+    threshold: int = DIFF_THRESHOLD,
+    block: int = DIFF_BLOCK_SIZE,
+    tile_rows: int = DIFF_TILE_ROWS,
+) -> ScreenshotDiff:
+    """Compare two captures of a page.
+
+    Args:
+        before: The earlier screenshot.
+        after: The later screenshot.
+        threshold: Largest per-channel difference, 0-255, still counted
+            as unchanged. Keeps compression and canvas noise out.
+        block: Size in pixels of the cells changed regions are made of;
+            changes less than a cell apart share a box.
+        tile_rows: Rows compared at once. Rounded up to whole blocks.
+
+    Raises:
+        OSError: If a screenshot cannot be read or decoded.
+    """
+    if block < 1 or tile_rows < 1:
+        msg = "block and tile_rows must be at least 1."
+        raise ValueError(msg)
+    pil: Any = require("PIL.Image", package="Pillow", extra="imaging")
+    # Full-page captures of tall pages exceed Pillow's decompression
+    # bomb limit, which guards against untrusted images, not our own.
+    limit, pil.MAX_IMAGE_PIXELS = pil.MAX_IMAGE_PIXELS, None
+    try:
+        return _diff(before, after, threshold, block, tile_rows)
+    finally:
+        pil.MAX_IMAGE_PIXELS = limit
+
+
+def _diff(
+    before: Path, after: Path, threshold: int, block: int, tile_rows: int
+) -> ScreenshotDiff:
+    pil = require("PIL.Image", package="Pillow", extra="imaging")
+    np = require("numpy", package="numpy", extra="imaging")
+    tile_rows = math.ceil(tile_rows / block) * block
+    with tempfile.TemporaryDirectory(prefix="diff-") as scratch:
+        with pil.open(before) as image:
+            before_size = image.size
+            before_hash = perceptual_hash(image)
+            reference = _to_memmap(
+                image, Path(scratch) / "before.npy", tile_rows
+            )
+        with pil.open(after) as image:
+            after_size = image.size
+            after_hash = perceptual_hash(image)
+            width = max(before_size[0], after_size[0])
+            height = max(before_size[1], after_size[1])
+            common_width = min(before_size[0], after_size[0])
+            common_height = min(before_size[1], after_size[1])
+            grid = np.zeros(
+                (math.ceil(height / block), math.ceil(width / block)),
+                dtype=bool,
+            )
+            changed = width * height - common_width * common_height
+            for top in range(0, common_height, tile_rows):
+                bottom = min(top + tile_rows, common_height)
+                old = reference[top:bottom, :common_width].astype(np.int16)
+                new = _band(image, top, bottom, common_width).astype(np.int16)
+                mask = (np.abs(old - new) > threshold).any(axis=2)
+                changed += int(np.count_nonzero(mask))
+                cells = _block_mask(mask, block)
+                first = top // block
+                grid[first : first + cells.shape[0], : cells.shape[1]] |= cells
+        del reference
+    # Area only one capture covers.
+    if common_height < height:
+        grid[common_height // block :, :] = True
+    if common_width < width:
+        grid[:, common_width // block :] = True
+    return ScreenshotDiff(
+        changed_pixels=changed,
+        total_pixels=width * height,
+        boxes=tuple(_boxes(grid, block, width, height)),
+        hash_distance=(before_hash ^ after_hash).bit_count(),
+        before_size=before_size,
+        after_size=after_size,
+    )
+
+
+def _diff_one(job: tuple[str, Path, Path]) -> DiffResult:
+    service, before, after = job
+    try:
+        diff = diff_screenshots(before, after)
+    except OSError as exc:
+        return DiffResult(service, str(before), str(after), error=str(exc))
+    return DiffResult(service, str(before), str(after), diff)
+
+
+def find_screenshots(root: Path) -> dict[str, Path]:
+    """Full screenshots under ``root`` by service directory name."""
+    return {
+        path.parent.relative_to(root).as_posix(): path
+        for path in sorted(root.rglob("screenshot.*"))
+        if path.name in SCREENSHOT_NAMES
+    }
+
+
+def pair_directories(
+    before: Path, after: Path
+) -> dict[str, tuple[Path, Path]]:
+    """Screenshots of the services both run directories captured."""
+    old, new = find_screenshots(before), find_screenshots(after)
+    return {
+        service: (old[service], new[service])
+        for service in old.keys() & new.keys()
+    }
+
+
+def pair_store_runs(store: ArtifactStore) -> dict[str, tuple[Path, Path]]:
+    """Screenshots of the services the last two stored runs captured.
+
+    Raises:
+        ValueError: If the store holds fewer than two runs.
+    """
+    runs = store.runs()
+    if len(runs) < 2:  # noqa: PLR2004
+        msg = "the store needs two runs to compare."
+        raise ValueError(msg)
+
+    def screenshots(artifacts: Mapping[str, str]) -> dict[str, Path]:
+        return {
+            Path(path).parent.name: store.blobs.path(digest)
+            for path, digest in artifacts.items()
+            if Path(path).name in SCREENSHOT_NAMES
+        }
+
+    old, new = screenshots(runs[-2].artifacts), screenshots(runs[-1].artifacts)
+    return {
+        service: (old[service], new[service])
+        for service in old.keys() & new.keys()
+    }
+
+
+def diff_many(
+    pairs: Mapping[str, tuple[Path, Path]], *, workers: int | None = None
+) -> Iterator[DiffResult]:
+    """Compare many pairs of screenshots across a process pool.
+
+    Results are yielded in service order. Each worker holds one decoded
+    image at a time, so memory grows with ``workers``.
+    """
+    workers = workers or os.process_cpu_count() or 1
+    jobs = [(service, *pairs[service]) for service in sorted(pairs)]
+    with ProcessPoolExecutor(
+        workers, mp_context=mp.get_context("spawn")
+    ) as pool:
+        yield from pool.map(_diff_one, jobs)
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments for screenshot diffing."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "before", type=Path, nargs="?", help="earlier run directory"
+    )
+    parser.add_argument(
+        "after", type=Path, nargs="?", help="later run directory"
+    )
+    parser.add_argument(
+        "--store",
+        type=Path,
+        metavar="DIR",
+        help="compare the last two runs in this artifact store instead",
+    )
+    parser.add_argument(
+        "-o", "--output", type=Path, help="write the report as JSON"
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, help="processes, default one per core"
+    )
+    args = parser.parse_args()
+    if args.store is None and (args.before is None or args.after is None):
+        parser.error("give two run directories or --store")
+    return args
+
+
+def main() -> None:
+    """Compare two runs and report the services that changed."""
+    configure_logging()
+    args = parse_args()
+    require("PIL.Image", package="Pillow", extra="imaging")
+    require("numpy", package="numpy", extra="imaging")
+    pairs = (
+        pair_store_runs(ArtifactStore(args.store))
+        if args.store
+        else pair_directories(args.before, args.after)
+    )
+    report = {}
+    for result in diff_many(pairs, workers=args.workers):
+        entry: dict[str, Any] = asdict(result)
+        if result.diff is not None:
+            entry["diff"]["changed_ratio"] = result.diff.changed_ratio
+            logger.info(
+                "%s: %.2f%% changed in %d regions, hash distance %d",
+                result.service,
+                result.diff.changed_ratio * 100,
+                len(result.diff.boxes),
+                result.diff.hash_distance,
+            )
+        else:
+            logger.error("%s: %s", result.service, result.error)
+        report[result.service] = entry
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
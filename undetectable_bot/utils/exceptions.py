@@ -12,3 +12,59 @@ class BrowserNotInitializedError(StealthBrowserError):
         super().__init__(
             "Browser not initialized. Use StealthBrowser as a context manager."
         )
+
+
+class ContextPoolClosedError(StealthBrowserError):
+    """Raised when checking out a context from a closed pool."""
+
+    def __init__(self) -> None:
+        super().__init__("Context pool is closed.")
+
+
+class ShardWorkerError(StealthBrowserError):
+    """Raised when shard workers exit before finishing their jobs."""
+
+    def __init__(self, missing: int) -> None:
+        super().__init__(
+            f"All shard workers exited with {missing} jobs unfinished."
+        )
+
+
+class UnknownResourceProfileError(StealthBrowserError):
+    """Raised when a resource profile name is not registered."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(f"Unknown resource profile: {name!r}.")
+
+
+class MissingDependencyError(StealthBrowserError):
+    """Raised when an optional feature's package is not installed."""
+
+    def __init__(self, package: str, extra: str) -> None:
+        super().__init__(
+            f"{package} is required for this feature. Install it with "
+            f"'pip install undetectable-bot[{extra}]'."
+        )
+
+
+class BrowserRelaunchError(StealthBrowserError):
+    """Raised when a lost browser cannot be brought back."""
+
+    def __init__(self, attempts: int) -> None:
+        super().__init__(
+            f"Browser could not be relaunched after {attempts} attempts."
+        )
+
+
+class ConfigError(StealthBrowserError):
+    """Raised when a run configuration file is invalid."""
+
+    def __init__(self, path: str, problem: str) -> None:
+        super().__init__(f"Invalid config {path}: {problem}")
+
+
+class NetworkArchiveNotFoundError(StealthBrowserError):
+    """Raised when replaying a directory with no recorded archives."""
+
+    def __init__(self, directory: str) -> None:
+        super().__init__(f"No recorded network archives in {directory}.")
@@ -0,0 +1,307 @@
+"""Offline extraction of test results from archived HTML.
+
+Scoring saved snapshots used to mean loading each one back into
+Chromium to run the results-table query. Here the same row logic runs
+on a streaming ``html.parser`` instead, across a process pool, and the
+results of the whole archive land in one file::
+
+    python -m undetectable_bot.utils.extraction data -o results.parquet
+
+Snapshots are the ``index.html`` files (plain, gzip or zstd) under the
+archive directory, named after the service directory they sit in.
+Output is JSONL with one line per snapshot, or a long-format Parquet
+table with one row per test when the output ends in ``.parquet``.
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import multiprocessing as mp
+import os
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Final, TextIO
+
+from undetectable_bot.utils.constants import (
+    EXTRACT_BATCH_SIZE,
+    EXTRACT_READ_SIZE,
+)
+from undetectable_bot.utils.logging import configure_logging
+from undetectable_bot.utils.optional import require
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_NAMES: Final[tuple[str, ...]] = (
+    "index.html",
+    "index.html.gz",
+    "index.html.zst",
+)
+
+_CELL_TAGS: Final[frozenset[str]] = frozenset({"td", "th"})
+
+
+@dataclass(slots=True)
+class _Cell:
+    tag: str
+    text: list[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class _Row:
+    index: int
+    cells: list[_Cell] = field(default_factory=list)
+
+
+class ResultTableParser(HTMLParser):
+    """Collect test results from table rows, as the live query does.
+
+    For every ``tr``, the text of a ``td`` that is its first cell
+    becomes a test name and that of a ``td`` that is its last cell the
+    result. Rows missing either are skipped, and when names repeat the
+    row that starts last in the document wins.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self._rows: list[_Row] = []
+        self._cells: list[_Cell] = []
+        self._found: list[tuple[int, str, str]] = []
+        self._started = 0
+
+    @property
+    def results(self) -> dict[str, str]:
+        """Test names and results found so far, in document order."""
+        return {name: result for _, name, result in sorted(self._found)}
+
+    def handle_starttag(
+        self, tag: str, attrs: list[tuple[str, str | None]]
+    ) -> None:
+        """Open a row or a cell of the innermost open row."""
+        del attrs
+        if tag == "tr":
+            self._rows.append(_Row(self._started))
+            self._started += 1
+        elif tag in _CELL_TAGS and self._rows:
+            row = self._rows[-1]
+            # A cell starting in a row ends the one left open there.
+            self._end_cells(row)
+            cell = _Cell(tag)
+            row.cells.append(cell)
+            self._cells.append(cell)
+
+    def handle_endtag(self, tag: str) -> None:
+        """Close a cell, or a row and record its result."""
+        if tag in _CELL_TAGS and self._cells:
+            self._cells.pop()
+        elif tag == "tr" and self._rows:
+            row = self._rows.pop()
+            # Cells left open by sloppy markup end with their row.
+            self._end_cells(row)
+            self._record(row)
+
+    def handle_data(self, data: str) -> None:
+        """Add text to every open cell, like ``textContent``."""
+        for cell in self._cells:
+            cell.text.append(data)
+
+    def _end_cells(self, row: _Row) -> None:
+        self._cells = [
+            cell
+            for cell in self._cells
+            if not any(cell is own for own in row.cells)
+        ]
+
+    def _record(self, row: _Row) -> None:
+        if not row.cells:
+            return
+        first, last = row.cells[0], row.cells[-1]
+        if first.tag != "td" or last.tag != "td":
+            return
+        name = "".join(first.text).strip()
+        result = "".join(last.text).strip()
+        if name and result:
+            self._found.append((row.index, name, result))
+
+
+@dataclass(frozen=True, slots=True)
+class SnapshotResults:
+    """Results extracted from one archived snapshot."""
+
+    service: str
+    path: str
+    results: dict[str, str] = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the snapshot could be read."""
+        return self.error is None
+
+
+def _open_snapshot(path: Path) -> TextIO:
+    # Invalid bytes are replaced, as a browser would render them.
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    if path.suffix == ".zst":
+        zstandard = require("zstandard", package="zstandard", extra="zstd")
+        text: TextIO = zstandard.open(
+            path, "rt", encoding="utf-8", errors="replace"
+        )
+        return text
+    return path.open(encoding="utf-8", errors="replace")
+
+
+def parse_results(path: Path) -> dict[str, str]:
+    """Extract the results table of one snapshot, reading it in chunks.
+
+    Raises:
+        OSError: If the file cannot be read or decompressed.
+    """
+    parser = ResultTableParser()
+    with _open_snapshot(path) as text:
+        while chunk := text.read(EXTRACT_READ_SIZE):
+            parser.feed(chunk)
+    parser.close()
+    return parser.results
+
+
+def extract_snapshot(path: Path, root: Path) -> SnapshotResults:
+    """Extract one snapshot; read errors are recorded, not raised."""
+    service = path.parent.name
+    relative = path.relative_to(root).as_posix()
+    try:
+        return SnapshotResults(service, relative, parse_results(path))
+    except (OSError, EOFError) as exc:
+        return SnapshotResults(service, relative, error=str(exc))
+
+
+def _extract_one(job: tuple[Path, Path]) -> SnapshotResults:
+    return extract_snapshot(*job)
+
+
+def find_snapshots(root: Path) -> list[Path]:
+    """Every archived snapshot under ``root``, in path order."""
+    return sorted(
+        path
+        for path in root.rglob("index.html*")
+        if path.name in SNAPSHOT_NAMES and path.is_file()
+    )
+
+
+def extract_archive(
+    root: Path, *, workers: int | None = None
+) -> Iterator[SnapshotResults]:
+    """Extract every snapshot under ``root`` across a process pool.
+
+    Results are yielded in path order as the workers produce them.
+    """
+    snapshots = find_snapshots(root)
+    workers = workers or os.process_cpu_count() or 1
+    # Several snapshots per task keep pickling overhead down.
+    chunksize = max(1, len(snapshots) // (workers * 4))
+    with ProcessPoolExecutor(
+        workers, mp_context=mp.get_context("spawn")
+    ) as pool:
+        yield from pool.map(
+            _extract_one,
+            ((path, root) for path in snapshots),
+            chunksize=chunksize,
+        )
+
+
+def write_jsonl(records: Iterable[SnapshotResults], output: Path) -> int:
+    """Write one compact JSON line per snapshot.
+
+    Returns:
+        The number of snapshots written.
+    """
+    count = 0
+    with output.open("w", encoding="utf-8") as file:
+        for record in records:
+            file.write(json.dumps(asdict(record), separators=(",", ":")))
+            file.write("\n")
+            count += 1
+    return count
+
+
+def write_parquet(records: Iterable[SnapshotResults], output: Path) -> int:
+    """Write a long table with one row per snapshot and test.
+
+    Snapshots that could not be read get one row with their error and
+    no test. Rows are written in batches, so memory stays flat.
+
+    Returns:
+        The number of snapshots written.
+    """
+    pa = require("pyarrow", package="pyarrow", extra="arrow")
+    pq = require("pyarrow.parquet", package="pyarrow", extra="arrow")
+    schema = pa.schema(
+        [
+            (name, pa.string())
+            for name in ("service", "path", "test", "result", "error")
+        ]
+    )
+    columns: dict[str, list[Any]] = {name: [] for name in schema.names}
+    count = 0
+
+    def flush(writer: Any) -> None:  # noqa: ANN401
+        writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+        for values in columns.values():
+            values.clear()
+
+    with pq.ParquetWriter(output, schema) as writer:
+        for record in records:
+            rows = record.results.items() or [(None, None)]
+            for test, result in rows:
+                columns["service"].append(record.service)
+                columns["path"].append(record.path)
+                columns["test"].append(test)
+                columns["result"].append(result)
+                columns["error"].append(record.error)
+            count += 1
+            if len(columns["path"]) >= EXTRACT_BATCH_SIZE:
+                flush(writer)
+        if columns["path"]:
+            flush(writer)
+    return count
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments for offline extraction."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "root",
+        type=Path,
+        nargs="?",
+        default=Path("data"),
+        help="archive directory, default %(default)s",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=Path("results.jsonl"),
+        help="JSONL file, or Parquet if it ends in .parquet",
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, help="processes, default one per core"
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    """Extract an archive into a single results file."""
+    configure_logging()
+    args = parse_args()
+    records = extract_archive(args.root, workers=args.workers)
+    write = write_parquet if args.output.suffix == ".parquet" else write_jsonl
+    count = write(records, args.output)
+    logger.info("Extracted %d snapshots into %s", count, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,148 @@
-"""Centralized logging configuration for undetectable bot."""
+"""Centralized logging configuration for undetectable bot.
 
+Nothing is configured on import; applications call
+``configure_logging()`` once at startup. In structured mode records are
+queued by the calling thread and rendered as JSON and written by a
+background listener, so the event loop never blocks on log I/O.
+"""
+
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import queue
+import random
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import UTC, datetime
+
+JOB_ID: ContextVar[str | None] = ContextVar("job_id", default=None)
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+@contextmanager
+def job_context(job_id: str) -> Iterator[None]:
+    """Tag every record logged inside the block with ``job_id``.
+
+    Each asyncio task has its own copy of the context, so concurrent
+    jobs keep their own ids.
+    """
+    token = JOB_ID.set(job_id)
+    try:
+        yield
+    finally:
+        JOB_ID.reset(token)
 
 
-def configure_logging(level: int = logging.INFO) -> None:
+class CorrelationFilter(logging.Filter):
+    """Copy the current job id onto each record as ``job_id``."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Attach the id; never drops a record."""
+        record.job_id = JOB_ID.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of records at high-volume levels.
+
+    Args:
+        rates: Fraction of records to keep, by level. Records at levels
+            without a rate are always kept.
+    """
+
+    def __init__(self, rates: Mapping[int, float]) -> None:
+        super().__init__()
+        self.rates = dict(rates)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Whether to keep ``record``."""
+        rate = self.rates.get(record.levelno)
+        return rate is None or random.random() < rate  # noqa: S311
+
+
+class JsonFormatter(logging.Formatter):
+    """Render records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Serialize the record's fields, message and job id."""
+        entry = {
+            "time": datetime.fromtimestamp(record.created, UTC).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        job_id = getattr(record, "job_id", None)
+        if job_id is not None:
+            entry["job_id"] = job_id
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Interpolate now, while the arguments are still current, and
+        # leave tracebacks and JSON to the listener. The queue stays in
+        # this process, so exc_info need not be pickled away.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def configure_logging(
+    level: int = logging.INFO,
+    *,
+    structured: bool = False,
+    sample_rates: Mapping[int, float] | None = None,
+) -> None:
     """Configure logging for the entire application.
 
     Args:
         level: The logging level to use. Defaults to INFO.
+        structured: Emit JSON lines from a background thread instead of
+            plain text from the logging thread.
+        sample_rates: Fraction of records kept per level, e.g.
+            ``{logging.DEBUG: 0.01}`` for high-volume debug events.
     """
-    logging.basicConfig(
-        level=level,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
+    global _listener  # noqa: PLW0603
+    stop_logging()
+    # Sampled records are dropped before any other work is done.
+    filters: list[logging.Filter] = []
+    if sample_rates:
+        filters.append(SamplingFilter(sample_rates))
+    filters.append(CorrelationFilter())
+
+    if structured:
+        stream = logging.StreamHandler()
+        stream.setFormatter(JsonFormatter())
+        records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        handler: logging.Handler = _QueueHandler(records)
+        _listener = logging.handlers.QueueListener(records, stream)
+        _listener.start()
+        atexit.register(stop_logging)
+    else:
+        handler = logging.StreamHandler()
+        handler.setFormatter(
+            logging.Formatter(
+                "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+                datefmt="%Y-%m-%d %H:%M:%S",
+            )
+        )
+    for log_filter in filters:
+        handler.addFilter(log_filter)
+    logging.basicConfig(level=level, handlers=[handler], force=True)
+
+
+def stop_logging() -> None:
+    """Flush and stop the structured listener, if one is running."""
+    global _listener  # noqa: PLW0603
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
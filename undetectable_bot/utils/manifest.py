@@ -0,0 +1,138 @@
+"""Durable record of finished jobs, so long runs can resume.
+
+Every finished attempt is appended to a JSONL file and flushed to disk
+before the run moves on. A resumed run reads the file back, skips jobs
+that completed and whose artifacts still exist, and retries the rest.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from types import TracebackType
+from typing import Literal
+
+logger = logging.getLogger(__name__)
+
+JobStatus = Literal["ok", "failed"]
+
+
+@dataclass(frozen=True, slots=True)
+class ManifestEntry:
+    """One finished attempt at a job."""
+
+    job_id: str
+    url: str
+    status: JobStatus
+    attempt: int = 1
+    artifacts: tuple[str, ...] = ()
+    timings: dict[str, float] = field(default_factory=dict)
+    error: str | None = None
+    finished_at: float = field(default_factory=time.time)
+
+    @property
+    def ok(self) -> bool:
+        """Whether the attempt succeeded."""
+        return self.status == "ok"
+
+    def to_json(self) -> str:
+        """Serialize as a single JSON line."""
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, line: str) -> "ManifestEntry":
+        """Parse a line written by ``to_json``."""
+        data = json.loads(line)
+        data["artifacts"] = tuple(data.get("artifacts", ()))
+        return cls(**data)
+
+
+class RunManifest:
+    """An append-only JSONL index of job attempts.
+
+    The latest attempt of each job wins. Lines are flushed and synced
+    as they are written, and a line torn by a crash is ignored when the
+    file is read back.
+    """
+
+    def __init__(self, path: Path, *, resume: bool = False) -> None:
+        """Open the manifest at ``path``.
+
+        Args:
+            path: The JSONL file.
+            resume: Keep the entries of a previous run instead of
+                starting an empty manifest.
+        """
+        self.path = path
+        self.entries: dict[str, ManifestEntry] = {}
+        torn = resume and path.exists() and self._load()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = path.open("a" if resume else "w", encoding="utf-8")
+        if torn:
+            # Keep the next entry off the partial line.
+            self._file.write("\n")
+        self._lock = threading.Lock()
+
+    def _load(self) -> bool:
+        """Read existing entries and report a torn last line."""
+        text = self.path.read_text(encoding="utf-8")
+        for number, line in enumerate(text.splitlines(), 1):
+            try:
+                entry = ManifestEntry.from_json(line)
+            except (ValueError, TypeError):
+                logger.warning(
+                    "Skipping unreadable line %d of %s", number, self.path
+                )
+                continue
+            self.entries[entry.job_id] = entry
+        return bool(text) and not text.endswith("\n")
+
+    def record(self, entry: ManifestEntry) -> None:
+        """Append ``entry`` and make it durable before returning."""
+        with self._lock:
+            self._file.write(entry.to_json() + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.entries[entry.job_id] = entry
+
+    def get(self, job_id: str) -> ManifestEntry | None:
+        """The latest attempt at ``job_id``, if any."""
+        return self.entries.get(job_id)
+
+    def attempts(self, job_id: str) -> int:
+        """How many times ``job_id`` has been attempted so far."""
+        entry = self.entries.get(job_id)
+        return entry.attempt if entry else 0
+
+    def done(self, job_id: str) -> bool:
+        """Whether ``job_id`` succeeded and its artifacts are on disk.
+
+        Artifacts are checked because they may be written after the
+        entry, and a crash in between leaves the job incomplete.
+        """
+        entry = self.entries.get(job_id)
+        return (
+            entry is not None
+            and entry.ok
+            and all(Path(path).exists() for path in entry.artifacts)
+        )
+
+    def close(self) -> None:
+        """Close the underlying file."""
+        self._file.close()
+
+    def __enter__(self) -> "RunManifest":
+        """Return the open manifest."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the manifest."""
+        self.close()
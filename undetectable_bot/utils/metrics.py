@@ -0,0 +1,148 @@
+"""Per-phase latency instrumentation.
+
+Phases such as browser launch, context creation, navigation and capture
+are timed with ``Metrics.span()``. Every sample is passed to registered
+hooks and aggregated into a histogram. Histograms can be exported as
+JSON or in the Prometheus text format.
+"""
+
+import json
+import math
+import random
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+type TimingHook = Callable[[str, float], None]
+
+QUANTILES: tuple[float, ...] = (0.5, 0.95, 0.99)
+_RESERVOIR_SIZE = 10_000
+
+
+class Histogram:
+    """Latency samples for a single phase.
+
+    Exact counts and sums are kept for every sample. Percentiles come
+    from a bounded uniform reservoir, so memory stays flat on long runs.
+    """
+
+    def __init__(self, reservoir_size: int = _RESERVOIR_SIZE) -> None:
+        self.reservoir_size = reservoir_size
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self._samples: list[float] = []
+
+    def observe(self, seconds: float) -> None:
+        """Record one sample."""
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        if len(self._samples) < self.reservoir_size:
+            self._samples.append(seconds)
+        else:
+            slot = random.randrange(self.count)  # noqa: S311
+            if slot < self.reservoir_size:
+                self._samples[slot] = seconds
+
+    def percentile(self, quantile: float) -> float:
+        """The sample at ``quantile`` (0-1), by nearest rank."""
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        rank = max(math.ceil(quantile * len(ordered)) - 1, 0)
+        return ordered[rank]
+
+    def summary(self) -> dict[str, float]:
+        """Count, sum, extremes and percentiles of the samples."""
+        summary = {
+            "count": self.count,
+            "sum": self.total,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+        }
+        for quantile in QUANTILES:
+            summary[f"p{round(quantile * 100)}"] = self.percentile(quantile)
+        return summary
+
+
+class Metrics:
+    """A registry of phase timings with pluggable hooks."""
+
+    def __init__(self) -> None:
+        self.histograms: dict[str, Histogram] = {}
+        self.hooks: list[TimingHook] = []
+
+    def add_hook(self, hook: TimingHook) -> None:
+        """Call ``hook(phase, seconds)`` for every recorded sample."""
+        self.hooks.append(hook)
+
+    def observe(self, phase: str, seconds: float) -> None:
+        """Record how long ``phase`` took."""
+        histogram = self.histograms.get(phase)
+        if histogram is None:
+            histogram = self.histograms[phase] = Histogram()
+        histogram.observe(seconds)
+        for hook in self.hooks:
+            hook(phase, seconds)
+
+    @contextmanager
+    def span(self, phase: str) -> Iterator[None]:
+        """Time the enclosed block as one sample of ``phase``.
+
+        Works around awaited calls too, e.g.
+        ``with metrics.span("goto"): await page.goto(url)``.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - start)
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        """Summaries of every phase, keyed by phase name."""
+        return {
+            phase: histogram.summary()
+            for phase, histogram in sorted(self.histograms.items())
+        }
+
+    def to_json(self) -> str:
+        """Export the summaries as JSON."""
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, name: str = "undetectable_bot_phase") -> str:
+        """Export the histograms as Prometheus summaries."""
+        metric = f"{name}_seconds"
+        lines = [
+            f"# HELP {metric} Time spent in each browser phase.",
+            f"# TYPE {metric} summary",
+        ]
+        for phase, histogram in sorted(self.histograms.items()):
+            lines.extend(
+                f'{metric}{{phase="{phase}",quantile="{quantile}"}} '
+                f"{histogram.percentile(quantile)}"
+                for quantile in QUANTILES
+            )
+            lines.append(f'{metric}_sum{{phase="{phase}"}} {histogram.total}')
+            lines.append(
+                f'{metric}_count{{phase="{phase}"}} {histogram.count}'
+            )
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory: Path) -> tuple[Path, Path]:
+        """Write JSON and Prometheus exports into ``directory``."""
+        json_path = directory / "metrics.json"
+        prom_path = directory / "metrics.prom"
+        json_path.write_text(self.to_json(), encoding="utf-8")
+        prom_path.write_text(self.to_prometheus(), encoding="utf-8")
+        return json_path, prom_path
+
+    def reset(self) -> None:
+        """Drop all recorded samples, keeping the hooks."""
+        self.histograms.clear()
+
+
+METRICS = Metrics()
@@ -0,0 +1,23 @@
+"""Access to optional third-party dependencies."""
+
+import importlib
+from types import ModuleType
+
+from undetectable_bot.utils.exceptions import MissingDependencyError
+
+
+def require(module: str, *, package: str, extra: str) -> ModuleType:
+    """Import an optional module or explain how to install it.
+
+    Args:
+        module: The module to import, e.g. ``"PIL.Image"``.
+        package: The distribution that provides it.
+        extra: The project extra that pulls the package in.
+
+    Raises:
+        MissingDependencyError: If the module cannot be imported.
+    """
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        raise MissingDependencyError(package, extra) from None
@@ -0,0 +1,70 @@
+"""Process memory sampling through ``/proc``.
+
+Playwright does not expose the Chromium process, so the browser is
+found by walking the descendants of the current process. On systems
+without ``/proc`` every helper reports no processes and zero bytes.
+"""
+
+import os
+from pathlib import Path
+
+PROC: Path = Path("/proc")
+_CHROMIUM_NAMES = ("chrome", "chromium", "headless_shell")
+
+
+def _read(path: Path) -> str:
+    try:
+        return path.read_text(encoding="utf-8")
+    except OSError:
+        return ""
+
+
+def parent_pids() -> dict[int, int]:
+    """Map every visible process id to its parent's id."""
+    parents = {}
+    for entry in PROC.glob("[0-9]*"):
+        stat = _read(entry / "stat")
+        # The command name is parenthesised and may contain spaces.
+        fields = stat.rpartition(")")[2].split()
+        if len(fields) > 1:
+            parents[int(entry.name)] = int(fields[1])
+    return parents
+
+
+def descendants(pid: int) -> list[int]:
+    """All processes started, directly or not, by ``pid``."""
+    children: dict[int, list[int]] = {}
+    for child, parent in parent_pids().items():
+        children.setdefault(parent, []).append(child)
+    found = []
+    stack = list(children.get(pid, ()))
+    while stack:
+        child = stack.pop()
+        found.append(child)
+        stack.extend(children.get(child, ()))
+    return found
+
+
+def rss_bytes(pid: int) -> int:
+    """Resident set size of a process, or 0 if it is gone."""
+    for line in _read(PROC / str(pid) / "status").splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1]) * 1024
+    return 0
+
+
+def chromium_pids(pid: int | None = None) -> list[int]:
+    """Chromium processes under ``pid``, by default this process."""
+    root = os.getpid() if pid is None else pid
+    return [
+        child
+        for child in descendants(root)
+        if _read(PROC / str(child) / "comm")
+        .strip()
+        .startswith(_CHROMIUM_NAMES)
+    ]
+
+
+def chromium_rss_bytes(pid: int | None = None) -> int:
+    """Combined resident set size of the Chromium processes."""
+    return sum(rss_bytes(child) for child in chromium_pids(pid))
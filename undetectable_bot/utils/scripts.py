@@ -0,0 +1,138 @@
+"""Loading and caching of the init scripts injected into pages.
+
+The stealth script is a core that runs on every page plus page modules
+in ``js/pages``. A module declares the URLs it applies to with leading
+``// @match <glob>`` comments and is skipped everywhere else, so its
+DOM work costs nothing on unrelated pages.
+"""
+
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+from undetectable_bot.utils.constants import PAGE_MODULES_DIR, STEALTH_JS_PATH
+
+
+@dataclass(frozen=True, slots=True)
+class InitScript:
+    """An init script held in memory."""
+
+    source: str
+    digest: str
+
+
+_CACHE: dict[tuple[Path, bool], tuple[tuple[int, int], InitScript]] = {}
+
+
+def minify_js(source: str) -> str:
+    """Strip indentation, blank lines and whole-line ``//`` comments.
+
+    This is deliberately conservative: trailing comments and block
+    comments are kept, and multi-line template literals are not
+    supported.
+    """
+    lines = (line.strip() for line in source.splitlines())
+    return "\n".join(
+        line for line in lines if line and not line.startswith("//")
+    )
+
+
+def load_init_script(
+    path: Path = STEALTH_JS_PATH, *, minify: bool = False
+) -> InitScript:
+    """Return the contents of an init script, reading it at most once.
+
+    The cached copy is reused until the file's mtime or size changes.
+
+    Args:
+        path: The script to load. Defaults to the stealth script.
+        minify: Whether to pass the source through ``minify_js``.
+    """
+    stat = path.stat()
+    version = (stat.st_mtime_ns, stat.st_size)
+    key = (path, minify)
+    cached = _CACHE.get(key)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    source = path.read_text(encoding="utf-8")
+    if minify:
+        source = minify_js(source)
+    script = InitScript(
+        source, hashlib.sha256(source.encode("utf-8")).hexdigest()
+    )
+    _CACHE[key] = (version, script)
+    return script
+
+
+def combine_scripts(sources: list[str]) -> str:
+    """Join init scripts into one payload.
+
+    Each script is wrapped in its own function scope when there is more
+    than one, so their top-level declarations cannot collide.
+    """
+    if len(sources) == 1:
+        return sources[0]
+    return "\n".join(f"(() => {{\n{source}\n}})();" for source in sources)
+
+
+_MATCH = re.compile(r"^//\s*@match\s+(\S+)\s*$")
+_REGEX_SPECIAL = frozenset("\\^$.|?+()[]{}/")
+
+
+def parse_matches(source: str) -> tuple[str, ...]:
+    """The ``@match`` URL globs in a script's leading comments."""
+    matches = []
+    for line in source.splitlines():
+        if not line.startswith("//"):
+            break
+        if match := _MATCH.match(line):
+            matches.append(match.group(1))
+    return tuple(matches)
+
+
+def _glob_to_js(glob: str) -> str:
+    """A JavaScript regex source matching URLs against ``glob``.
+
+    ``*`` matches any run of characters; everything else is literal.
+    """
+    body = "".join(
+        ".*"
+        if char == "*"
+        else f"\\{char}"
+        if char in _REGEX_SPECIAL
+        else char
+        for char in glob
+    )
+    return f"^{body}$"
+
+
+def scope_to_pages(source: str, matches: tuple[str, ...]) -> str:
+    """Guard ``source`` so it only runs on URLs matching a glob."""
+    pattern = "|".join(_glob_to_js(glob) for glob in matches)
+    return (
+        f"if (new RegExp({json.dumps(pattern)}).test(location.href)) {{\n"
+        f"{source}\n}}"
+    )
+
+
+def load_stealth_script(
+    *,
+    minify: bool = False,
+    path: Path = STEALTH_JS_PATH,
+    modules_dir: Path = PAGE_MODULES_DIR,
+) -> str:
+    """The stealth core followed by its URL-scoped page modules.
+
+    Modules without an ``@match`` line apply to no page and are left
+    out. Every file goes through ``load_init_script``'s cache.
+    """
+    sources = [load_init_script(path, minify=minify).source]
+    for module in sorted(modules_dir.glob("*.js")):
+        # Matches are read before minifying strips the comments.
+        if matches := parse_matches(load_init_script(module).source):
+            source = load_init_script(module, minify=minify).source
+            sources.append(scope_to_pages(source, matches))
+    return combine_scripts(sources)
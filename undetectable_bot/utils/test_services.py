@@ -1,64 +1,542 @@
+import argparse
 import asyncio
 import logging
+import time
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Final
+from typing import Final, get_args
 
-from playwright.async_api import Error as PlaywrightError
-from playwright.async_api import Page
+from playwright.async_api import BrowserContext, Page
 
 from undetectable_bot.browser.async_api import AsyncStealthBrowser
+from undetectable_bot.browser.cache import ResponseCache
+from undetectable_bot.browser.capture import (
+    DEFAULT_CAPTURE,
+    CaptureOptions,
+    capture_screenshot,
+)
+from undetectable_bot.browser.readiness import (
+    DEFAULT_READINESS,
+    NETWORK_IDLE,
+    NetworkMonitor,
+    ReadinessStrategy,
+    wait_until_ready,
+)
+from undetectable_bot.browser.recording import NetworkArchive
+from undetectable_bot.browser.resources import ResourceProfile
+from undetectable_bot.utils.artifact_store import ArtifactStore
+from undetectable_bot.utils.artifacts import (
+    ArtifactWriter,
+    HtmlCompression,
+    ScreenshotFormat,
+)
+from undetectable_bot.utils.backoff import backoff_delay
+from undetectable_bot.utils.config import (
+    RunConfig,
+    ServiceConfig,
+    load_config,
+)
+from undetectable_bot.utils.constants import RETRY_ATTEMPTS
+from undetectable_bot.utils.logging import configure_logging, job_context
+from undetectable_bot.utils.manifest import ManifestEntry, RunManifest
+from undetectable_bot.utils.metrics import METRICS
 
 logger = logging.getLogger(__name__)
 
-TEST_SERVICES: Final[dict[str, str]] = {
-    "bot_sannysoft": "https://bot.sannysoft.com/",
+TEST_SERVICES: Final[dict[str, ServiceConfig]] = {
+    # The results table is at the top of a long page of fingerprints.
+    # Thumbnails need Pillow, so they are left to the config file.
+    "bot_sannysoft": ServiceConfig(
+        "https://bot.sannysoft.com/", CaptureOptions(max_height=4000)
+    ),
 }
 
 
+@dataclass(frozen=True, slots=True)
+class ServiceResult:
+    """Outcome of testing a single service."""
+
+    name: str
+    url: str
+    elapsed: float
+    error: str | None = None
+    attempts: int = 1
+    artifacts: tuple[Path, ...] = ()
+
+    @property
+    def ok(self) -> bool:
+        """Whether the service was tested successfully."""
+        return self.error is None
+
+
 async def save_page_content(
-    page: Page, service_name: str, data_dir: Path
-) -> None:
-    """Save page content and screenshot for a test service."""
+    page: Page,
+    service_name: str,
+    data_dir: Path,
+    writer: ArtifactWriter,
+    capture: CaptureOptions = DEFAULT_CAPTURE,
+) -> tuple[Path, ...]:
+    """Capture page content and screenshot and queue them to disk.
+
+    Returns:
+        Where the artifacts will be written.
+    """
     service_dir = data_dir / service_name
-    service_dir.mkdir(exist_ok=True)
+    options = writer.options
+
+    # Capture screenshot; WebP is re-encoded from PNG by the writer.
+    with METRICS.span("screenshot"):
+        screenshot = await capture_screenshot(
+            page,
+            capture,
+            screenshot_format=options.screenshot_format,
+            quality=options.screenshot_quality,
+        )
+    paths = [
+        await writer.write_screenshot(
+            service_dir / "screenshot",
+            screenshot,
+            screenshot_format=capture.screenshot_format,
+            quality=capture.screenshot_quality,
+        )
+    ]
+    if capture.thumbnail_width:
+        paths.append(
+            await writer.write_thumbnail(
+                service_dir / "screenshot",
+                screenshot,
+                capture.thumbnail_width,
+                screenshot_format=capture.screenshot_format,
+                quality=capture.screenshot_quality,
+            )
+        )
 
-    # Save screenshot
-    screenshot_path = service_dir / "screenshot.png"
-    await page.screenshot(path=str(screenshot_path), full_page=True)
+    # Capture HTML content
+    with METRICS.span("content"):
+        html = await page.content()
+    paths.append(await writer.write_html(service_dir / "index", html))
+    return tuple(paths)
 
-    # Save HTML content
-    html_path = service_dir / "index.html"
-    html_path.write_text(await page.content(), encoding="utf-8")
 
+async def test_service(  # noqa: PLR0913
+    page: Page,
+    service_name: str,
+    url: str,
+    data_dir: Path,
+    writer: ArtifactWriter,
+    *,
+    readiness: ReadinessStrategy = DEFAULT_READINESS,  # noqa: PT028
+    capture: CaptureOptions = DEFAULT_CAPTURE,  # noqa: PT028
+) -> tuple[Path, ...]:
+    """Test a single service and save results.
 
-async def test_service(
-    page: Page, service_name: str, url: str, data_dir: Path
-) -> None:
-    """Test a single service and save results."""
+    Returns:
+        Where the service's artifacts will be written.
+    """
     logger.info("Testing %s...", service_name)
-    await page.goto(url)
-    await page.wait_for_load_state("networkidle")
-    await save_page_content(page, service_name, data_dir)
+    with NetworkMonitor(page, readiness) as monitor:
+        with METRICS.span("goto"):
+            await page.goto(url, wait_until="commit")
+        with METRICS.span("wait_for_load"):
+            ready = await wait_until_ready(page, readiness, monitor)
+    if not ready:
+        logger.warning("%s did not settle, capturing as is", service_name)
+    paths = await save_page_content(
+        page, service_name, data_dir, writer, capture
+    )
     logger.info("Completed %s", service_name)
+    return paths
+
+
+async def attempt_service(  # noqa: PLR0913
+    browser: AsyncStealthBrowser,
+    limit: asyncio.Semaphore,
+    service_name: str,
+    url: str,
+    *,
+    data_dir: Path,
+    writer: ArtifactWriter,
+    timeout: float,  # noqa: ASYNC109
+    readiness: ReadinessStrategy = DEFAULT_READINESS,
+    capture: CaptureOptions = DEFAULT_CAPTURE,
+    resource_profile: ResourceProfile | None = None,
+    attempt: int = 1,
+) -> ServiceResult:
+    """Test a service once on its own pooled context.
+
+    The attempt runs as an idempotent ``browser.run`` job, so it is
+    repeated on a fresh context if the browser crashes under it. Any
+    error is logged and recorded in the result, so one failing service
+    never stops the others.
+    """
+
+    async def job(context: BrowserContext) -> tuple[Path, ...]:
+        page = await context.new_page()
+        try:
+            async with asyncio.timeout(timeout):
+                if resource_profile is not None:
+                    await browser.block_resources(page, resource_profile)
+                return await test_service(
+                    page,
+                    service_name,
+                    url,
+                    data_dir,
+                    writer,
+                    readiness=readiness,
+                    capture=capture,
+                )
+        finally:
+            await page.close()
+
+    async with limit:
+        start = time.perf_counter()
+        error: str | None = None
+        artifacts: tuple[Path, ...] = ()
+        try:
+            artifacts = await browser.run(job, idempotent=True)
+        except Exception as exc:
+            logger.exception("Error testing %s", service_name)
+            error = str(exc) or type(exc).__name__
+        return ServiceResult(
+            service_name,
+            url,
+            time.perf_counter() - start,
+            error,
+            attempt,
+            artifacts,
+        )
+
 
+async def run_service(  # noqa: PLR0913
+    browser: AsyncStealthBrowser,
+    limit: asyncio.Semaphore,
+    service_name: str,
+    url: str,
+    *,
+    data_dir: Path,
+    writer: ArtifactWriter,
+    manifest: RunManifest,
+    timeout: float,  # noqa: ASYNC109
+    retries: int = RETRY_ATTEMPTS,
+    readiness: ReadinessStrategy = DEFAULT_READINESS,
+    capture: CaptureOptions = DEFAULT_CAPTURE,
+    resource_profile: ResourceProfile | None = None,
+) -> ServiceResult:
+    """Test a service, retrying failures with backoff.
 
-async def test_all_services() -> None:
-    """Test all browser detection services."""
+    Every attempt is recorded in ``manifest``. Attempt numbers carry on
+    from a resumed manifest, and ``retries`` more are made after the
+    first failure of this run.
+    """
+    first = manifest.attempts(service_name) + 1
+    with job_context(service_name):
+        for attempt in range(first, first + retries + 1):
+            if attempt > first:
+                delay = backoff_delay(attempt - first)
+                logger.info("Retrying %s in %.1fs", service_name, delay)
+                await asyncio.sleep(delay)
+            result = await attempt_service(
+                browser,
+                limit,
+                service_name,
+                url,
+                data_dir=data_dir,
+                writer=writer,
+                timeout=timeout,
+                readiness=readiness,
+                capture=capture,
+                resource_profile=resource_profile,
+                attempt=attempt,
+            )
+            await asyncio.to_thread(
+                manifest.record,
+                ManifestEntry(
+                    service_name,
+                    url,
+                    "ok" if result.ok else "failed",
+                    attempt,
+                    tuple(str(path) for path in result.artifacts),
+                    {"elapsed": result.elapsed},
+                    result.error,
+                ),
+            )
+            if result.ok:
+                break
+    return result
+
+
+async def test_all_services(
+    config: RunConfig | None = None,  # noqa: PT028
+    *,
+    cache_dir: Path | None = None,  # noqa: PT028
+    store_dir: Path | None = None,  # noqa: PT028
+    resume: bool = False,  # noqa: PT028
+    network_archive: NetworkArchive | None = None,  # noqa: PT028
+) -> list[ServiceResult]:
+    """Test all browser detection services concurrently.
+
+    Args:
+        config: Run settings and the services to test. Defaults to
+            ``TEST_SERVICES`` with the default settings.
+        cache_dir: Where to keep a response cache shared across runs.
+            Responses are not cached when omitted.
+        store_dir: Where to keep a deduplicated archive of every run's
+            artifacts. Artifacts are only written to ``data`` when
+            omitted.
+        resume: Continue the run recorded in ``data/manifest.jsonl``,
+            skipping services that already completed.
+        network_archive: Record the run's traffic to this archive, or
+            replay a recorded run offline from it.
+
+    Returns:
+        One result per service tested, in configuration order.
+    """
+    config = config or RunConfig()
+    catalogue = config.services or TEST_SERVICES
     data_dir = Path("data")
     data_dir.mkdir(exist_ok=True)
+    manifest = RunManifest(data_dir / "manifest.jsonl", resume=resume)
+    services = {
+        name: service
+        for name, service in catalogue.items()
+        if not manifest.done(name)
+    }
+    for service in services.values():
+        (service.capture or config.capture).check_dependencies()
+    if skipped := len(catalogue) - len(services):
+        logger.info("Resuming: %d services already completed", skipped)
+    limit = asyncio.Semaphore(config.concurrency)
+    cache = ResponseCache(cache_dir) if cache_dir else None
+    store = ArtifactStore(store_dir) if store_dir else None
+
+    try:
+        async with (
+            ArtifactWriter(config.artifacts, store=store) as writer,
+            AsyncStealthBrowser(
+                headless=config.headless,
+                min_contexts=config.concurrency,
+                max_contexts=config.concurrency,
+                resource_profile=config.resource_profile,
+                response_cache=cache,
+                context_settings=config.context_settings,
+                launch_args=config.launch_args,
+                network_archive=network_archive,
+            ) as browser,
+        ):
+            results = await asyncio.gather(
+                *(
+                    run_service(
+                        browser,
+                        limit,
+                        name,
+                        service.url,
+                        data_dir=data_dir,
+                        writer=writer,
+                        manifest=manifest,
+                        timeout=(
+                            config.timeout
+                            if service.timeout is None
+                            else service.timeout
+                        ),
+                        retries=config.retries,
+                        readiness=service.readiness or config.readiness,
+                        capture=service.capture or config.capture,
+                        resource_profile=service.resource_profile,
+                    )
+                    for name, service in services.items()
+                )
+            )
+    finally:
+        manifest.close()
+        if store:
+            store.close()
+        if cache:
+            logger.info("Response cache: %s", cache.stats)
+            cache.close()
+    METRICS.write(data_dir)
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments for the service runner.
+
+    Options left out keep the value from ``--config``, if given.
+    """
+    parser = argparse.ArgumentParser(
+        description="Test browser detection services."
+    )
+    parser.add_argument(
+        "--config",
+        type=Path,
+        metavar="FILE",
+        help="TOML file with run settings and the services to test",
+    )
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        help="number of services tested in parallel",
+    )
+    parser.add_argument(
+        "-t",
+        "--timeout",
+        type=float,
+        help="seconds allowed per service",
+    )
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        metavar="DIR",
+        help="cache static responses in DIR across runs",
+    )
+    parser.add_argument(
+        "--store",
+        type=Path,
+        metavar="DIR",
+        help="keep deduplicated artifacts of every run in DIR",
+    )
+    archive = parser.add_mutually_exclusive_group()
+    archive.add_argument(
+        "--record",
+        type=Path,
+        metavar="DIR",
+        help="record all network traffic to HAR archives in DIR",
+    )
+    archive.add_argument(
+        "--replay",
+        type=Path,
+        metavar="DIR",
+        help="serve pages offline from the archives in DIR",
+    )
+    parser.add_argument(
+        "--screenshot-format",
+        choices=get_args(ScreenshotFormat),
+    )
+    parser.add_argument(
+        "--screenshot-quality",
+        type=int,
+        help="JPEG/WebP quality, 0-100",
+    )
+    parser.add_argument(
+        "--html-compression",
+        choices=get_args(HtmlCompression),
+    )
+    parser.add_argument(
+        "--log-json",
+        action="store_true",
+        help="log JSON lines from a background thread",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="skip services completed by the previous run",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        help="attempts after a service first fails",
+    )
+    parser.add_argument(
+        "--wait-for",
+        metavar="SELECTOR",
+        help="also wait for SELECTOR before capturing",
+    )
+    parser.add_argument(
+        "--ready-deadline",
+        type=float,
+        metavar="SECONDS",
+        help="capture pages that have not settled after SECONDS",
+    )
+    parser.add_argument(
+        "--network-idle",
+        action="store_true",
+        help="wait for Playwright's networkidle instead",
+    )
+    return parser.parse_args()
+
+
+def readiness_from_args(
+    args: argparse.Namespace, base: ReadinessStrategy = DEFAULT_READINESS
+) -> ReadinessStrategy:
+    """Apply the readiness options given on the command line."""
+    strategy = (
+        replace(NETWORK_IDLE, deadline=base.deadline)
+        if args.network_idle
+        else base
+    )
+    if args.wait_for is not None:
+        strategy = replace(strategy, selector=args.wait_for)
+    if args.ready_deadline is not None:
+        strategy = replace(strategy, deadline=args.ready_deadline)
+    return strategy
+
+
+def archive_from_args(args: argparse.Namespace) -> NetworkArchive | None:
+    """The archive named by ``--record`` or ``--replay``, if any."""
+    if args.record:
+        return NetworkArchive(args.record, "record")
+    if args.replay:
+        return NetworkArchive(args.replay, "replay")
+    return None
 
-    async with AsyncStealthBrowser() as browser:
-        context = await browser.new_context()
-        page = await context.new_page()
 
-        for service_name, url in TEST_SERVICES.items():
-            try:
-                await test_service(page, service_name, url, data_dir)
-            except PlaywrightError:
-                logger.exception("Error testing %s", service_name)
+def config_from_args(args: argparse.Namespace) -> RunConfig:
+    """Load ``--config`` and apply the other options over it.
 
-        await page.close()
+    Options given on the command line win over every setting in the
+    file, including those of individual services.
+    """
+    config = load_config(args.config) if args.config else RunConfig()
+    run = {
+        name: value
+        for name in ("concurrency", "timeout", "retries")
+        if (value := getattr(args, name)) is not None
+    }
+    screenshot = {
+        name: value
+        for name in ("screenshot_format", "screenshot_quality")
+        if (value := getattr(args, name)) is not None
+    }
+    artifacts = dict(screenshot)
+    if args.html_compression is not None:
+        artifacts["html_compression"] = args.html_compression
+    # Screenshot settings of a capture beat the writer's, so they are
+    # overridden too.
+    services = {
+        name: replace(
+            service,
+            readiness=(
+                None
+                if service.readiness is None
+                else readiness_from_args(args, service.readiness)
+            ),
+            capture=(
+                None
+                if service.capture is None
+                else replace(service.capture, **screenshot)
+            ),
+        )
+        for name, service in config.services.items()
+    }
+    return replace(
+        config,
+        **run,
+        readiness=readiness_from_args(args, config.readiness),
+        capture=replace(config.capture, **screenshot),
+        artifacts=replace(config.artifacts, **artifacts),
+        services=services,
+    )
 
 
 if __name__ == "__main__":
-    asyncio.run(test_all_services())
+    args = parse_args()
+    configure_logging(structured=args.log_json)
+    asyncio.run(
+        test_all_services(
+            config_from_args(args),
+            cache_dir=args.cache,
+            store_dir=args.store,
+            resume=args.resume,
+            network_archive=archive_from_args(args),
+        )
+    )